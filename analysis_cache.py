@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+
+# Disk cache for the stages of an image analysis.
+#
+# Researchers re-run the same images with one setting changed, or several
+# people in a lab analyze the same dataset. Every stage's output is stored
+# under a key derived from what it was computed from:
+#
+#     plane       the decoded image         hash of the uploaded file + which plane
+#     corrected   background-corrected,     plane key + background/smoothing settings
+#                 smoothed tile
+#     mask        labeled objects per tile  corrected key + threshold/splitting settings
+#     rois        polygons per tile         mask key + size filter
+#
+# so a run first looks for the last stage and only computes what is missing:
+# changing only min_area reruns only the size filter and polygon tracing, and
+# the same file uploaded by someone else is analyzed from the cache. Which
+# settings belong to which stage is segmentation.STAGE_PARAMS.
+#
+# An entry is a directory of .npy files, written under a temporary name and
+# renamed into place, so worker processes can share the cache and readers
+# never see half an entry. Arrays are loaded memory-mapped. Each read touches
+# the entry's mtime, and evict() deletes the least recently used entries until
+# the cache is under max_bytes; it runs after every analysis, so the cache
+# can overshoot the cap by at most one analysis in between.
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'cellai_cache')
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+
+def entry_key(*parts) -> str:
+    """A cache key for JSON-serializable parts (earlier keys, stage names, settings)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def array_digest(image, band_rows=1024) -> str:
+    """SHA-256 of an image's shape, type and pixels, read in bands so a mapped image isn't loaded whole."""
+    digest = hashlib.sha256(f"{image.shape} {image.dtype}".encode('ascii'))
+    for top in range(0, image.shape[0], band_rows):
+        digest.update(np.ascontiguousarray(image[top:top + band_rows]).data)
+    return digest.hexdigest()
+
+
+def _load(path):
+    try:
+        return np.load(path, mmap_mode='r', allow_pickle=False)
+    except ValueError:
+        # Empty arrays can't be mapped
+        return np.load(path, allow_pickle=False)
+
+
+class AnalysisCache:
+    """Content-addressed entries of named NumPy arrays on disk, with LRU eviction under max_bytes."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        # Two-level layout keeps directories small
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key, names):
+        """{name: array (memory-mapped)} for the named arrays stored under key, or None."""
+        path = self._path(key)
+        try:
+            entry = {name: _load(os.path.join(path, f"{name}.npy")) for name in names}
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Missing, or evicted while being read
+            return None
+        return entry
+
+    def put(self, key, arrays):
+        """Store {name: array} under key. An entry that already exists is left as it is."""
+        path = self._path(key)
+        if os.path.isdir(path):
+            return
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key}.", dir=parent)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+            os.rename(staging, path)
+        except OSError:
+            # Another process stored the same entry first (or the disk is full): the cache is only an optimization
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def entries(self):
+        """(last used, bytes, path) for every entry."""
+        result = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    size = sum(item.stat().st_size for item in os.scandir(entry.path))
+                    result.append((entry.stat().st_mtime, size, entry.path))
+                except OSError:
+                    pass
+        return result
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Delete the least recently used entries until the cache holds at most max_bytes. Returns bytes freed."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            freed += size
+        self._remove_stale_staging()
+        return freed
+
+    def _remove_stale_staging(self, max_age=3600):
+        # Temporary directories left by writers that died mid-put
+        cutoff = time.time() - max_age
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if not entry.name.startswith('.'):
+                        continue
+                    try:
+                        stale = entry.stat().st_mtime < cutoff
+                    except OSError:
+                        # Renamed into place or removed by a run that just finished
+                        continue
+                    if stale:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+
+    def clear(self):
+        self.evict(0)
+
+
+def cached_plane(cache, image_key, position, decode):
+    """A decoded image plane from the cache, decoding (decode()) and storing it on a miss. Returns (key, array)."""
+    key = entry_key('plane', image_key, position)
+    entry = cache.get(key, ('plane',))
+    if entry is not None:
+        return key, entry['plane']
+    plane = decode()
+    cache.put(key, {'plane': plane})
+    # Read back mapped, so the decoded copy can be dropped (unless storing it failed)
+    entry = cache.get(key, ('plane',))
+    return key, plane if entry is None else entry['plane']
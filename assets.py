@@ -0,0 +1,242 @@
+import os
+import io
+import sys
+import html
+import json
+import hashlib
+
+from atomic_files import write_atomic
+
+# Static asset pipeline for the landing page.
+#
+# Images are recompressed once into AVIF/WebP/JPEG variants at a few widths
+# and written to static/ under content-hashed names, which Streamlit serves at
+# app/static/ when server.enableStaticServing is on. The page then links to
+# those URLs with srcset/image-set instead of inlining base64 data or sending
+# full-resolution files, and the hashed names mean a browser or CDN can cache
+# them indefinitely.
+#
+# Variants are built at deploy time, not on a request: run `python assets.py`
+# as a build step. It writes static/manifest.json, which the app reads
+# (load_variants) to find them; an image whose variants are missing or older
+# than the source is served as the original file instead of being encoded
+# while a visitor waits. Pillow is only imported when variants are built, so
+# importing this module for the URLs and HTML helpers doesn't slow down the
+# app's cold start.
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(APP_DIR, 'static')
+STATIC_URL = 'app/static'
+MANIFEST_PATH = os.path.join(STATIC_DIR, 'manifest.json')
+
+# Width buckets for srcset; sources narrower than a bucket are not upscaled
+WIDTHS = (480, 960, 1440)
+
+# (extension, mime type, Pillow save options), best format first
+VARIANT_FORMATS = [
+    ('avif', 'image/avif', {'quality': 50}),
+    ('webp', 'image/webp', {'quality': 72, 'method': 6}),
+    ('jpg', 'image/jpeg', {'quality': 78, 'optimize': True, 'progressive': True, 'subsampling': '4:2:0'}),
+]
+
+# Images the landing page renders: the hero background and landing_content.FEATURE_IMAGES
+LANDING_IMAGES = ['hero_image.jpg', 'draganddrop.png', 'micro_man.png']
+
+# Largest acceptable file per image at each width (any format), checked by `python assets.py --check`
+BYTE_BUDGETS = {
+    480: 40_000,
+    960: 100_000,
+    1440: 160_000,
+}
+
+def _variant_name(image_path, source_bytes, ext, options, width):
+    digest = hashlib.sha256(source_bytes + repr((ext, sorted(options.items()), width)).encode()).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return f"{stem}-{width}w-{digest}.{ext}"
+
+
+def _bucket_widths(source_width, widths=WIDTHS):
+    buckets = [width for width in widths if width < source_width]
+    # Always offer the largest size we can serve without upscaling
+    largest = min(source_width, widths[-1])
+    if largest not in buckets:
+        buckets.append(largest)
+    return buckets
+
+
+def build_variants(image_path, widths=WIDTHS, static_dir=STATIC_DIR):
+    """Write resized, recompressed variants of an image to static_dir.
+
+    Returns a list of (mime type, [(width, url, bytes), ...]) in order of
+    format preference, with widths ascending. Variants that already exist are
+    reused, so this is cheap after the first run.
+    """
+    from PIL import Image
+
+    with open(image_path, 'rb') as f:
+        source_bytes = f.read()
+    os.makedirs(static_dir, exist_ok=True)
+
+    image = None
+    with Image.open(io.BytesIO(source_bytes)) as probe:
+        # EXIF orientations 5-8 rotate by 90 degrees
+        source_width = probe.height if probe.getexif().get(0x0112, 1) > 4 else probe.width
+
+    variants = []
+    for ext, mime, options in VARIANT_FORMATS:
+        sizes = []
+        for width in _bucket_widths(source_width, widths):
+            name = _variant_name(image_path, source_bytes, ext, options, width)
+            path = os.path.join(static_dir, name)
+            if not os.path.exists(path):
+                if image is None:
+                    image = _load_for_web(source_bytes)
+                buffer = io.BytesIO()
+                try:
+                    _resize(image, width).save(buffer, format=Image.registered_extensions()['.' + ext], **options)
+                except (KeyError, OSError):
+                    # This Pillow build can't write the format; the others still apply
+                    break
+                write_atomic(path, buffer.getvalue())
+            sizes.append((width, f"{STATIC_URL}/{name}", os.path.getsize(path)))
+        if sizes:
+            variants.append((mime, sizes))
+    return variants
+
+
+def load_variants(image_path, manifest_path=MANIFEST_PATH):
+    """The variants build_all recorded for an image, as build_variants returns them, or None.
+
+    None if there is no manifest entry, the source has changed since, or a
+    variant file is missing. Never encodes anything.
+    """
+    try:
+        with open(manifest_path) as f:
+            entry = json.load(f).get(os.path.basename(image_path))
+        with open(image_path, 'rb') as f:
+            source_digest = hashlib.sha256(f.read()).hexdigest()
+    except (OSError, ValueError):
+        return None
+    if entry is None or entry['source'] != source_digest:
+        return None
+    static_dir = os.path.dirname(manifest_path)
+    for _, sizes in entry['variants']:
+        for _, url, _ in sizes:
+            if not os.path.exists(os.path.join(static_dir, url.rsplit('/', 1)[-1])):
+                return None
+    return [(mime, [tuple(size) for size in sizes]) for mime, sizes in entry['variants']]
+
+
+def _load_for_web(source_bytes):
+    # Decode, apply EXIF rotation, convert to sRGB and drop alpha and all metadata
+    from PIL import Image, ImageCms, ImageOps
+
+    with Image.open(io.BytesIO(source_bytes)) as image:
+        image = ImageOps.exif_transpose(image)
+        icc_profile = image.info.get('icc_profile')
+        if icc_profile:
+            try:
+                source_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+                image = ImageCms.profileToProfile(image, source_profile, ImageCms.createProfile('sRGB'), outputMode='RGB')
+            except ImageCms.PyCMSError:
+                pass
+        image = image.convert('RGB')
+        image.info = {}
+        return image
+
+
+def _resize(image, width):
+    if image.width <= width:
+        return image
+    from PIL import Image
+
+    height = round(image.height * width / image.width)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def _srcset(sizes):
+    return ", ".join(f"{url} {width}w" for width, url, _ in sizes)
+
+
+def picture_html(variants, alt, caption=None, sizes="(max-width: 640px) 100vw, 40vw"):
+    """A <picture> element that lets the browser pick format and width."""
+    sources = "".join(
+        f'<source type="{mime}" srcset="{_srcset(widths)}" sizes="{sizes}">' for mime, widths in variants[:-1]
+    )
+    fallback_widths = variants[-1][1]
+    default_url = fallback_widths[0][1]
+    img = (
+        f'<img src="{default_url}" srcset="{_srcset(fallback_widths)}" sizes="{sizes}" '
+        f'alt="{html.escape(alt)}" loading="lazy" decoding="async" style="width: 100%; height: auto;">'
+    )
+    return _figure(f"<picture>{sources}{img}</picture>", caption)
+
+
+def image_html(src, alt, caption=None):
+    """A single <img> (e.g. a data: URL of the original file), laid out like picture_html."""
+    img = f'<img src="{src}" alt="{html.escape(alt)}" style="width: 100%; height: auto;">'
+    return _figure(img, caption)
+
+
+def _figure(figure, caption):
+    if caption:
+        figure += f'<figcaption style="text-align: center; font-size: 0.9em; color: grey;">{html.escape(caption)}</figcaption>'
+    return f'<figure style="margin: 0 0 1em 0;">{figure}</figure>'
+
+
+def background_image_css(variants, selector):
+    """CSS that picks the best supported format, and a smaller width on narrow screens."""
+    by_width = {}
+    for mime, sizes in variants:
+        for width, url, _ in sizes:
+            by_width.setdefault(width, []).append((mime, url))
+
+    widths = sorted(by_width, reverse=True)
+    rules = []
+    for width in widths:
+        candidates = by_width[width]
+        image_set = ", ".join(f'url({url}) type("{mime}")' for mime, url in candidates)
+        rule = f"{selector} {{ background-image: url({candidates[-1][1]}); background-image: image-set({image_set}); }}"
+        if width != widths[0]:
+            rule = f"@media (max-width: {width}px) {{ {rule} }}"
+        rules.append(rule)
+    return "\n".join(rules)
+
+
+def check_budgets(image_paths=LANDING_IMAGES):
+    """Return a list of variants that are larger than their byte budget."""
+    over_budget = []
+    for image_path in image_paths:
+        for mime, sizes in build_variants(os.path.join(APP_DIR, image_path)):
+            for width, url, size in sizes:
+                budget = next(budget for bucket, budget in sorted(BYTE_BUDGETS.items()) if width <= bucket)
+                if size > budget:
+                    over_budget.append((url, size, budget))
+    return over_budget
+
+
+def build_all(image_paths=LANDING_IMAGES, manifest_path=MANIFEST_PATH):
+    """Build every image's variants and record them in the manifest the app reads."""
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    for image_path in image_paths:
+        path = os.path.join(APP_DIR, image_path)
+        variants = build_variants(path)
+        with open(path, 'rb') as f:
+            manifest[os.path.basename(image_path)] = {'source': hashlib.sha256(f.read()).hexdigest(), 'variants': variants}
+        for mime, sizes in variants:
+            for width, url, size in sizes:
+                print(f"{image_path:<16} {mime:<11} {width:>5}w {size:>9,} bytes  {url}")
+    write_atomic(manifest_path, json.dumps(manifest, indent=1).encode('utf-8'))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--check']:
+        failures = check_budgets(sys.argv[2:] or LANDING_IMAGES)
+        for url, size, budget in failures:
+            print(f"{url}: {size:,} bytes exceeds budget of {budget:,}")
+        sys.exit(1 if failures else 0)
+    build_all(sys.argv[1:] or LANDING_IMAGES)
@@ -0,0 +1,96 @@
+"""Repeated analyses of one image through the AnalysisCache.
+
+Segments a synthetic image with an empty cache, then again with the same
+settings, with only the ROI size filter changed, with only the threshold
+changed, and with only the background radius changed, and reports the time
+each run took and how many tiles each stage was computed for. Every cached
+run is compared ROI by ROI with the same settings run without a cache. Then
+the cache is evicted down to half its size and checked to have kept the most
+recently used entries. Exits non-zero if any result differs, if a run
+recomputes a stage whose settings didn't change, or if an identical rerun is
+not at least MIN_SPEEDUP times faster than the cold run.
+
+Run from the repository root:
+
+    python benchmarks/bench_analysis_cache.py [image size]
+"""
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analysis_cache import AnalysisCache, array_digest
+from bench_segmentation import synthetic_image
+from segmentation import STAGE_PARAMS, SegmentationParams, segment_image
+
+DEFAULT_SIZE = 4096
+MIN_SPEEDUP = 10
+# (name, settings, first stage that has to be recomputed)
+RUNS = [
+    ('cold', {}, 'corrected'),
+    ('same settings', {}, None),
+    ('min_area 60', {'min_area': 60}, 'rois'),
+    ('adaptive threshold', {'threshold': 'adaptive'}, 'mask'),
+    ('background radius 64', {'background_radius': 64}, 'corrected'),
+]
+
+
+def signature(result):
+    return [(roi.bounds, roi.area, roi.mean_intensity, roi.polygon.tolist()) for roi in result.rois], result.truncated
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    image, _ = synthetic_image(size, size)
+    stages = list(STAGE_PARAMS)
+    problems = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AnalysisCache(directory)
+        image_key = array_digest(image)
+        print(f"{size}x{size} image")
+        print(f"{'run':<24}{'seconds':>9}{'uncached':>10}" + ''.join(f"{stage:>11}" for stage in stages) + f"{'ROIs':>8}")
+        seconds = {}
+        for name, settings, first in RUNS:
+            params = SegmentationParams(**settings)
+            result = segment_image(image, params, workers=1, cache=cache, image_key=image_key)
+            reference = segment_image(image, params, workers=1)
+            seconds[name] = result.seconds
+            print(f"{name:<24}{result.seconds:>9.3f}{reference.seconds:>10.3f}"
+                  + ''.join(f"{result.computed[stage]:>11}" for stage in stages) + f"{len(result.rois):>8,}")
+            if signature(result) != signature(reference):
+                problems.append(f"{name}: cached ROIs differ from an uncached run")
+            expected = stages[stages.index(first):] if first else []
+            for stage in stages:
+                if (result.computed[stage] > 0) != (stage in expected):
+                    problems.append(f"{name}: {stage} computed for {result.computed[stage]} of {result.tiles} tiles")
+
+        speedup = seconds['cold'] / seconds['same settings']
+        print(f"identical rerun: {speedup:.0f}x faster than cold")
+        if speedup < MIN_SPEEDUP:
+            problems.append(f"identical rerun only {speedup:.1f}x faster, expected {MIN_SPEEDUP}x")
+
+        # Use the first run's entries again, then evict down to half: they have to survive
+        segment_image(image, workers=1, cache=cache, image_key=image_key)
+        total = cache.size()
+        freed = cache.evict(total // 2)
+        print(f"cache {total / 1e6:.1f} MB, eviction to {total // 2 / 1e6:.1f} MB freed {freed / 1e6:.1f} MB")
+        if cache.size() > total // 2:
+            problems.append(f"cache still holds {cache.size():,} bytes after evicting to {total // 2:,}")
+        result = segment_image(image, workers=1, cache=cache, image_key=image_key)
+        if any(result.computed.values()):
+            problems.append(f"most recently used entries were evicted: computed {result.computed}")
+        cache.clear()
+        if cache.size():
+            problems.append("clear() left entries behind")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Cost of saving a one-cell edit from the debug page's data editor.
+
+The old save rewrote the whole list; apply_edits only touches the rows in the
+editor's delta. Exits non-zero if a single edit changes more than one row or
+gets slower as the list grows.
+
+Run from the repository root:
+
+    python benchmarks/bench_editor_save.py [rows]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unsubscribe_store import UnsubscribeStore
+
+
+def seeded_store(directory, rows):
+    store = UnsubscribeStore(os.path.join(directory, 'bench.db'))
+    store.bulk_add({'email': f"user{i}@example.com", 'reason': 'Seed'} for i in range(rows))
+    return store
+
+
+def full_rewrite(store, edit):
+    # What "Save Changes" used to do: write the whole edited frame back
+    records = store.records()
+    records[edit] = dict(records[edit], reason='Edited')
+    return store.replace_all(records)
+
+
+def one_cell_edit(store, edit):
+    return store.apply_edits(updates={f"user{edit}@example.com": {'reason': 'Edited'}})
+
+
+def logged(store):
+    # Rows the change-log triggers added, which total_changes counts as well
+    row = store.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'row_changes'").fetchone()
+    return row[0] if row else 0
+
+
+def run(label, func, rows):
+    with tempfile.TemporaryDirectory() as directory:
+        store = seeded_store(directory, rows)
+        store.count()
+        before = store.conn.total_changes - logged(store)
+        start = time.perf_counter()
+        result = func(store, rows // 2)
+        elapsed = time.perf_counter() - start
+        touched = store.conn.total_changes - logged(store) - before
+        if func is one_cell_edit:
+            assert result == touched, f"apply_edits reported {result} rows changed, {touched} were written"
+        assert store.get(f"user{rows // 2}@example.com").reason == 'Edited'
+        store.close()
+    print(f"{label:<13} {rows:>9,} rows  {elapsed * 1000:9.2f} ms  {touched:>9,} rows written")
+    return elapsed, touched
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run('full rewrite', full_rewrite, rows)
+    small, small_touched = run('apply_edits', one_cell_edit, 1_000)
+    large, large_touched = run('apply_edits', one_cell_edit, rows)
+
+    failures = []
+    if small_touched != 1 or large_touched != 1:
+        failures.append(f"a one-cell edit wrote {large_touched} rows, expected 1")
+    # Allow for noise, but a save that scales with the list is a regression
+    if large > max(small * 10, 0.005):
+        failures.append(f"a one-cell edit took {large * 1000:.2f} ms at {rows:,} rows vs {small * 1000:.2f} ms at 1,000")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Validation and normalization of pasted or imported addresses: per address vs the batch API.
+
+Builds a mixed list (valid addresses with stray case and whitespace, junk,
+internationalized domains and local parts, provider tags), checks that
+canonicalize_emails agrees with canonicalize_email on every entry and that
+each address has the same store key (normalize_email) as its canonical form.
+Then it stores addresses with a "ß" or an "İ" through add() and through the
+intake server's batches, exports them, and checks that the files hold the
+canonical address while the store and the suppression index find it under
+any spelling. Exits non-zero if any check fails or if the batch path takes
+longer than the budget.
+
+Run from the repository root:
+
+    python benchmarks/bench_email.py [addresses]
+"""
+import os
+import sys
+import asyncio
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_address import canonicalize_email, canonicalize_emails, normalize_email
+from suppression_index import SuppressionIndex
+from unsubscribe_server import IntakeBatcher
+from unsubscribe_store import UnsubscribeStore
+
+BATCH_BUDGET_SECONDS = 0.5
+
+SAMPLES = [
+    " User{i}@Example.com ", "first.last+news{i}@gmail.com", "u{i}@bücher.de", "not-an-email-{i}",
+    "a..b{i}@example.com", "u{i}@example", "u{i}@[192.0.2.1]", "ü{i}@example.org", "u{i}@yahoo.com.",
+    "İSTANBUL{i}@Example.com",
+]
+
+
+def make_emails(count):
+    return [SAMPLES[i % len(SAMPLES)].format(i=i) for i in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    emails = make_emails(count)
+    # Warm up, so the batch timings leave out the pandas import
+    canonicalize_emails([])
+    problems = []
+    for providers in (False, True):
+        start = time.perf_counter()
+        scalar = [canonicalize_email(email, providers) for email in emails]
+        scalar_time = time.perf_counter() - start
+        start = time.perf_counter()
+        batch = canonicalize_emails(emails, providers)
+        batch_time = time.perf_counter() - start
+
+        batch = batch.astype(object).where(batch.notna(), None).tolist()
+        valid = sum(value is not None for value in batch)
+        print(f"providers={providers!s:<5} {count:,} addresses ({valid:,} valid)  "
+              f"scalar {scalar_time * 1000:7.1f} ms  batch {batch_time * 1000:7.1f} ms")
+        if batch != scalar:
+            differ = next(i for i, (a, b) in enumerate(zip(batch, scalar)) if a != b)
+            problems.append(f"batch and scalar results differ (providers={providers}): "
+                            f"{emails[differ]!r} -> {batch[differ]!r} vs {scalar[differ]!r}")
+        if batch_time > BATCH_BUDGET_SECONDS * count / 100_000:
+            problems.append(f"batch validation took {batch_time:.2f} s (budget {BATCH_BUDGET_SECONDS} s per 100k)")
+    for email in emails:
+        address = canonicalize_email(email)
+        if address is not None and normalize_email(email) != normalize_email(address):
+            problems.append(f"{email!r} and its canonical form {address!r} have different keys")
+            break
+    problems.extend(check_round_trip())
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+# (what was typed, other spellings of the same address)
+ROUND_TRIP = [
+    ('Straße@Bücher.de', ['STRASSE@xn--bcher-kva.de', 'straße@bücher.de']),
+    ('İSTANBUL@Example.com', ['i̇stanbul@example.com']),
+]
+
+
+async def submit(store, addresses):
+    # The way the intake server hands confirmed addresses to its batcher
+    batcher = IntakeBatcher(store)
+    task = asyncio.create_task(batcher.run())
+    for address in addresses:
+        await batcher.submit(address, 'Other')
+    task.cancel()
+
+
+def check_round_trip():
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        for entry in ('add', 'intake'):
+            store = UnsubscribeStore(os.path.join(directory, f'{entry}.db'))
+            addresses = [canonicalize_email(typed) for typed, _ in ROUND_TRIP]
+            if entry == 'add':
+                for address in addresses:
+                    store.add(address, 'Other')
+            else:
+                asyncio.run(submit(store, addresses))
+            paths = [os.path.join(directory, f'{entry}.{ext}') for ext in ('csv', 'json', 'idx')]
+            store.export(*([path] for path in paths))
+            with open(paths[0], encoding='utf-8') as f:
+                exported = [line.split(',', 1)[0] for line in f.read().splitlines()[1:]]
+            if exported != addresses:
+                problems.append(f"{entry}: exported {exported}, expected {addresses}")
+            with SuppressionIndex(paths[2]) as index:
+                for typed, spellings in ROUND_TRIP:
+                    for email in [typed] + spellings:
+                        if not store.contains(email) or email not in index:
+                            problems.append(f"{entry}: {email!r} not found after storing {typed!r}")
+            store.close()
+    return problems
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""ExternalSync: cost of a poll, and edits made outside the app surviving our own writes.
+
+Builds a list of synthetic addresses, exports it, and times merge() (poll()
+without the export that follows a change) when the files are unchanged,
+when a row was appended to the primary CSV and when it was rewritten. Then it checks that an edit made outside the app is merged,
+not overwritten, when our own changes are waiting to be exported:
+
+  - a row appended to the primary CSV, then an add of our own before poll();
+  - the same, with the background writer exporting instead of poll();
+  - the file rewritten with one address removed and one renamed, while our
+    own add and removal are pending: both edits apply, and ours are kept.
+
+Everything happens in a scratch directory; the store's file locations are
+pointed there before it is opened, so the real lists are never touched.
+Exits non-zero if any check fails.
+
+Run from the repository root:
+
+    python benchmarks/bench_external_sync.py [rows]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import unsubscribe_store
+from bench_pipeline import use_scratch_paths
+from unsubscribe_store import UnsubscribeStore
+from unsubscribe_sync import ExternalSync
+from unsubscribe_writer import MirrorWriter
+
+DEFAULT_ROWS = 100_000
+
+
+def open_pipeline(db_path, rows=0):
+    store = UnsubscribeStore(db_path)
+    if rows:
+        store.bulk_add({'email': f"user{i}@example.com", 'reason': 'Bounced'} for i in range(rows))
+    # A long delay, so nothing is exported unless a check asks for it
+    writer = MirrorWriter(store, delay=3600, max_delay=3600)
+    sync = ExternalSync(store, writer, paths=unsubscribe_store.SOURCE_CSV_PATHS)
+    writer.flush(force=True)
+    sync.poll()
+    return store, writer, sync
+
+
+def append_row(email):
+    with open(unsubscribe_store.PRIMARY_CSV_PATH, 'a') as f:
+        f.write(f"{email},Other,2025-01-01 00:00:00\n")
+
+
+def primary_emails():
+    with open(unsubscribe_store.PRIMARY_CSV_PATH) as f:
+        return {line.split(',', 1)[0] for line in f.read().splitlines()[1:]}
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    problems = []
+
+    def check(condition, message):
+        if not condition:
+            problems.append(message)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        use_scratch_paths(directory)
+
+        store, writer, sync = open_pipeline('timing.db', rows)
+        _, unchanged_ms = timed(sync.merge)
+        append_row('appended@example.org')
+        result, appended_ms = timed(sync.merge)
+        writer.flush(force=True)
+        check(result.added == ['appended@example.org'], f"appended row: poll added {result.added}")
+        with open(unsubscribe_store.PRIMARY_CSV_PATH) as f:
+            text = f.read()
+        with open(unsubscribe_store.PRIMARY_CSV_PATH, 'w') as f:
+            f.write(text.replace('user0@example.com,', 'renamed@example.org,'))
+        result, rewritten_ms = timed(sync.merge)
+        check((result.added, result.removed) == (['renamed@example.org'], ['user0@example.com']),
+              f"rewritten file: poll added {result.added}, removed {result.removed}")
+        print(f"{rows:,} rows: merge {unchanged_ms:.1f} ms unchanged, {appended_ms:.1f} ms after an append, "
+              f"{rewritten_ms:.1f} ms after a rewrite")
+        store.close()
+
+        for name in os.listdir(directory):
+            if name.startswith('unsubscribed_users'):
+                os.remove(name)
+        shutil.rmtree(os.path.join(directory, 'mirror'))
+
+        # External append, then one of our own adds waiting to be exported
+        store, writer, sync = open_pipeline('checks.db')
+        store.bulk_add([{'email': 'a@example.com'}, {'email': 'b@example.com'}])
+        writer.flush(force=True)
+        append_row('ext@example.org')
+        store.add('ours@example.com')
+        writer.mark_dirty()
+        result = sync.poll()
+        check(result.added == ['ext@example.org'] and not result.removed,
+              f"append + pending add: poll added {result.added}, removed {result.removed}")
+        check(store.contains('ext@example.org'), "append + pending add: appended address not in the store")
+        check({'ext@example.org', 'ours@example.com'} <= primary_emails(),
+              "append + pending add: the export dropped one of the two addresses")
+
+        # The same, with the background writer's export instead of poll()
+        append_row('ext2@example.org')
+        store.add('ours2@example.com')
+        writer.mark_dirty()
+        writer.flush()
+        check(store.contains('ext2@example.org'), "append + writer export: appended address not in the store")
+        check({'ext2@example.org', 'ours2@example.com'} <= primary_emails(),
+              "append + writer export: the export dropped one of the two addresses")
+
+        # A rewrite (a removed, b renamed) while our own add and removal are pending
+        with open(unsubscribe_store.PRIMARY_CSV_PATH) as f:
+            lines = [line for line in f.read().splitlines(keepends=True) if not line.startswith('a@example.com,')]
+        with open(unsubscribe_store.PRIMARY_CSV_PATH, 'w') as f:
+            f.write(''.join(lines).replace('b@example.com,', 'b.renamed@example.org,'))
+        store.add('pending@example.com')
+        store.remove('ours@example.com')
+        writer.mark_dirty()
+        sync.poll()
+        expected = {'b.renamed@example.org', 'ext@example.org', 'ext2@example.org', 'ours2@example.com', 'pending@example.com'}
+        check(set(store.emails()) == expected, f"rewrite + pending changes: store holds {sorted(store.emails())}")
+        check(primary_emails() == expected, f"rewrite + pending changes: file holds {sorted(primary_emails())}")
+        store.close()
+        os.chdir(APP_DIR)
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Opening one plane of a large TIFF stack: memory-mapped (image_io) against Pillow.
+
+Writes an ImageJ-style hyperstack (time x z x channel pages of 16-bit
+synthetic cells, uncompressed, as ImageJ saves them), plus the same last
+plane as a tiled, Deflate-compressed TIFF, and spools the stack through
+spool_upload the way an upload is. Then, each in its own process, it
+opens the last plane, either through TiffFile or by decoding it with Pillow
+(Image.open, seek, load), then draws the preview (reading every few pixels
+only) and segments it. It reports time and the peak RSS each step added (for
+the mapped file that includes the file pages read, which the kernel can drop
+again). Exits non-zero if the ROIs differ between the readers, or if opening
+a plane of the mapped stack adds more than MAX_OPEN_FRACTION of the plane's
+size.
+
+Run from the repository root:
+
+    python benchmarks/bench_image_io.py [frames,slices,channels] [plane size]
+"""
+import os
+import sys
+import json
+import time
+import struct
+import tempfile
+import subprocess
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_DIMENSIONS = (2, 8, 2)
+DEFAULT_PLANE = 2048
+# Opening the mapped stack and picking a plane reads no pixels: it may add at most this fraction of a plane
+MAX_OPEN_FRACTION = 0.25
+STEPS = ('open', 'preview', 'segment')
+
+
+def write_hyperstack(path, planes, frames, slices, channels):
+    """Uncompressed ImageJ hyperstack: header, every plane back to back, then one IFD per plane."""
+    first = planes(0)
+    height, width = first.shape
+    count = frames * slices * channels
+    plane_bytes = height * width * 2
+    description = (f"ImageJ=1.54f\nimages={count}\nchannels={channels}\nslices={slices}\nframes={frames}\n"
+                   f"hyperstack=true\n").encode() + b'\0'
+    with open(path, 'wb') as f:
+        f.write(b'II' + struct.pack('<HI', 42, 8))
+        for i in range(count):
+            f.write(planes(i).astype('<u2').tobytes())
+        description_offset = f.tell()
+        f.write(description)
+        ifd = f.tell()
+        f.seek(4)
+        f.write(struct.pack('<I', ifd))
+        f.seek(ifd)
+        for i in range(count):
+            entries = [(256, 4, 1, width), (257, 4, 1, height), (258, 3, 1, 16), (259, 3, 1, 1), (262, 3, 1, 1)]
+            if i == 0:
+                entries.append((270, 2, len(description), description_offset))
+            entries += [(273, 4, 1, 8 + i * plane_bytes), (277, 3, 1, 1), (278, 4, 1, height), (279, 4, 1, plane_bytes)]
+            next_ifd = ifd + 2 + 12 * len(entries) + 4 if i < count - 1 else 0
+            f.write(struct.pack('<H', len(entries)))
+            for tag, field_type, values, value in entries:
+                # Short values sit in the low bytes of the 4-byte field (little-endian)
+                f.write(struct.pack('<HHII', tag, field_type, values, value))
+            f.write(struct.pack('<I', next_ifd))
+            ifd = next_ifd
+
+
+def write_tiled(path, plane, tile=256):
+    """The plane as one Deflate-compressed, tiled page (horizontal predictor), read tile by tile by image_io."""
+    import zlib
+
+    height, width = plane.shape
+    tiles = []
+    for top in range(0, height, tile):
+        for left in range(0, width, tile):
+            block = np.zeros((tile, tile), '<u2')
+            part = plane[top:top + tile, left:left + tile]
+            block[:part.shape[0], :part.shape[1]] = part
+            tiles.append(zlib.compress(np.diff(block, axis=1, prepend=0).astype('<u2').tobytes()))
+    with open(path, 'wb') as f:
+        f.write(b'II' + struct.pack('<HI', 42, 0))
+        offsets = []
+        for data in tiles:
+            offsets.append(f.tell())
+            f.write(data)
+        arrays = f.tell()
+        f.write(struct.pack(f'<{len(tiles)}I', *offsets))
+        f.write(struct.pack(f'<{len(tiles)}I', *map(len, tiles)))
+        ifd = f.tell()
+        entries = [(256, 4, 1, width), (257, 4, 1, height), (258, 3, 1, 16), (259, 3, 1, 8), (262, 3, 1, 1),
+                   (277, 3, 1, 1), (317, 3, 1, 2), (322, 3, 1, tile), (323, 3, 1, tile),
+                   (324, 4, len(tiles), arrays), (325, 4, len(tiles), arrays + 4 * len(tiles))]
+        f.write(struct.pack('<H', len(entries)))
+        for entry in entries:
+            f.write(struct.pack('<HHII', *entry))
+        f.write(struct.pack('<I', 0))
+        f.seek(4)
+        f.write(struct.pack('<I', ifd))
+
+
+# ---- measured side (one process per reader) ----
+
+def measure(reader, path, position):
+    from PIL import Image
+    from bench_pipeline import Probe
+    from image_io import TiffFile
+    from segmentation import segment_image, to_grayscale
+    from route_analyze import outline_preview
+
+    # Warm up first, so lazily imported parts of NumPy and Pillow aren't counted
+    outline_preview(np.zeros((64, 64), np.uint16), [])
+    results = {}
+    with Probe() as probe:
+        if reader == 'pillow':
+            image = Image.open(path)
+            image.seek(position)
+            plane = to_grayscale(image)
+        else:
+            tiff = TiffFile(path)
+            frames, slices, channels = tiff.shape
+            plane = tiff.plane(*np.unravel_index(position, (frames, slices, channels)))
+    results['open'] = (probe.seconds, probe.peak_mb)
+    with Probe() as probe:
+        outline_preview(plane, [])
+    results['preview'] = (probe.seconds, probe.peak_mb)
+    with Probe() as probe:
+        result = segment_image(plane, workers=1)
+    results['segment'] = (probe.seconds, probe.peak_mb)
+    results['rois'] = sorted((roi.bounds, roi.area) for roi in result.rois)
+    return results
+
+
+# ---- driver ----
+
+def run(reader, path, position):
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', reader, path, str(position)],
+                             capture_output=True, text=True)
+    if process.returncode:
+        sys.stderr.write(process.stderr)
+        raise SystemExit(f"{reader} run failed")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        print(json.dumps(measure(sys.argv[2], sys.argv[3], int(sys.argv[4]))))
+        return
+    frames, slices, channels = (int(n) for n in sys.argv[1].split(',')) if len(sys.argv) > 1 else DEFAULT_DIMENSIONS
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PLANE
+    from bench_segmentation import synthetic_image
+    from image_io import spool_upload
+
+    cells, _ = synthetic_image(size, size)
+    count = frames * slices * channels
+    plane_mb = cells.nbytes / 1e6
+    problems = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        stack_path = os.path.join(directory, 'stack.tif')
+        start = time.perf_counter()
+        # Every page a shifted copy of the cells, the last one unshifted
+        write_hyperstack(stack_path, lambda i: np.roll(cells, 37 * (count - 1 - i), axis=1), frames, slices, channels)
+        print(f"{frames} x {slices} x {channels} stack of {size}x{size} 16-bit planes: "
+              f"{os.path.getsize(stack_path) / 1e6:,.0f} MB written in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        with open(stack_path, 'rb') as upload:
+            spooled, _ = spool_upload(upload, directory=os.path.join(directory, 'uploads'), suffix='.tif')
+        seconds = time.perf_counter() - start
+        print(f"spool_upload: {os.path.getsize(spooled) / 1e6 / seconds:,.0f} MB/s")
+
+        tiled_path = os.path.join(directory, 'tiled.tif')
+        write_tiled(tiled_path, cells)
+
+        runs = [('image_io, stack', 'mapped', spooled, count - 1), ('Pillow, stack', 'pillow', spooled, count - 1),
+                ('image_io, tiled+deflate', 'mapped', tiled_path, 0)]
+        print(f"\nlast plane ({plane_mb:.0f} MB decoded)")
+        print(f"{'reader':<26}{'open':>22}{'preview':>22}{'segment':>22}{'ROIs':>8}")
+        results = {}
+        for name, reader, path, position in runs:
+            results[name] = result = run(reader, path, position)
+            steps = ''.join(f"{result[step][0] * 1000:>9.0f} ms {result[step][1]:>6.1f} MB" for step in STEPS)
+            print(f"{name:<26}{steps}{len(result['rois']):>8,}")
+
+    reference = results['Pillow, stack']['rois']
+    for name in results:
+        if results[name]['rois'] != reference:
+            problems.append(f"{name}: ROIs differ from Pillow's")
+    mapped_mb = results['image_io, stack']['open'][1]
+    if mapped_mb > plane_mb * MAX_OPEN_FRACTION:
+        problems.append(f"opening a plane of the mapped stack added {mapped_mb:.1f} MB, "
+                        f"limit {plane_mb * MAX_OPEN_FRACTION:.1f} MB")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
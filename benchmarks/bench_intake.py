@@ -0,0 +1,127 @@
+"""Load test for the unsubscribe intake server: a burst of RFC 8058 one-click POSTs.
+
+Starts unsubscribe_server.py in a scratch directory (its own database, file
+export off) and fires one-click POSTs for distinct addresses from many
+keep-alive connections, the way mail providers do right after a campaign.
+Reports requests/sec and latency, checks that every address was committed,
+and exits non-zero below the throughput floor.
+
+Run from the repository root:
+
+    python benchmarks/bench_intake.py [requests] [connections]
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import tempfile
+import subprocess
+import statistics
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIN_REQUESTS_PER_SECOND = 2000
+
+BODY = b'List-Unsubscribe=One-Click'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = int(head.lower().split(b'content-length:')[1].split(b'\r\n')[0])
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def client(port, emails, latencies, failures):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for email in emails:
+        request = (
+            f"POST /unsubscribe?email={email} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(BODY)}\r\n\r\n"
+        ).encode() + BODY
+        start = time.perf_counter()
+        writer.write(request)
+        status, _ = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            failures.append(status)
+    writer.close()
+
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    status, body = await read_response(reader)
+    writer.close()
+    return status, body.decode()
+
+
+async def wait_until_listening(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def load(port, requests, connections):
+    await wait_until_listening(port)
+    latencies, failures = [], []
+    emails = [f"subscriber{i}%40example.com" for i in range(requests)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, emails[i::connections], latencies, failures) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    _, health = await get(port, '/healthz')
+    return elapsed, sorted(latencies), failures, health
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, HOME=directory)
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(APP_DIR, 'unsubscribe_server.py'), '--port', str(port),
+             '--db', os.path.join(directory, 'bench.db'), '--no-export'],
+            cwd=directory, env=env, stdout=subprocess.DEVNULL
+        )
+        try:
+            elapsed, latencies, failures, health = asyncio.run(load(port, requests, connections))
+        finally:
+            server.terminate()
+            server.wait()
+
+    rate = requests / elapsed
+    print(f"{requests:,} one-click POSTs over {connections} connections in {elapsed:.2f} s: {rate:,.0f} req/s")
+    print(f"latency  p50 {statistics.median(latencies) * 1000:.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms  max {latencies[-1] * 1000:.1f} ms")
+    print(f"server   {health.strip()}")
+
+    problems = []
+    if failures:
+        problems.append(f"{len(failures)} requests failed")
+    if f"added={requests} " not in health:
+        problems.append("not every address was committed")
+    if rate < MIN_REQUESTS_PER_SECOND:
+        problems.append(f"{rate:,.0f} req/s is below the {MIN_REQUESTS_PER_SECOND:,} req/s floor")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""Benchmark suite for the unsubscribe pipeline the routes call.
+
+Drives the helpers in unsubscribe_ui (load_unsubscribed_users,
+add_unsubscribed_user, save_unsubscribed_users,
+save_unsubscribed_users_to_all_locations), the CSV downloads and the
+import/upload paths in unsubscribe_import at each list size. Streamlit's session state is replaced
+by a plain dict, so no AppTest or browser is involved. Each size runs in its
+own process, in a scratch directory, with every location the store reads or
+writes (use_scratch_paths) pointed inside it, so the real lists are never
+touched.
+
+For every operation it reports latency (p50/p95 for repeated single-address
+operations), throughput, the peak RSS it added and the bytes it wrote. It
+exits non-zero when an operation exceeds its budget, or runs more than
+REGRESSION_TOLERANCE times slower than a saved baseline.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py [--sizes 1000,10000,100000,1000000]
+                                        [--save-baseline FILE] [--baseline FILE]
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Repeated single-address operations per size
+SINGLE_OPS = 200
+
+# Bootstraps (each into a fresh database) whose median is checked; one run varies too much
+BOOTSTRAP_RUNS = 3
+
+# Budgets: fixed milliseconds plus microseconds per row of the list (or of the
+# imported file), so one table covers every size. The bootstrap budget is about
+# 1.5x the slowest median measured (16-40 us per row, depending on the machine).
+BUDGETS = {
+    'bootstrap':                   (100, 60),
+    'load (first)':                (50, 5),
+    'load (warm)':                 (5, 1),
+    'add p95':                     (20, 0),
+    'save':                        (100, 40),
+    'save(records)':               (100, 60),
+    'save_to_all_locations':       (100, 40),
+    'writer flush':                (100, 40),
+    'download csv':                (50, 10),
+    'download csv (cached)':       (5, 0),
+    'download csv.gz':             (100, 20),
+    'import (DataFrame)':          (100, 20),
+    'upload (streamed CSV)':       (100, 20),
+}
+
+# Against a baseline, an operation fails when it is this much slower, and slower by at least MIN_REGRESSION_MS
+REGRESSION_TOLERANCE = 1.5
+MIN_REGRESSION_MS = 5
+
+
+# ---- measured side (one process per size) ----
+
+class SessionStateStub(dict):
+    """Enough of st.session_state for the helpers: item and attribute access."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def _proc_value(path, field):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux 4.0+)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class Probe:
+    """Latency, peak RSS added and bytes written (all threads) around one operation."""
+
+    def __enter__(self):
+        _reset_peak_rss()
+        self.rss = _proc_value('/proc/self/status', 'VmRSS:')
+        self.written = _proc_value('/proc/self/io', 'wchar:')
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.start
+        self.peak_mb = max(_proc_value('/proc/self/status', 'VmHWM:') - self.rss, 0) / 1024
+        self.bytes_written = _proc_value('/proc/self/io', 'wchar:') - self.written
+
+
+def use_scratch_paths(directory):
+    """Point every CSV/JSON/index location the store reads or writes into directory, before a store is opened.
+
+    The mirrors are absolute paths fixed at import (/tmp among them), so
+    changing HOME or the working directory isn't enough. The lists are
+    modified in place, so modules that imported them by name see the change.
+    """
+    import unsubscribe_store
+
+    mirror = os.path.join(directory, 'mirror')
+    unsubscribe_store.MIRROR_CSV_PATHS[:] = [os.path.join(mirror, 'unsubscribed_users.csv')]
+    unsubscribe_store.MIRROR_JSON_PATHS[:] = [os.path.join(mirror, 'unsubscribed_users.json')]
+    unsubscribe_store.MIRROR_INDEX_PATHS[:] = [os.path.join(mirror, 'unsubscribed_users.idx')]
+    unsubscribe_store.SOURCE_CSV_PATHS[:] = [unsubscribe_store.PRIMARY_CSV_PATH] + unsubscribe_store.MIRROR_CSV_PATHS
+    unsubscribe_store.SOURCE_JSON_PATHS[:] = [unsubscribe_store.PRIMARY_JSON_PATH] + unsubscribe_store.MIRROR_JSON_PATHS
+
+
+def write_list(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['email', 'reason', 'timestamp'])
+        writer.writerows((f"user{i}@example.com", 'Bounced', '2025-01-01 00:00:00') for i in range(rows))
+
+
+def measure(size):
+    import io
+    import streamlit as st
+
+    st.session_state = SessionStateStub()
+    sys.path.insert(0, APP_DIR)
+    use_scratch_paths(os.getcwd())
+    import pandas as pd
+    import unsubscribe_ui
+    from resources import get_unsubscribe_store, get_unsubscribe_writer, get_download_service
+    from unsubscribe_import import import_unsubscribed, stream_import
+    from unsubscribe_store import UnsubscribeStore
+
+    results = []
+
+    def record(name, probe, rows, **extra):
+        results.append(dict(name=name, size=size, ms=probe.seconds * 1000, rows=rows, peak_mb=probe.peak_mb,
+                            bytes_written=probe.bytes_written, **extra))
+
+    write_list('unsubscribed_users.csv', size)
+    timings = []
+    for run in range(1, BOOTSTRAP_RUNS):
+        with Probe() as probe:
+            UnsubscribeStore(f'bootstrap{run}.db').bootstrap()
+        timings.append(probe.seconds)
+    # The shared store last, so its peak RSS and bytes written are the ones reported
+    with Probe() as probe:
+        store = get_unsubscribe_store()
+    timings.append(probe.seconds)
+    probe.seconds = statistics.median(timings)
+    record('bootstrap', probe, size)
+    writer = get_unsubscribe_writer()
+
+    with Probe() as probe:
+        emails = unsubscribe_ui.load_unsubscribed_users()
+    record('load (first)', probe, len(emails))
+    timings = []
+    for _ in range(5):
+        with Probe() as probe:
+            unsubscribe_ui.load_unsubscribed_users()
+        timings.append(probe.seconds)
+    probe.seconds = statistics.median(timings)
+    record('load (warm)', probe, size)
+
+    timings = []
+    with Probe() as total:
+        for i in range(SINGLE_OPS):
+            start = time.perf_counter()
+            unsubscribe_ui.add_unsubscribed_user(f"new{i}@example.com", "Benchmark")
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95)]
+    record('add', total, SINGLE_OPS, p50_ms=statistics.median(timings) * 1000, p95_ms=p95 * 1000)
+    total.seconds = p95
+    record('add p95', total, 1)
+    writer.flush()
+
+    with Probe() as probe:
+        unsubscribe_ui.save_unsubscribed_users()
+    record('save', probe, store.count())
+
+    records = store.records()
+    with Probe() as probe:
+        unsubscribe_ui.save_unsubscribed_users(records)
+    record('save(records)', probe, len(records))
+
+    with Probe() as probe:
+        unsubscribe_ui.save_unsubscribed_users_to_all_locations(records)
+    record('save_to_all_locations', probe, len(records))
+    with Probe() as probe:
+        writer.flush()
+    record('writer flush', probe, len(records))
+    del records
+
+    # What the download buttons run when clicked
+    download = get_download_service()
+    for name, method in [('download csv', download.csv_bytes), ('download csv (cached)', download.csv_bytes),
+                         ('download csv.gz', download.csv_gzip_bytes)]:
+        with Probe() as probe:
+            data = method()
+        record(name, probe, store.count(), payload_mb=len(data) / 1e6)
+        del data
+
+    # Imports of a tenth of the list (at least 1,000 rows), half of them already unsubscribed
+    rows = max(size // 10, 1000)
+    import_df = pd.DataFrame({'email': [f"USER{i}@Example.com" for i in range(size - rows // 2, size + rows - rows // 2)],
+                              'reason': 'Bounced'})
+    with Probe() as probe:
+        added = import_unsubscribed(import_df, store)
+    record('import (DataFrame)', probe, rows, added=added)
+    del import_df
+
+    upload = io.StringIO()
+    upload.write('email\n')
+    upload.writelines(f"Upload{i}@Example.com\n" for i in range(rows))
+    upload = io.BytesIO(upload.getvalue().encode('utf-8'))
+    with Probe() as probe:
+        _, _, added = stream_import(upload, store, 'email')
+    record('upload (streamed CSV)', probe, rows, added=added)
+    writer.flush()
+
+    errors = {key: st.session_state[key] for key in ('load_error', 'save_error') if key in st.session_state}
+    if errors:
+        raise RuntimeError(f"pipeline reported errors: {errors}")
+    return results
+
+
+# ---- driver ----
+
+def run_size(size):
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, HOME=os.path.join(directory, 'home'), PYTHONPATH=APP_DIR)
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(size)],
+                                 cwd=directory, env=env, capture_output=True, text=True)
+    if process.returncode:
+        sys.stderr.write(process.stderr)
+        raise SystemExit(f"benchmark at {size:,} rows failed")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def check(results, baseline):
+    problems = []
+    for result in results:
+        key = f"{result['name']}@{result['size']}"
+        if result['name'] in BUDGETS:
+            fixed_ms, per_row_us = BUDGETS[result['name']]
+            budget = fixed_ms + per_row_us * result['rows'] / 1000
+            if result['ms'] > budget:
+                problems.append(f"{key}: {result['ms']:.1f} ms, budget {budget:.0f} ms")
+        if key in baseline:
+            before = baseline[key]
+            if result['ms'] > before * REGRESSION_TOLERANCE and result['ms'] - before > MIN_REGRESSION_MS:
+                problems.append(f"{key}: {result['ms']:.1f} ms, baseline {before:.1f} ms")
+    return problems
+
+
+def print_results(results):
+    print(f"{'operation':<24}{'rows':>11}{'latency':>13}{'throughput':>22}{'peak RSS +':>12}{'written':>12}")
+    for result in results:
+        if result['name'] == 'add p95':
+            continue
+        if result['name'] == 'add':
+            latency = f"{result['p50_ms']:.2f}/{result['p95_ms']:.2f} ms"
+            throughput = f"{result['rows'] / (result['ms'] / 1000):,.0f} ops/s"
+        else:
+            latency = f"{result['ms']:.1f} ms"
+            throughput = f"{result['rows'] / max(result['ms'] / 1000, 1e-9):,.0f} rows/s"
+        print(f"{result['name']:<24}{result['rows']:>11,}{latency:>13}{throughput:>22}"
+              f"{result['peak_mb']:>9.1f} MB{result['bytes_written'] / 1e6:>9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the unsubscribe pipeline at several list sizes.")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--baseline', help="fail on regressions against this file")
+    parser.add_argument('--save-baseline', help="write this run's latencies to this file")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(args.child)))
+        return
+
+    results = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        print(f"\n{size:,} addresses")
+        size_results = run_size(size)
+        print_results(size_results)
+        results += size_results
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({f"{result['name']}@{result['size']}": round(result['ms'], 3) for result in results}, f, indent=1)
+
+    problems = check(results, baseline)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""RoiSet export: throughput, memory, and a round trip through the parser.
+
+Streams synthetic cell outlines (generated one at a time, so the input holds
+no memory either) into an ImageJ RoiSet .zip on disk, at several counts, and
+reports records per second, archive size and the peak RSS the export added.
+Every archive is then checked with zipfile (CRCs, ZIP64 end records past
+65535 members), parsed back with read_roiset and compared record by record
+with what was written, for polygons and for the rectangle and oval
+shapes, including ROIs beyond 32767 pixels (stored with float coordinates).
+Exits non-zero on any mismatch, or when the memory an export adds grows with
+the ROI count by more than MAX_BYTES_PER_ROI.
+
+Run from the repository root:
+
+    python benchmarks/bench_roi_export.py [counts, e.g. 10000,100000,300000]
+"""
+import os
+import sys
+import time
+import zipfile
+import tempfile
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from segmentation import Roi
+from roi_export import EXPORT_SHAPES, read_roiset, write_roiset
+
+DEFAULT_COUNTS = [10_000, 100_000, 300_000]
+# Nothing should remain in memory per ROI once it is written
+MAX_BYTES_PER_ROI = 20
+
+
+def peak_rss_kb():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM'))
+
+
+def reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux 4.0+)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def synthetic_rois(count, seed=1):
+    """Cell-like outlines on a grid 500 cells wide; every 1000th far out, past the range of a short."""
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        x, y = (i % 500) * 30, (i // 500) * 30
+        if i % 1000 == 999:
+            x, y = x + 40_000, y + 35_000
+        # A staircase octagon, as the tracer produces for a roundish cell
+        r, c = int(rng.integers(5, 12)), int(rng.integers(2, 4))
+        polygon = np.array([(x + c, y), (x + 2 * r - c, y), (x + 2 * r - c, y + 1), (x + 2 * r, y + c),
+                            (x + 2 * r, y + 2 * r - c), (x + 2 * r - c, y + 2 * r), (x + c, y + 2 * r),
+                            (x, y + 2 * r - c), (x, y + c), (x + c, y + 1)], np.int32)
+        yield Roi(polygon, 4 * r * r, 100.0)
+
+
+def expected(roi, shape):
+    left, top, right, bottom = roi.bounds
+    return shape, (left, top, right, bottom), [tuple(point) for point in roi.polygon.tolist()] if shape == 'polygon' else None
+
+
+def round_trip(path, count, shape):
+    mismatches = 0
+    parsed = 0
+    for (name, record), roi in zip(read_roiset(path), synthetic_rois(count)):
+        parsed += 1
+        if (record['type'], record['bounds'], record['polygon']) != expected(roi, shape):
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"  mismatch in {name}: {record} != {expected(roi, shape)}")
+    return mismatches + abs(parsed - count)
+
+
+def main():
+    counts = [int(count) for count in sys.argv[1].split(',')] if len(sys.argv) > 1 else DEFAULT_COUNTS
+    problems = []
+    added = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'RoiSet.zip')
+        print(f"{'ROIs':>9}{'shape':>9}{'seconds':>10}{'ROIs/s':>12}{'archive':>12}{'peak RSS +':>13}")
+        for count in counts:
+            for shape in EXPORT_SHAPES:
+                if shape != 'polygon' and count != counts[0]:
+                    continue
+                reset_peak_rss()
+                before = peak_rss_kb()
+                start = time.perf_counter()
+                with open(path, 'wb') as f:
+                    written = write_roiset(f, synthetic_rois(count), shape=shape)
+                seconds = time.perf_counter() - start
+                peak_kb = peak_rss_kb() - before
+                if shape == 'polygon':
+                    added[count] = peak_kb
+                print(f"{written:>9,}{shape:>9}{seconds:>10.2f}{written / seconds:>12,.0f}"
+                      f"{os.path.getsize(path) / 1e6:>9.1f} MB{peak_kb / 1024:>10.1f} MB")
+                with zipfile.ZipFile(path) as archive:
+                    damaged = archive.testzip()
+                if damaged:
+                    problems.append(f"bad CRC in {damaged}")
+                bad = round_trip(path, count, shape)
+                if bad:
+                    problems.append(f"{bad} records of {count:,} {shape} ROIs did not round-trip")
+
+    if len(added) > 1:
+        smallest, largest = min(added), max(added)
+        per_roi = (added[largest] - added[smallest]) * 1024 / (largest - smallest)
+        print(f"memory added per extra ROI: {per_roi:.0f} bytes")
+        if per_roi > MAX_BYTES_PER_ROI:
+            problems.append(f"{per_roi:.0f} bytes per ROI, limit {MAX_BYTES_PER_ROI}")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
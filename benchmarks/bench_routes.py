@@ -0,0 +1,106 @@
+"""Rerun latency of each route, measured by the router while AppTest drives the app.
+
+Every route is loaded once (the cold run, which includes importing its module)
+and then rerun repeatedly against a list of the given size. The durations are
+the ones router.TIMINGS records around render(), so AppTest's own overhead
+is not counted. The app runs from a copy in a scratch directory, with every
+list location the store reads or writes pointed inside it (use_scratch_paths),
+so the real files are never touched. Exits non-zero if a route's p95 is over
+its budget.
+
+Run from the repository root:
+
+    python benchmarks/bench_routes.py [rows] [reruns]
+"""
+import os
+import sys
+import csv
+import shutil
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit.testing.v1 import AppTest
+
+import router
+from bench_pipeline import use_scratch_paths
+
+# route -> query parameters that select it
+ROUTE_PARAMS = {
+    'landing': {},
+    'unsubscribe': {'unsubscribe': 'true'},
+    'admin': {'page': 'admin'},
+    'debug': {'debug': '1'},
+    'analyze': {'page': 'analyze'},
+}
+
+# p95 rerun budget per route, in milliseconds
+P95_BUDGETS_MS = {
+    'landing': 150,
+    'unsubscribe': 100,
+    'admin': 400,
+    'debug': 500,
+    'analyze': 100,
+}
+
+
+def make_app_dir(directory, rows):
+    # A copy of the app with its own list, so the benchmark never touches the real files
+    for name in os.listdir(APP_DIR):
+        path = os.path.join(APP_DIR, name)
+        if name.endswith(('.py', '.jpg', '.jpeg', '.png')):
+            shutil.copy(path, directory)
+    shutil.copytree(os.path.join(APP_DIR, '.streamlit'), os.path.join(directory, '.streamlit'))
+    # Image variants built beforehand (python assets.py), as on a deployed app; otherwise the landing page serves the originals
+    if os.path.isdir(os.path.join(APP_DIR, 'static')):
+        shutil.copytree(os.path.join(APP_DIR, 'static'), os.path.join(directory, 'static'))
+    with open(os.path.join(directory, 'unsubscribed_users.csv'), 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['email', 'reason', 'timestamp'])
+        writer.writerows((f"user{i}@example.com", 'Bounced', '2025-01-01 00:00:00') for i in range(rows))
+
+
+def run_route(directory, route, reruns):
+    at = AppTest.from_file(os.path.join(directory, 'cell.py'), default_timeout=120)
+    for key, value in ROUTE_PARAMS[route].items():
+        at.query_params[key] = value
+    at.run()
+    if route == 'admin':
+        at.text_input[0].input('cellai2025')
+        at.run()
+    if at.exception:
+        raise RuntimeError(f"{route}: {at.exception[0].message}")
+    cold = router.TIMINGS.durations[route][0] * 1000
+    for _ in range(reruns):
+        at.run()
+    return cold
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    reruns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        # Keep the mirrors inside the scratch directory too; the app imports the same, already patched, module
+        os.environ['HOME'] = os.path.join(directory, 'home')
+        use_scratch_paths(directory)
+        make_app_dir(directory, rows)
+        os.chdir(directory)
+        print(f"{rows:,} unsubscribed emails, {reruns} reruns per route")
+        for route in ROUTE_PARAMS:
+            cold = run_route(directory, route, reruns)
+            count, p50, p95, worst = router.TIMINGS.summary()[route]
+            budget = P95_BUDGETS_MS[route]
+            print(f"{route:<12} cold {cold:8.1f} ms  p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  max {worst:7.1f} ms  (budget p95 {budget} ms)")
+            if p95 > budget:
+                failures.append(f"{route} p95 {p95:.1f} ms exceeds its {budget} ms budget")
+        os.chdir(APP_DIR)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Throughput and accuracy of the ROI segmentation engine on synthetic fluorescence images.
+
+Generates an image of cells (Gaussian blobs on a jittered grid, one in five a
+touching pair) over uneven illumination with camera noise, segments it with
+1 to cpu_count worker processes and reports megapixels per second, overall
+and per core. Detected objects are matched to the generated cells by
+position, and a crop is segmented both tiled and as a single tile to check
+that seams don't add, lose or cut objects. Exits non-zero when recall or
+precision is below MIN_ACCURACY, the tiled and untiled results differ, or a
+single worker runs below MIN_MP_PER_SECOND_PER_CORE.
+
+Run from the repository root:
+
+    python benchmarks/bench_segmentation.py [size in pixels] [max workers]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from segmentation import SegmentationParams, segment_image, make_executor
+
+DEFAULT_SIZE = 4096
+MIN_MP_PER_SECOND_PER_CORE = 1.0
+MIN_ACCURACY = 0.98
+
+# Cells: spacing of the grid, Gaussian sigma, half the distance between the cells of a touching pair
+SPACING = 28
+SIGMA = 4.0
+PAIR_OFFSET = 5.0
+# A detection matches a cell when the centre of its bounding box is this close
+MATCH_DISTANCE = 4.0
+
+
+def synthetic_image(height, width, seed=1):
+    """(uint16 image, (N, 2) array of cell centres as (x, y))."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    # Illumination falling off towards one corner, as from a misaligned lamp
+    image = 200 + 100 * xx / width + 80 * yy / height
+    del yy, xx
+    # A spacing from the edges, so pairs and blob tails stay inside the image
+    grid_y, grid_x = np.mgrid[SPACING:height - SPACING:SPACING, SPACING:width - SPACING:SPACING]
+    centres = []
+    for i, (y, x) in enumerate(zip(grid_y.ravel() + rng.uniform(-3, 3, grid_y.size),
+                                   grid_x.ravel() + rng.uniform(-3, 3, grid_x.size))):
+        centres += [(x, y)] if i % 5 else [(x - PAIR_OFFSET, y), (x + PAIR_OFFSET, y)]
+    reach = int(3.5 * SIGMA)
+    offsets = np.arange(-reach, reach + 1, dtype=np.float32)
+    for x, y in centres:
+        top, left = int(y) - reach, int(x) - reach
+        dy, dx = offsets + (int(y) - y), offsets + (int(x) - x)
+        blob = 600 * np.exp(-(dy[:, None] ** 2 + dx[None, :] ** 2) / (2 * SIGMA * SIGMA))
+        image[top:top + len(offsets), left:left + len(offsets)] += blob
+    image += rng.normal(0, 15, image.shape).astype(np.float32)
+    return np.clip(image, 0, 65535).astype(np.uint16), np.array(centres)
+
+
+def accuracy(rois, centres):
+    """(recall, precision): cells with a detection near them, detections near a cell."""
+    found = np.array([((left + right) / 2, (top + bottom) / 2) for left, top, right, bottom in (roi.bounds for roi in rois)])
+    if not len(found) or not len(centres):
+        return 0.0, 0.0
+    # Bucket the detections so each cell only looks at its neighbourhood
+    buckets = {}
+    for i, (x, y) in enumerate(found // SPACING):
+        buckets.setdefault((int(x), int(y)), []).append(i)
+    matched_cells, matched_detections = 0, set()
+    for x, y in centres:
+        bx, by = int(x // SPACING), int(y // SPACING)
+        nearby = [i for dx in (-1, 0, 1) for dy in (-1, 0, 1) for i in buckets.get((bx + dx, by + dy), ())]
+        if not nearby:
+            continue
+        distances = np.hypot(found[nearby, 0] - x, found[nearby, 1] - y)
+        best = int(np.argmin(distances))
+        if distances[best] <= MATCH_DISTANCE:
+            matched_cells += 1
+            matched_detections.add(nearby[best])
+    return matched_cells / len(centres), len(matched_detections) / len(found)
+
+
+def roi_keys(rois):
+    return sorted((roi.bounds, roi.area, len(roi.polygon)) for roi in rois)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    problems = []
+
+    start = time.perf_counter()
+    image, centres = synthetic_image(size, size)
+    print(f"{size}x{size} synthetic image, {len(centres):,} cells ({time.perf_counter() - start:.1f} s to generate)")
+    params = SegmentationParams()
+
+    print(f"{'workers':>8}{'seconds':>10}{'MP/s':>10}{'MP/s/core':>11}{'ROIs':>10}")
+    for workers in range(1, max_workers + 1):
+        if workers == 1:
+            result = segment_image(image, params, workers=1)
+        else:
+            with make_executor(workers) as executor:
+                # Warm the pool first: spawning workers and importing NumPy isn't segmentation time
+                segment_image(image[:params.tile_size, :params.tile_size], params, executor=executor)
+                result = segment_image(image, params, executor=executor)
+        rate = result.megapixels_per_second
+        print(f"{workers:>8}{result.seconds:>10.2f}{rate:>10.2f}{rate / workers:>11.2f}{len(result.rois):>10,}")
+        if workers == 1:
+            single = result
+            if rate < MIN_MP_PER_SECOND_PER_CORE:
+                problems.append(f"{rate:.2f} MP/s on one core, floor {MIN_MP_PER_SECOND_PER_CORE}")
+
+    recall, precision = accuracy(single.rois, centres)
+    print(f"recall {recall:.4f}, precision {precision:.4f}, {single.truncated} truncated at seams")
+    if recall < MIN_ACCURACY or precision < MIN_ACCURACY:
+        problems.append(f"recall {recall:.4f} / precision {precision:.4f}, floor {MIN_ACCURACY}")
+
+    # Seams: a crop spanning four tiles, tiled against segmented whole
+    crop = image[:2 * params.tile_size, :2 * params.tile_size]
+    tiled = segment_image(crop, params, workers=1)
+    whole = segment_image(crop, SegmentationParams(tile_size=max(crop.shape)), workers=1)
+    same = roi_keys(tiled.rois) == roi_keys(whole.rois)
+    print(f"tiled ({tiled.tiles} tiles) vs whole: {len(tiled.rois):,} / {len(whole.rois):,} ROIs, {'identical' if same else 'DIFFERENT'}")
+    if not same:
+        problems.append("tiled and untiled segmentation differ")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Cold-start import cost of the landing route, measured with python -X importtime.
+
+Each run starts a fresh interpreter that executes cell.py the way `streamlit
+run` does (as __main__, here in bare mode with no query parameters, i.e. the
+landing page) and sums the cumulative time of every top-level import. Exits
+non-zero if the median is over the budget, or if a dependency that only the
+admin/debug routes need gets imported.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import re
+import sys
+import statistics
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median of the summed import times, in milliseconds
+LANDING_IMPORT_BUDGET_MS = 900
+
+# Modules the landing route must not load
+LAZY_MODULES = ['pandas', 'numpy', 'pyarrow']
+
+LANDING_ROUTE = "import runpy; runpy.run_path('cell.py', run_name='__main__')"
+
+# "import time: <self us> | <cumulative us> | <indented module name>"
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def profile_imports(code=LANDING_ROUTE):
+    """Run code in a fresh interpreter. Returns {top-level module: cumulative ms} and the set of all modules imported."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    top_level, imported = {}, set()
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        imported.add(name)
+        # Nested imports are already counted in their parent's cumulative time
+        if len(indent) == 1:
+            top_level[name] = int(cumulative) / 1000
+    return top_level, imported
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    totals, imported = [], set()
+    for _ in range(runs):
+        top_level, run_imported = profile_imports()
+        totals.append(sum(top_level.values()))
+        imported |= run_imported
+
+    print("Slowest top-level imports (last run):")
+    for name, ms in sorted(top_level.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {name:<32} {ms:8.1f} ms")
+    median = statistics.median(totals)
+    print(f"landing route  {runs} runs  median {median:.0f} ms  min {min(totals):.0f} ms  max {max(totals):.0f} ms  (budget {LANDING_IMPORT_BUDGET_MS} ms)")
+
+    failures = []
+    if median > LANDING_IMPORT_BUDGET_MS:
+        failures.append(f"median import time {median:.0f} ms exceeds the {LANDING_IMPORT_BUDGET_MS} ms budget")
+    for name in LAZY_MODULES:
+        if name in imported:
+            failures.append(f"{name} is imported on the landing route")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
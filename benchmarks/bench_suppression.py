@@ -0,0 +1,101 @@
+"""Suppression check for a send: the memory-mapped index against parsing the CSV.
+
+Writes a list of unsubscribed addresses as both unsubscribed_users.csv and a
+suppression index, then checks a batch of recipients (a tenth of them
+suppressed) against each, the CSV the way the email script loaded it (pandas,
+normalize, build a set). Each side runs in its own process so the memory
+figures are comparable. Exits non-zero if the answers differ or the index
+falls below the lookup floor.
+
+Run from the repository root:
+
+    python benchmarks/bench_suppression.py [addresses] [recipients]
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from suppression_index import write_index
+
+MIN_LOOKUPS_PER_SECOND = 50_000
+
+CHILD = """
+import sys, json, time, resource
+def peak_rss_mb():
+    # ru_maxrss survives exec on Linux (it would report the parent's peak); VmHWM does not
+    try:
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+sys.path.insert(0, {app_dir!r})
+mode, path, recipients = sys.argv[1], sys.argv[2], int(sys.argv[3])
+emails = [f"Recipient{{i}}@Example.com" if i % 10 else f"user{{i}}@example.com" for i in range(recipients)]
+start = time.perf_counter()
+if mode == 'csv':
+    import pandas as pd
+    from email_address import normalize_email
+    suppressed = set(pd.read_csv(path)['email'].map(normalize_email))
+    loaded = time.perf_counter()
+    hits = sum(normalize_email(email) in suppressed for email in emails)
+else:
+    from suppression_index import SuppressionIndex
+    suppressed = SuppressionIndex(path)
+    loaded = time.perf_counter()
+    hits = sum(suppressed.contains_many(emails))
+done = time.perf_counter()
+print(json.dumps({{'load': loaded - start, 'check': done - loaded, 'hits': hits,
+                  'rss_mb': peak_rss_mb()}}))
+"""
+
+
+def measure(mode, path, recipients):
+    output = subprocess.run([sys.executable, '-c', CHILD.format(app_dir=APP_DIR), mode, path, str(recipients)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    addresses = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    recipients = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'unsubscribed_users.csv')
+        index_path = os.path.join(directory, 'unsubscribed_users.idx')
+        emails = [f"user{i}@example.com" for i in range(addresses)]
+        with open(csv_path, 'w') as f:
+            f.write('email,reason,timestamp\n')
+            f.writelines(f"{email},Seed,2024-01-01 00:00:00\n" for email in emails)
+        start = time.perf_counter()
+        write_index(index_path, emails)
+        build = time.perf_counter() - start
+        sizes = os.path.getsize(csv_path), os.path.getsize(index_path)
+        del emails
+
+        results = {mode: measure(mode, path, recipients) for mode, path in [('csv', csv_path), ('index', index_path)]}
+
+    print(f"{addresses:,} suppressed addresses, {recipients:,} recipients")
+    print(f"index built in {build:.2f} s: {sizes[1] / 1e6:.1f} MB (CSV {sizes[0] / 1e6:.1f} MB)")
+    for mode, result in results.items():
+        print(f"{mode:6} load {result['load'] * 1000:8.1f} ms  check {result['check'] * 1000:8.1f} ms  "
+              f"({recipients / result['check']:,.0f} lookups/s)  peak RSS {result['rss_mb']:.0f} MB  "
+              f"{result['hits']:,} suppressed")
+
+    problems = []
+    if results['csv']['hits'] != results['index']['hits']:
+        problems.append("the index and the CSV disagree")
+    rate = recipients / results['index']['check']
+    if rate < MIN_LOOKUPS_PER_SECOND:
+        problems.append(f"{rate:,.0f} lookups/s is below the {MIN_LOOKUPS_PER_SECOND:,} lookups/s floor")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
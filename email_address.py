@@ -0,0 +1,162 @@
+import re
+
+try:
+    import idna  # IDNA 2008 with UTS #46 mapping; installed with Streamlit (via requests)
+except ImportError:
+    idna = None
+
+# Email address normalization and validation.
+#
+# normalize_email() is the key the unsubscribe store and the suppression index
+# hash by: the address stripped and casefolded, with the domain in its ASCII
+# (IDNA) form, so a key matches the canonical address it was stored under.
+# It must stay stable: changing it would orphan the keys already in
+# unsubscribed_users.db and the suppression indexes.
+# canonicalize_email() is what user input goes through before it is stored:
+#
+#   - surrounding whitespace removed, the address lowercased
+#   - the domain converted to its ASCII (IDNA) form, so "bücher.de" and
+#     "xn--bcher-kva.de" are the same address, and a trailing dot dropped
+#   - syntax checked: dot-atom local part (UTF-8 allowed, as with SMTPUTF8),
+#     hostname labels, RFC 5321 length limits; quoted local parts and IP
+#     literals are rejected, no list mail goes to those
+#   - optionally (providers=True) provider aliases folded: googlemail.com is
+#     gmail.com, Gmail ignores dots, and +tags (-tags on Yahoo) are dropped
+#
+# canonicalize_emails() does the same for a whole column with pandas string
+# operations; only non-ASCII domains go through IDNA one by one, and only
+# non-ASCII local parts are lowercased by Python (Arrow's lowercasing maps some
+# characters, such as "İ", differently from str.lower()).
+
+MAX_LOCAL_LENGTH = 64
+MAX_ADDRESS_LENGTH = 254
+
+# Kept to syntax both Python's re and RE2 accept (no \u escapes or lookarounds),
+# so pandas can run the batch path natively on Arrow strings
+_ATOM = "[A-Za-z0-9!#$%&'*+/=?^_`{|}~\\-" + chr(0x80) + "-" + chr(0x10ffff) + "]+"
+_LABEL = r"[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?"
+# Top-level domains start with a letter (this also rules out IP addresses)
+_TLD = r"[a-z](?:[a-z0-9-]{0,61}[a-z0-9])?"
+EMAIL_PATTERN = rf"{_ATOM}(?:\.{_ATOM})*@(?:{_LABEL}\.)+{_TLD}"
+EMAIL_RE = re.compile(EMAIL_PATTERN)
+
+# Provider-aware canonicalization (providers=True)
+PROVIDER_ALIASES = {
+    'googlemail.com': 'gmail.com',
+}
+# Providers that deliver local+tag to local, by tag separator
+TAG_SEPARATORS = {
+    '+': {'gmail.com', 'outlook.com', 'hotmail.com', 'live.com', 'msn.com', 'icloud.com', 'me.com', 'mac.com',
+          'fastmail.com', 'protonmail.com', 'proton.me', 'pm.me'},
+    '-': {'yahoo.com'},
+}
+# Providers that ignore dots in the local part
+DOTLESS_PROVIDERS = {'gmail.com'}
+
+
+def normalize_email(email) -> str:
+    """Return the key used to index an email address (stripped, casefolded, ASCII domain)."""
+    email = str(email).strip()
+    local, at, domain = email.rpartition('@')
+    if not at:
+        return email.casefold()
+    ascii = ascii_domain(domain)
+    return f"{local.casefold()}@{domain.casefold() if ascii is None else ascii}"
+
+
+def ascii_domain(domain) -> str | None:
+    """Return the lowercase ASCII form of a domain, or None if it can't be encoded."""
+    domain = domain.strip().rstrip('.').lower()
+    if domain.isascii():
+        return domain
+    try:
+        if idna is not None:
+            return idna.encode(domain, uts46=True).decode('ascii')
+        return domain.encode('idna').decode('ascii')
+    except (UnicodeError, ValueError):
+        # idna.IDNAError is a UnicodeError
+        return None
+
+
+def _provider_canonical(local, domain):
+    domain = PROVIDER_ALIASES.get(domain, domain)
+    for separator, domains in TAG_SEPARATORS.items():
+        if domain in domains:
+            local = local.split(separator, 1)[0]
+    if domain in DOTLESS_PROVIDERS:
+        local = local.replace('.', '')
+    return local, domain
+
+
+def canonicalize_email(email, providers: bool = False) -> str | None:
+    """Return the canonical form of an address, or None if it isn't a valid address."""
+    if email is None or email != email:  # None or NaN
+        return None
+    local, at, domain = str(email).strip().rpartition('@')
+    if not at:
+        return None
+    domain = ascii_domain(domain)
+    if domain is None:
+        return None
+    local = local.lower()
+    address = f"{local}@{domain}"
+    if len(local) > MAX_LOCAL_LENGTH or len(address) > MAX_ADDRESS_LENGTH or not EMAIL_RE.fullmatch(address):
+        return None
+    if providers:
+        local, domain = _provider_canonical(local, domain)
+        address = f"{local}@{domain}"
+    return address
+
+
+def is_valid_email(email) -> bool:
+    return canonicalize_email(email) is not None
+
+
+def canonicalize_emails(emails, providers: bool = False):
+    """Vectorized canonicalize_email: returns a pandas string Series with <NA> for invalid addresses.
+
+    emails may be a Series (its index is kept) or any iterable of values.
+    """
+    import pandas as pd
+
+    emails = emails if isinstance(emails, pd.Series) else pd.Series(list(emails), dtype='object')
+    emails = emails.astype('string').str.strip()
+    # Split at the last '@' with regex replaces, which (unlike rpartition) stay in Arrow
+    has_at = emails.str.contains('@', regex=False)
+    local = emails.str.replace(r'@[^@]*$', '', regex=True)
+    domain = emails.str.replace(r'^.*@', '', regex=True).str.rstrip('.').str.lower()
+
+    # Lowercase non-ASCII local parts the way canonicalize_email does, each distinct one once
+    non_ascii = ~local.str.isascii().fillna(True)
+    lowered = local.str.lower()
+    if non_ascii.any():
+        local = lowered.mask(non_ascii, local[non_ascii].map(str.lower).astype('string'))
+    else:
+        local = lowered
+
+    # IDNA has no vectorized form; only non-ASCII domains need it, each distinct one once
+    non_ascii = ~domain.str.isascii().fillna(True)
+    if non_ascii.any():
+        encoded = {name: ascii_domain(name) for name in domain[non_ascii].unique()}
+        domain = domain.mask(non_ascii, domain[non_ascii].map(encoded).astype('string'))
+
+    addresses = local + '@' + domain
+    valid = (
+        has_at
+        & (local.str.len() <= MAX_LOCAL_LENGTH)
+        & (addresses.str.len() <= MAX_ADDRESS_LENGTH)
+        & addresses.str.fullmatch(EMAIL_PATTERN)
+    ).fillna(False).astype(bool)
+
+    if providers:
+        domain = domain.replace(PROVIDER_ALIASES)
+        for separator, domains in TAG_SEPARATORS.items():
+            tagged = domain.isin(domains)
+            if tagged.any():
+                local = local.mask(tagged, local.str.replace(re.escape(separator) + '.*$', '', regex=True))
+        dotless = domain.isin(DOTLESS_PROVIDERS)
+        if dotless.any():
+            local = local.mask(dotless, local.str.replace('.', '', regex=False))
+        addresses = local + '@' + domain
+
+    return addresses.where(valid, pd.NA)
@@ -0,0 +1,418 @@
+import os
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import tempfile
+
+import numpy as np
+
+# Image input for the analysis pages: uploads spooled to disk, TIFFs mapped
+# rather than decoded.
+#
+# Pillow's Image.open decodes a whole frame into memory, and a TIFF stack has
+# to be decoded frame by frame to reach the one wanted, so a multi-GB z-stack
+# or time-lapse would not fit in the container. Instead:
+#
+#   - spool_upload copies an upload to UPLOAD_DIR in chunks, hashing it on
+#     the way, under a name derived from its content
+#   - TiffFile parses the IFDs of a classic or BigTIFF file (either byte
+#     order) and memory-maps the file. A page stored uncompressed in
+#     contiguous strips is a NumPy array over the mapped bytes; other pages
+#     (tiled, scattered strips, Deflate-compressed) are PageArrays, which read
+#     only the strips or tiles a slice touches. Anything else (LZW, JPEG,
+#     sub-byte samples) falls back to Pillow for the pages that are used.
+#   - pages are arranged as (time, z, channel) from ImageJ's hyperstack
+#     description; a stack whose pages are evenly spaced uncompressed blocks
+#     (how ImageJ writes them) is one array, so tiff.stack[:, z, c] and the
+#     like are views that read nothing until used
+#
+# Segmentation works on such a plane directly: it reads the image in bands,
+# tiles and sample patches, so only those parts of the file are paged in.
+
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'cellai_uploads')
+# Spooled uploads not used for this long are deleted
+UPLOAD_MAX_AGE = 24 * 3600
+CHUNK_BYTES = 1 << 20
+TIFF_SUFFIXES = ('.tif', '.tiff')
+
+# Tags read from each IFD
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+IMAGE_DESCRIPTION = 270
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+ROWS_PER_STRIP = 278
+STRIP_BYTE_COUNTS = 279
+PLANAR_CONFIGURATION = 284
+PREDICTOR = 317
+TILE_WIDTH = 322
+TILE_LENGTH = 323
+TILE_OFFSETS = 324
+TILE_BYTE_COUNTS = 325
+SAMPLE_FORMAT = 339
+
+# Field types: TIFF type number -> NumPy type code (rationals are pairs of 32-bit values)
+FIELD_TYPES = {1: 'u1', 2: 'u1', 3: 'u2', 4: 'u4', 5: 'u4', 6: 'i1', 7: 'u1', 8: 'i2', 9: 'i4', 10: 'i4',
+               11: 'f4', 12: 'f8', 13: 'u4', 16: 'u8', 17: 'i8', 18: 'u8'}
+RATIONAL_TYPES = (5, 10)
+
+UNCOMPRESSED = 1
+DEFLATE = (8, 32946)
+# SampleFormat -> NumPy kind
+SAMPLE_KINDS = {1: 'u', 2: 'i', 3: 'f'}
+
+
+def spool_upload(file, directory=UPLOAD_DIR, suffix=''):
+    """Copy an uploaded file (any binary file object) to disk. Returns (path, SHA-256 hex digest of its bytes).
+
+    The file is named by its digest, so uploading the same image again reuses the copy already on disk.
+    """
+    os.makedirs(directory, exist_ok=True)
+    prune_uploads(directory)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            if hasattr(file, 'seek'):
+                file.seek(0)
+            while chunk := file.read(CHUNK_BYTES):
+                digest.update(chunk)
+                out.write(chunk)
+        path = os.path.join(directory, digest.hexdigest() + suffix)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path, digest.hexdigest()
+
+
+def prune_uploads(directory=UPLOAD_DIR, max_age=UPLOAD_MAX_AGE):
+    """Delete spooled uploads last used more than max_age seconds ago. Open maps of them stay valid."""
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and max(entry.stat().st_atime, entry.stat().st_mtime) < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def is_tiff(name):
+    return name.lower().endswith(TIFF_SUFFIXES)
+
+
+class TiffPage:
+    """Layout of one image (IFD): size, sample type and where its strips or tiles are."""
+
+    def __init__(self, index, tags, byteorder):
+        self.index = index
+        self.width = int(tags[IMAGE_WIDTH][0])
+        self.height = int(tags[IMAGE_LENGTH][0])
+        self.samples = int(tags.get(SAMPLES_PER_PIXEL, [1])[0])
+        bits = tags.get(BITS_PER_SAMPLE, [1])
+        self.bits = int(bits[0])
+        self.compression = int(tags.get(COMPRESSION, [UNCOMPRESSED])[0])
+        self.predictor = int(tags.get(PREDICTOR, [1])[0])
+        self.planar = int(tags.get(PLANAR_CONFIGURATION, [1])[0])
+        self.description = bytes(tags[IMAGE_DESCRIPTION]).rstrip(b'\0').decode('utf-8', 'replace') if IMAGE_DESCRIPTION in tags else ''
+        kind = SAMPLE_KINDS.get(int(tags.get(SAMPLE_FORMAT, [1])[0]))
+        mixed = len(set(int(b) for b in bits)) > 1
+        self.dtype = None if kind is None or mixed or self.bits not in (8, 16, 32, 64) else np.dtype(f'{byteorder}{kind}{self.bits // 8}')
+        if TILE_OFFSETS in tags:
+            self.block_height = int(tags[TILE_LENGTH][0])
+            self.block_width = int(tags[TILE_WIDTH][0])
+            self.offsets, self.byte_counts = tags[TILE_OFFSETS], tags[TILE_BYTE_COUNTS]
+            self.tiled = True
+        else:
+            self.block_height = min(int(tags.get(ROWS_PER_STRIP, [self.height])[0]), self.height)
+            self.block_width = self.width
+            self.offsets, self.byte_counts = tags[STRIP_OFFSETS], tags[STRIP_BYTE_COUNTS]
+            self.tiled = False
+        self.block_rows = -(-self.height // self.block_height)
+        self.block_cols = -(-self.width // self.block_width)
+
+    @property
+    def shape(self):
+        return (self.height, self.width) if self.samples == 1 else (self.height, self.width, self.samples)
+
+    @property
+    def readable(self):
+        """Whether the page can be read from the mapped file (otherwise Pillow decodes it)."""
+        return self.dtype is not None and (self.compression == UNCOMPRESSED or
+                                           (self.compression in DEFLATE and self.predictor in (1, 2)))
+
+    @property
+    def contiguous_offset(self):
+        """File offset of the pixel data if it is stored uncompressed, in order and without gaps; else None."""
+        if not self.readable or self.compression != UNCOMPRESSED or self.tiled or (self.planar == 2 and self.samples > 1):
+            return None
+        offsets = np.asarray(self.offsets, np.int64)
+        counts = np.asarray(self.byte_counts, np.int64)
+        if len(offsets) > 1 and not np.array_equal(offsets[1:], offsets[:-1] + counts[:-1]):
+            return None
+        if counts.sum() < self.height * self.width * self.samples * self.dtype.itemsize:
+            return None
+        return int(offsets[0])
+
+
+class PageArray:
+    """A page read on demand: slicing reads (and decompresses) only the strips or tiles the slice covers.
+
+    Supports .shape, .ndim, .dtype, slicing with steps, and np.asarray() for the whole page.
+    """
+
+    def __init__(self, tiff, page):
+        self.tiff = tiff
+        self.page = page
+        self.shape = page.shape
+        self.ndim = len(self.shape)
+        self.dtype = page.dtype if page.readable else None
+        self._decoded = None
+
+    def __array__(self, dtype=None, copy=None):
+        array = self[:]
+        return array if dtype is None else array.astype(dtype, copy=False)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(item is Ellipsis for item in key):
+            raise IndexError("PageArray does not support Ellipsis")
+        key = key + (slice(None),) * (2 - len(key[:2]))
+        rows, cols, rest = key[0], key[1], key[2:]
+        row_range = range(self.page.height)[rows]
+        col_range = range(self.page.width)[cols]
+        if isinstance(row_range, int) or isinstance(col_range, int):
+            # An integer picks one row or column: read it as a one-long range and drop the axis
+            single_rows, single_cols = isinstance(row_range, int), isinstance(col_range, int)
+            row_range = range(row_range, row_range + 1) if single_rows else row_range
+            col_range = range(col_range, col_range + 1) if single_cols else col_range
+            region = self._select(row_range, col_range)
+            region = region[(0 if single_rows else slice(None), 0 if single_cols else slice(None))]
+        else:
+            region = self._select(row_range, col_range)
+        return region[(Ellipsis,) + rest] if rest else region
+
+    def _select(self, row_range, col_range):
+        if not len(row_range) or not len(col_range):
+            return np.empty((len(row_range), len(col_range)) + self.shape[2:], self.dtype or np.uint8)
+        y0, y1 = min(row_range), max(row_range) + 1
+        x0, x1 = min(col_range), max(col_range) + 1
+        region = self._read(y0, y1, x0, x1)
+        if row_range.step != 1:
+            region = region[np.asarray(row_range) - y0]
+        if col_range.step != 1:
+            region = region[:, np.asarray(col_range) - x0]
+        return region
+
+    def _read(self, y0, y1, x0, x1):
+        page = self.page
+        if not page.readable:
+            if self._decoded is None:
+                self._decoded = self.tiff.decode_with_pillow(page.index)
+            return self._decoded[y0:y1, x0:x1]
+        out = np.empty((y1 - y0, x1 - x0, page.samples), page.dtype)
+        bh, bw = page.block_height, page.block_width
+        for block_row in range(y0 // bh, (y1 - 1) // bh + 1):
+            for block_col in range(x0 // bw, (x1 - 1) // bw + 1):
+                top, left = block_row * bh, block_col * bw
+                ty0, ty1 = max(y0, top) - top, min(y1, top + bh) - top
+                tx0, tx1 = max(x0, left) - left, min(x1, left + bw) - left
+                block = self._block(block_row, block_col)
+                out[top + ty0 - y0:top + ty1 - y0, left + tx0 - x0:left + tx1 - x0] = block[ty0:ty1, tx0:tx1]
+        return out[:, :, 0] if page.samples == 1 else out
+
+    def _block(self, block_row, block_col):
+        # One strip or tile as (rows, block width, samples); separate sample planes are read and stacked
+        page = self.page
+        rows = page.block_height if page.tiled else min(page.block_height, page.height - block_row * page.block_height)
+        index = block_row * page.block_cols + block_col
+        if page.planar == 2 and page.samples > 1:
+            per_plane = page.block_rows * page.block_cols
+            planes = [self._decode_block(index + sample * per_plane, rows, 1) for sample in range(page.samples)]
+            return np.concatenate(planes, axis=2)
+        return self._decode_block(index, rows, page.samples)
+
+    def _decode_block(self, index, rows, samples):
+        page = self.page
+        offset, count = int(page.offsets[index]), int(page.byte_counts[index])
+        shape = (rows, page.block_width, samples)
+        size = rows * page.block_width * samples * page.dtype.itemsize
+        if page.compression == UNCOMPRESSED:
+            return np.ndarray(shape, page.dtype, buffer=self.tiff.map, offset=offset)
+        data = zlib.decompress(self.tiff.map[offset:offset + count])[:size]
+        block = np.frombuffer(data, page.dtype).reshape(shape)
+        if page.predictor == 2:
+            # Horizontal differencing: each sample is stored as the difference from the one to its left
+            block = np.cumsum(block, axis=1, dtype=page.dtype)
+        return block
+
+
+class TiffFile:
+    """A memory-mapped TIFF or BigTIFF. Use as a context manager, or call close().
+
+    pages     TiffPage per IFD
+    shape     (time points, z slices, channels)
+    plane()   one page as an array: a view of the mapped file where possible, else a PageArray
+    stack     the whole hyperstack as one (T, Z, C, Y, X[, S]) view when the pages are evenly spaced
+              uncompressed blocks, else None
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except Exception:
+            self.map.close()
+            raise
+
+    def _parse(self):
+        order = bytes(self.map[:2])
+        if order not in (b'II', b'MM'):
+            raise ValueError(f"{self.path} is not a TIFF file")
+        self.byteorder = '<' if order == b'II' else '>'
+        version, = struct.unpack_from(self.byteorder + 'H', self.map, 2)
+        if version == 42:
+            self.bigtiff = False
+            offset, = struct.unpack_from(self.byteorder + 'I', self.map, 4)
+        elif version == 43:
+            self.bigtiff = True
+            offset, = struct.unpack_from(self.byteorder + 'Q', self.map, 8)
+        else:
+            raise ValueError(f"{self.path} is not a TIFF file (version {version})")
+
+        self.pages = []
+        seen = set()
+        while offset and offset not in seen and offset < len(self.map):
+            seen.add(offset)
+            tags, offset = self._read_ifd(offset)
+            self.pages.append(TiffPage(len(self.pages), tags, self.byteorder))
+        if not self.pages:
+            raise ValueError(f"{self.path} has no images")
+        self._arrange()
+
+    def _read_ifd(self, offset):
+        # Returns ({tag: values}, offset of the next IFD)
+        b = self.byteorder
+        count_format, entry_format, pointer_format, inline = (b + 'Q', b + 'HHQ', b + 'Q', 8) if self.bigtiff else (b + 'H', b + 'HHI', b + 'I', 4)
+        entries, = struct.unpack_from(count_format, self.map, offset)
+        position = offset + struct.calcsize(count_format)
+        entry_size = struct.calcsize(entry_format) + inline
+        tags = {}
+        for _ in range(entries):
+            tag, field_type, count = struct.unpack_from(entry_format, self.map, position)
+            value_position = position + struct.calcsize(entry_format)
+            position += entry_size
+            if field_type not in FIELD_TYPES:
+                continue
+            dtype = np.dtype(b + FIELD_TYPES[field_type])
+            values = count * (2 if field_type in RATIONAL_TYPES else 1)
+            if values * dtype.itemsize > inline:
+                value_position, = struct.unpack_from(pointer_format, self.map, value_position)
+            # Offsets and byte counts of large images run to hundreds of thousands of values; keep them as arrays
+            tags[tag] = np.frombuffer(self.map, dtype, values, value_position).copy()
+        next_offset, = struct.unpack_from(pointer_format, self.map, position)
+        return tags, next_offset
+
+    def _arrange(self):
+        # (T, Z, C) from an ImageJ hyperstack description; other multi-page files are z stacks
+        first = self.pages[0]
+        info = {}
+        if first.description.startswith('ImageJ='):
+            for line in first.description.splitlines():
+                key, _, value = line.partition('=')
+                info[key] = value
+        channels, slices, frames = (int(info.get(key, 1)) for key in ('channels', 'slices', 'frames'))
+        images = int(info.get('images', len(self.pages)))
+        if channels * slices * frames != images:
+            channels, slices, frames = 1, images, 1
+        self.shape = (frames, slices, channels)
+        self.stack = self._stack_view(images)
+        if self.stack is None and images != len(self.pages):
+            # Without a stack view only the pages with their own IFDs can be read
+            self.shape = (1, len(self.pages), 1)
+
+    def _stack_view(self, images):
+        # One strided view when page i's data starts at first + i * stride for every page
+        first = self.pages[0]
+        start = first.contiguous_offset
+        if start is None:
+            return None
+        page_bytes = first.height * first.width * first.samples * first.dtype.itemsize
+        if len(self.pages) > 1:
+            stride = self.pages[1].contiguous_offset
+            if stride is None:
+                return None
+            stride -= start
+            for page in self.pages:
+                if (page.shape, page.dtype, page.contiguous_offset) != (first.shape, first.dtype, start + page.index * stride):
+                    return None
+        else:
+            # ImageJ writes stacks over 4 GB with one IFD and the rest of the pages following the first
+            stride = page_bytes
+        if stride < page_bytes or start + (images - 1) * stride + page_bytes > len(self.map):
+            return None
+        frames, slices, channels = self.shape
+        item = first.dtype.itemsize
+        plane_strides = (first.width * first.samples * item, first.samples * item, item)[:len(first.shape)]
+        return np.ndarray((frames, slices, channels) + first.shape, first.dtype, buffer=self.map, offset=start,
+                          strides=(stride * slices * channels, stride * channels, stride) + plane_strides)
+
+    def plane(self, t=0, z=0, c=0):
+        """One image of the stack, without reading any of its pixels yet."""
+        frames, slices, channels = self.shape
+        if not (0 <= t < frames and 0 <= z < slices and 0 <= c < channels):
+            raise IndexError(f"plane ({t}, {z}, {c}) is outside a stack of shape {self.shape}")
+        if self.stack is not None:
+            return self.stack[t, z, c]
+        page = self.pages[(t * slices + z) * channels + c]
+        start = page.contiguous_offset
+        if start is not None:
+            return np.ndarray(page.shape, page.dtype, buffer=self.map, offset=start)
+        return PageArray(self, page)
+
+    def decode_with_pillow(self, index):
+        # Pages in a compression or sample layout this reader doesn't map
+        from PIL import Image
+
+        with Image.open(self.path) as image:
+            image.seek(index)
+            return np.asarray(image)
+
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:
+            # Views handed out still use the mapping; it is unmapped when the last one goes
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    # python image_io.py stack.tif: describe a TIFF's pages and how they will be read
+    import sys
+
+    if len(sys.argv) != 2:
+        print("usage: python image_io.py <file.tif>")
+        sys.exit(2)
+    with TiffFile(sys.argv[1]) as tiff:
+        frames, slices, channels = tiff.shape
+        print(f"{sys.argv[1]}: {'BigTIFF' if tiff.bigtiff else 'TIFF'}, {len(tiff.pages)} pages, "
+              f"{frames} time points x {slices} slices x {channels} channels, "
+              f"{'one mapped stack' if tiff.stack is not None else 'pages read on demand'}")
+        for page in tiff.pages[:10]:
+            layout = f"{page.block_width}x{page.block_height} tiles" if page.tiled else f"strips of {page.block_height} rows"
+            print(f"  page {page.index}: {page.shape} {page.dtype}, compression {page.compression}, {layout}"
+                  f"{'' if page.readable else ' (decoded with Pillow)'}")
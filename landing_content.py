@@ -0,0 +1,150 @@
+# Copy and styling of the landing page.
+#
+# Shared by the Streamlit route (route_landing.py) and the static export
+# (landing_export.py), so both render the same page from one source.
+
+PAGE_TITLE = "CellAI - Automated ROI Selection"
+
+# CSS for enhanced styling with increased spacing
+PAGE_CSS = """
+body {
+    background-color: #f5f5f5;
+    font-family: Arial, sans-serif;
+}
+.navbar {
+    position: sticky;
+    top: 0;
+    z-index: 1000;
+    background-color: #333;
+    padding: 10px 20px;
+    display: flex;
+    justify-content: space-between;
+    color: white;
+}
+.navbar a {
+    color: white;
+    text-decoration: none;
+    margin: 0 10px;
+}
+.navbar a:hover {
+    text-decoration: underline;
+}
+.section {
+    padding: 70px 20px;  /* Increased padding for more internal spacing */
+    margin-bottom: 40px;  /* Added margin-bottom for spacing between sections */
+}
+.card {
+    background-color: white;
+    padding: 25px;
+    border-radius: 10px;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    margin: 20px 0;
+}
+.hero {
+    text-align: center;
+    color: white;
+    padding: 120px 20px;  /* Increased padding for a taller hero section */
+    background-size: cover;
+    background-position: center;
+}
+.hero h1 {
+    font-size: 3em;
+}
+.footer {
+    background-color: #333;
+    color: white;
+    padding: 30px;
+    text-align: center;
+    margin-top: 50px;  /* Added margin-top for spacing above footer */
+}
+.spacer {
+    height: 40px;  /* Custom spacer class for additional control */
+}
+"""
+
+# Navigation Bar
+NAVBAR_HTML = """
+<div class="navbar">
+    <a href="#">Home</a>
+    <a href="#features">Features</a>
+    <a href="#support">Support</a>
+    <a href="#how-it-works">How It Works</a>
+    <a href="#about">About Us</a>
+    <a href="#pricing">Pricing</a>
+    <a href="#contact">Contact</a>
+</div>
+"""
+
+# Hero section; the background image rules are added by whoever renders it
+HERO_CSS = """
+.hero {
+    text-align: center;
+    color: white;
+    padding: 120px 20px;
+    background-size: cover;
+    background-position: center;
+    background-repeat: no-repeat;
+}
+"""
+
+HERO_HTML = """
+<div class="hero">
+    <h1>Welcome to CellAI</h1>
+    <p>Empowering Biological Discovery with Automated ROI Selection</p>
+    <p>CellAI harnesses the power of artificial intelligence to transform fluorescence microscopy analysis, delivering unparalleled speed, precision, and simplicity to researchers worldwide.</p>
+    <button style="padding: 15px 30px; font-size: 18px; background-color: #ff6347; color: white; border: none; border-radius: 5px; cursor: pointer;">Get Started Today</button>
+</div>
+"""
+
+SPACER_HTML = '<div class="spacer"></div>'
+
+# Introductory Section
+INTRO_HTML = """
+<section class="section" style="background-color:#f7d9d9;">
+    <div class="card">
+        <h3>Revolutionizing Fluorescence Microscopy with CellAI</h3>
+        <p>For researchers in biology and biomedical sciences, analyzing fluorescence microscopy images can be a daunting task. Hours spent manually annotating regions of interest (ROIs) in tools like ImageJ detract from the real work of scientific discovery. Enter CellAI—a game-changing solution that automates ROI selection with cutting-edge AI and machine learning technology.</p>
+        <p>Our mission is simple: to save you time, improve your accuracy, and let you focus on what matters most—unlocking the secrets of cellular behavior. Whether you're studying protein localization, cell morphology, or dynamic processes in living cells, CellAI streamlines your workflow by identifying and mapping fluorescent regions of interest with unmatched efficiency. Say goodbye to tedious manual labeling and hello to a smarter, faster way to process your image datasets.</p>
+        <p>Built by a team of experts in computer vision, machine learning, and biological research, CellAI integrates seamlessly with ImageJ, the gold standard in microscopy image analysis. Our service is tailored specifically for fluorescence microscopy data, ensuring that your unique research needs are met with precision and care.</p>
+    </div>
+</section>
+"""
+
+# Features Section
+FEATURES_ANCHOR = "<a id='features'></a>"
+FEATURES_HEADING = "Why Choose CellAI? Discover the Benefits"
+FEATURE_IMAGES = [("draganddrop.png", "Save Time with Automation"), ("micro_man.png", "Increase Precision in Analysis")]
+
+FEATURES_HTML = """
+<div class="card">
+    <h4>A Smarter Approach to Image Segmentation</h4>
+    <p>Fluorescence microscopy generates vast amounts of data, and manually selecting regions of interest can take hours—or even days—depending on the complexity of your dataset. CellAI changes that by leveraging state-of-the-art computer vision algorithms to automate the process. Our AI-powered segmentation tool identifies fluorescent regions with pinpoint accuracy, drawing ROI polygons that are ready to use in ImageJ. This not only speeds up your workflow but also ensures consistency across your analyses, eliminating the variability that comes with human annotation.</p>
+    <p>But CellAI is more than just a time-saver. Our models are trained on diverse fluorescence microscopy datasets, enabling them to detect subtle variations in intensity and structure that might be missed by the human eye. Whether you're working with fixed cells, live-cell imaging, or multi-channel fluorescence, CellAI delivers reliable, reproducible results that enhance the quality of your research.</p>
+    <p>We've designed CellAI with accessibility in mind. You don't need to be a computational expert to use it—just upload your images, and let our intuitive platform do the rest. From graduate students to seasoned principal investigators, CellAI empowers researchers at all levels to integrate advanced image analysis into their work without a steep learning curve.</p>
+    <ul>
+        <li><strong>Save Time:</strong> Process entire datasets in minutes, not hours, with automated ROI selection tailored for fluorescence microscopy.</li>
+        <li><strong>Increase Precision:</strong> Achieve consistent, high-accuracy segmentation that captures even the finest details of your fluorescent images.</li>
+        <li><strong>User-Friendly:</strong> Enjoy a seamless interface designed for biologists, not just coders, with no advanced technical skills required.</li>
+        <li><strong>Scalable Solution:</strong> Handle small experiments or massive datasets with ease—CellAI grows with your research needs.</li>
+        <li><strong>Seamless Integration:</strong> Export ROIs directly into ImageJ for further analysis, fitting perfectly into your existing workflow.</li>
+    </ul>
+</div>
+"""
+
+# Footer Section
+CONTACT_ANCHOR = "<a id='contact'></a>"
+
+FOOTER_HTML = """
+<footer class="footer">
+    <p>CellAI is committed to accelerating scientific discovery through innovation.</p>
+    <p>For support, inquiries, or partnership opportunities, reach out at <a href="mailto:cell.ai.solutions@gmail.com" style="color: lightblue;">cell.ai.solutions@gmail.com</a>.</p>
+    <p>Stay connected with us on <a href="#" style="color: lightblue;">Twitter</a>, <a href="#" style="color: lightblue;">LinkedIn</a>, and <a href="#" style="color: lightblue;">GitHub</a> for updates, tips, and community resources.</p>
+    <p><a href="{unsubscribe_url}" style="color: lightblue;">Unsubscribe from emails</a></p>
+    <p>© 2025 CellAI Solutions. All rights reserved.</p>
+</footer>
+"""
+
+
+def footer_html(unsubscribe_url="?unsubscribe=true"):
+    # The unsubscribe link points at the Streamlit app, which may live on another host than a static copy of this page
+    return FOOTER_HTML.format(unsubscribe_url=unsubscribe_url)
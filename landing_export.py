@@ -0,0 +1,160 @@
+import os
+import html
+import shutil
+import argparse
+
+import assets
+import landing_content as page
+from atomic_files import content_hash, write_atomic
+
+# Static export of the landing page.
+#
+# The landing page is fixed copy, but served through Streamlit every visitor
+# needs a websocket session and a full script run to read it. This writes the
+# same sections once into a plain HTML bundle that any static server or CDN
+# can host:
+#
+#   index.html              short-lived, revalidated (it names the current assets)
+#   assets/landing.<hash>.css
+#   assets/<image>-<w>w-<hash>.<ext>
+#   _headers                Cache-Control rules (Netlify/Cloudflare Pages format)
+#
+# Everything under assets/ has a content hash in its name, so it can be cached
+# for a year as immutable; on other servers apply the same two rules. Only the
+# unsubscribe/admin/debug routes then need the Streamlit app, which the footer
+# links to with --app-url.
+
+DIST_DIR = os.path.join(assets.APP_DIR, 'dist')
+ASSET_DIR = 'assets'
+
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+PAGE_CACHE_CONTROL = 'public, max-age=300, must-revalidate'
+
+# Streamlit lays out the features section with st.columns([2, 3])
+EXPORT_CSS = """
+body {
+    margin: 0;
+}
+main {
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 0 1rem;
+}
+.columns {
+    display: flex;
+    gap: 2rem;
+}
+.columns > :first-child {
+    flex: 2;
+}
+.columns > :last-child {
+    flex: 3;
+}
+@media (max-width: 640px) {
+    .columns {
+        flex-direction: column;
+    }
+}
+"""
+
+
+def _relocate(variants, prefix):
+    # Point the variant URLs at the bundle's asset folder instead of app/static
+    return [(mime, [(width, f"{prefix}{os.path.basename(url)}", size) for width, url, size in sizes]) for mime, sizes in variants]
+
+
+def _copy_variants(variants, out_dir):
+    for _, sizes in variants:
+        for _, url, _ in sizes:
+            name = os.path.basename(url)
+            target = os.path.join(out_dir, ASSET_DIR, name)
+            # Hashed names never change content, so an existing copy is current
+            if not os.path.exists(target):
+                shutil.copyfile(os.path.join(assets.STATIC_DIR, name), target)
+
+
+def build_css(hero_variants):
+    css = page.PAGE_CSS + page.HERO_CSS + EXPORT_CSS
+    if hero_variants:
+        # The stylesheet sits next to the images
+        css += assets.background_image_css(_relocate(hero_variants, ''), '.hero') + '\n'
+    return css
+
+
+def build_html(css_name, feature_variants, unsubscribe_url):
+    pictures = "\n".join(
+        assets.picture_html(_relocate(variants, f"{ASSET_DIR}/"), alt=caption, caption=caption)
+        for (_, caption), variants in zip(page.FEATURE_IMAGES, feature_variants)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(page.PAGE_TITLE)}</title>
+<link rel="icon" href="data:image/svg+xml,<svg xmlns=%22http://www.w3.org/2000/svg%22 viewBox=%220 0 100 100%22><text y=%22.9em%22 font-size=%2290%22>🤖</text></svg>">
+<link rel="stylesheet" href="{ASSET_DIR}/{css_name}">
+</head>
+<body>
+{page.NAVBAR_HTML}
+<main>
+{page.HERO_HTML}
+{page.SPACER_HTML}
+{page.INTRO_HTML}
+{page.SPACER_HTML}
+{page.FEATURES_ANCHOR}
+<h3>{html.escape(page.FEATURES_HEADING)}</h3>
+<div class="columns">
+<div>
+{pictures}
+</div>
+<div>
+{page.FEATURES_HTML}
+</div>
+</div>
+{page.CONTACT_ANCHOR}
+{page.footer_html(html.escape(unsubscribe_url, quote=True))}
+</main>
+</body>
+</html>
+"""
+
+
+def build_headers():
+    return (
+        f"/{ASSET_DIR}/*\n  Cache-Control: {ASSET_CACHE_CONTROL}\n"
+        f"/\n  Cache-Control: {PAGE_CACHE_CONTROL}\n"
+        f"/index.html\n  Cache-Control: {PAGE_CACHE_CONTROL}\n"
+    )
+
+
+def export_landing(out_dir=DIST_DIR, app_url=''):
+    """Write the static landing bundle to out_dir. Returns the paths written, relative to out_dir."""
+    os.makedirs(os.path.join(out_dir, ASSET_DIR), exist_ok=True)
+
+    hero_variants = assets.build_variants(os.path.join(assets.APP_DIR, 'hero_image.jpg'))
+    feature_variants = [assets.build_variants(os.path.join(assets.APP_DIR, image_path)) for image_path, _ in page.FEATURE_IMAGES]
+    for variants in [hero_variants] + feature_variants:
+        _copy_variants(variants, out_dir)
+
+    css = build_css(hero_variants).encode('utf-8')
+    css_name = f"landing.{content_hash(css)[:12]}.css"
+    files = {
+        f"{ASSET_DIR}/{css_name}": css,
+        'index.html': build_html(css_name, feature_variants, f"{app_url}?unsubscribe=true").encode('utf-8'),
+        '_headers': build_headers().encode('utf-8'),
+    }
+    # index.html goes last, so it never names assets that aren't there yet
+    for name in [f"{ASSET_DIR}/{css_name}", '_headers', 'index.html']:
+        write_atomic(os.path.join(out_dir, name), files[name])
+    return sorted(files)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the landing page as a static HTML bundle.")
+    parser.add_argument('out_dir', nargs='?', default=DIST_DIR)
+    parser.add_argument('--app-url', default=os.environ.get('CELLAI_APP_URL', ''),
+                        help="URL of the Streamlit app, for the unsubscribe link (default: $CELLAI_APP_URL, or the same host)")
+    args = parser.parse_args()
+    for name in export_landing(args.out_dir, args.app_url):
+        print(os.path.join(args.out_dir, name))
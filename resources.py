@@ -0,0 +1,72 @@
+import streamlit as st
+import os
+import base64
+import assets
+from unsubscribe_store import UnsubscribeStore
+from unsubscribe_writer import MirrorWriter
+from unsubscribe_sync import ExternalSync
+from unsubscribe_download import DownloadService
+
+# Process-wide resources shared by the routes: the unsubscribe store with its
+# background writer, file watcher and download cache, the segmentation worker
+# pool and analysis cache, and the landing page images.
+
+# One unsubscribe store shared by every session in this process
+@st.cache_resource
+def get_unsubscribe_store():
+    store = UnsubscribeStore()
+    # Import the existing CSV/JSON files the first time the store is opened
+    store.bootstrap()
+    return store
+
+# Background writer that coalesces changes into one export to the CSV/JSON files,
+# merging edits made to the files outside the app before each export
+@st.cache_resource
+def get_unsubscribe_writer():
+    store = get_unsubscribe_store()
+    writer = MirrorWriter(store)
+    ExternalSync(store, writer)
+    return writer
+
+# Incremental watcher for edits made to the CSV files outside the app (the writer's)
+def get_external_sync():
+    return get_unsubscribe_writer().sync
+
+# On-demand CSV downloads, cached by data version
+@st.cache_resource
+def get_download_service():
+    return DownloadService(get_unsubscribe_store())
+
+# Worker processes for segmenting uploaded images, shared by every session (None on a single core)
+@st.cache_resource
+def get_segmentation_executor():
+    # Imported here so routes that never segment don't load NumPy
+    from segmentation import DEFAULT_WORKERS, make_executor
+    return make_executor() if DEFAULT_WORKERS > 1 else None
+
+# On-disk cache of decoded planes and segmentation stages, shared by every session and the worker processes
+@st.cache_resource
+def get_analysis_cache():
+    from analysis_cache import AnalysisCache
+    return AnalysisCache()
+
+# Convert an image file to a base64 string, cached until the file changes
+def image_to_base64(image_path):
+    return _encode_image(image_path, os.path.getmtime(image_path))
+
+@st.cache_data(show_spinner=False)
+def _encode_image(image_path, mtime):
+    with open(image_path, "rb") as img_file:
+        return base64.b64encode(img_file.read()).decode("utf-8")
+
+# Look up the static image variants built at deploy time (python assets.py), once per process and manifest version
+@st.cache_resource(show_spinner=False)
+def get_static_assets(mtimes, manifest_mtime):
+    return {image_path: assets.load_variants(image_path) for image_path, _ in mtimes}
+
+def static_image_variants(image_path):
+    # Only link to app/static URLs when Streamlit is serving that folder; None means serve the original image
+    if not st.get_option("server.enableStaticServing") or not os.path.exists(assets.MANIFEST_PATH):
+        return None
+    mtimes = tuple((path, os.path.getmtime(path)) for path in assets.LANDING_IMAGES if os.path.exists(path))
+    return get_static_assets(mtimes, os.path.getmtime(assets.MANIFEST_PATH)).get(image_path)
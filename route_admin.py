@@ -0,0 +1,103 @@
+import streamlit as st
+import os
+import pandas as pd
+from resources import get_unsubscribe_store, get_external_sync
+from unsubscribe_import import import_unsubscribed
+from unsubscribe_ui import save_unsubscribed_users, show_sync_status, show_external_changes, watch_external_updates, select_unsubscribe_page, show_download_buttons
+
+# Function to display the admin page for managing unsubscriptions
+def render():
+    st.title("Unsubscribe List Management")
+    
+    # Password protection
+    password = st.text_input("Enter admin password", type="password")
+    if password != "cellai2025":  # Simple password, consider more secure authentication in production
+        st.warning("Please enter the correct password to access the admin panel")
+        return
+    
+    store = get_unsubscribe_store()
+    
+    # Add option to check for file status and sync
+    with st.expander("File Status & Sync Options", expanded=True):
+        st.write("### File Status")
+        
+        # Show file paths and existence
+        csv_exists = os.path.exists('unsubscribed_users.csv')
+        json_exists = os.path.exists('unsubscribed_users.json')
+        mac_csv_exists = os.path.exists(os.path.expanduser('~/Documents/Python/unsubscribed_users.csv'))
+        
+        st.write(f"CSV file in Streamlit directory: {'✅ Exists' if csv_exists else '❌ Not found'}")
+        st.write(f"JSON backup in Streamlit directory: {'✅ Exists' if json_exists else '❌ Not found'}")
+        st.write(f"CSV file in your Python folder: {'✅ Exists' if mac_csv_exists else '❌ Not found'}")
+        show_sync_status()
+        
+        # Error messages if any
+        if 'load_error' in st.session_state:
+            st.error(f"Last load error: {st.session_state['load_error']}")
+        if 'save_error' in st.session_state:
+            st.error(f"Last save error: {st.session_state['save_error']}")
+        
+        # Force save button
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Force Save Unsubscribe List"):
+                success = save_unsubscribed_users()
+                if success:
+                    st.success("✅ Unsubscribe list saved to multiple locations")
+                else:
+                    st.error("❌ Error saving unsubscribe list")
+        
+        with col2:
+            if st.button("Check for External Updates"):
+                show_external_changes(get_external_sync().poll())
+        
+        # Poll the files on a timer; only appended or rewritten files are read
+        if st.toggle("Watch files for external updates", key="watch_external_updates"):
+            watch_external_updates()
+        
+        # Show manual sync instructions
+        st.write("### Manual Sync Instructions")
+        st.write("If automatic sync isn't working:")
+        st.write("1. Download the unsubscribe list using the button below")
+        st.write("2. Place the file in your Python folder at: ~/Documents/Python/")
+        st.write("3. Make sure the filename is exactly: unsubscribed_users.csv")
+    
+    # Display the list
+    total = store.count()
+    if total:
+        st.write(f"Total unsubscribed users: {total}")
+        page_rows = select_unsubscribe_page("admin")
+        st.dataframe(pd.DataFrame(page_rows, columns=['email', 'reason', 'timestamp']), use_container_width=True)
+        
+        # Export feature; serialized only when a download is requested
+        show_download_buttons("admin_download")
+        
+        # Clear list option
+        if st.button("Clear Unsubscribe List"):
+            if st.checkbox("I understand this will permanently delete all unsubscribe data"):
+                save_unsubscribed_users([])
+                st.success("Unsubscribe list has been cleared")
+                st.rerun()
+    else:
+        st.info("No unsubscribed users found")
+    
+    # Import feature
+    st.subheader("Import Unsubscribed Users")
+    uploaded_file = st.file_uploader("Upload a CSV file with email addresses", type="csv")
+    if "import_message" in st.session_state:
+        st.success(st.session_state.pop("import_message"))
+    # The uploader keeps the file across reruns; import each upload only once
+    if uploaded_file is not None and st.session_state.get("imported_file") != uploaded_file.file_id:
+        try:
+            import_df = pd.read_csv(uploaded_file)
+            if 'email' in import_df.columns:
+                # Normalize, validate and dedup as column operations, then save once
+                imported = import_unsubscribed(import_df, store)
+                save_unsubscribed_users()
+                st.session_state["imported_file"] = uploaded_file.file_id
+                st.session_state["import_message"] = f"Successfully imported {imported} new email addresses"
+                st.rerun()
+            else:
+                st.error("CSV file must contain an 'email' column")
+        except Exception as e:
+            st.error(f"Error importing file: {e}")
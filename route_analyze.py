@@ -0,0 +1,174 @@
+import streamlit as st
+import io
+import os
+import tempfile
+import hashlib
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw
+from resources import get_analysis_cache, get_segmentation_executor
+from segmentation import SegmentationParams, segment_image, to_grayscale
+from roi_export import EXPORT_SHAPES, write_roiset
+from image_io import TiffFile, is_tiff, spool_upload
+from analysis_cache import cached_plane, entry_key
+
+# Longest side of the outline preview, in pixels
+PREVIEW_SIZE = 1024
+
+# Function to draw the ROI outlines over a contrast-stretched, downscaled copy of the image
+def outline_preview(image, rois):
+    # Every step-th pixel only, so a memory-mapped image is read at preview resolution
+    step = max(1, -(-max(image.shape[:2]) // PREVIEW_SIZE))
+    small = np.asarray(image[::step, ::step], dtype=np.float32)
+    low, high = np.percentile(small, (0.5, 99.5))
+    scaled = np.clip((small - low) / max(high - low, 1e-6) * 255, 0, 255).astype(np.uint8)
+    preview = Image.fromarray(scaled).convert("RGB")
+    scale = 1 / step
+    draw = ImageDraw.Draw(preview)
+    for roi in rois:
+        points = [(x * scale, y * scale) for x, y in roi.polygon.tolist()]
+        draw.line(points + points[:1], fill=(255, 215, 0), width=1)
+    return preview
+
+# Function to build the RoiSet .zip for ImageJ's ROI Manager; only runs when the download is clicked. The archive is
+# streamed to a temporary file, so the only copy in memory is the one Streamlit reads from it to serve the download
+def roiset_file(rois, shape):
+    with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as spool:
+        write_roiset(spool, rois, shape=shape)
+    try:
+        # Streamlit accepts a reader (not the temporary file's read/write object); the open file outlives the unlink
+        return open(spool.name, 'rb')
+    finally:
+        os.unlink(spool.name)
+
+# Function to open an upload once per session: TIFFs are spooled to disk and memory-mapped, other formats
+# decoded with Pillow (or read from the analysis cache, if the same file was decoded before). Returns (source, SHA-256 of the file)
+def open_upload(uploaded_file):
+    cached = st.session_state.get("upload")
+    if cached is not None and cached[0] == uploaded_file.file_id:
+        return cached[1], cached[2]
+    if is_tiff(uploaded_file.name):
+        path, digest = spool_upload(uploaded_file, suffix=".tif")
+        source = TiffFile(path)
+    else:
+        digest = hashlib.file_digest(uploaded_file, "sha256").hexdigest()
+        uploaded_file.seek(0)
+
+        def decode():
+            with Image.open(uploaded_file) as img:
+                return to_grayscale(img)
+        _, source = cached_plane(get_analysis_cache(), digest, None, decode)
+    st.session_state["upload"] = (uploaded_file.file_id, source, digest)
+    return source, digest
+
+# Function to pick one image out of a TIFF stack; other uploads are a single image. Returns (plane, label, position)
+def plane_widgets(source):
+    if not isinstance(source, TiffFile):
+        return source, "", None
+    frames, slices, channels = source.shape
+    position = []
+    for name, count in (("Time point", frames), ("Z slice", slices), ("Channel", channels)):
+        if count > 1:
+            position.append(st.number_input(f"{name} (1-{count})", min_value=1, max_value=count, value=1) - 1)
+        else:
+            position.append(0)
+    plane = source.plane(*position)
+    label = ", ".join(f"{name} {index + 1}" for name, index, count in zip(("t", "z", "c"), position, source.shape) if count > 1)
+    return plane, label, tuple(position)
+
+# Function to get the 2-D image to segment and its cache key. Planes mapped straight from the file are used as they are;
+# compressed and colour planes are decoded once and kept in the analysis cache
+def analysis_image(cache, digest, plane, position):
+    if isinstance(plane, np.ndarray) and plane.ndim == 2:
+        return entry_key('plane', digest, position), plane
+    return cached_plane(cache, digest, position, lambda: to_grayscale(np.asarray(plane)))
+
+# Function to describe which stages of an analysis came from the cache, or None if everything was computed
+def reuse_summary(result):
+    names = {'corrected': "background correction", 'mask': "masks", 'rois': "ROIs"}
+    reused = [f"{names[stage]} for {result.tiles - count} of {result.tiles} tiles"
+              for stage, count in result.computed.items() if count < result.tiles]
+    return "Reused earlier results: " + ", ".join(reused) if reused else None
+
+# Function to collect segmentation settings from the user
+def parameter_widgets():
+    defaults = SegmentationParams()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        threshold = st.selectbox("Threshold", ["otsu", "adaptive"], format_func=lambda name: name.capitalize())
+        adaptive_offset = st.number_input("Adaptive offset", value=float(defaults.adaptive_offset),
+                                          help="Only used by the adaptive threshold")
+    with col2:
+        background_radius = st.number_input("Background radius (px)", min_value=4, value=defaults.background_radius)
+        smoothing = st.number_input("Smoothing (px)", min_value=0.0, value=float(defaults.smoothing), step=0.5)
+    with col3:
+        min_area = st.number_input("Minimum ROI area (px)", min_value=1, value=defaults.min_area)
+        split = st.checkbox("Split touching cells", value=defaults.split)
+        min_distance = st.number_input("Minimum distance between cell centres (px)", min_value=1, value=defaults.min_distance)
+    return SegmentationParams(background_radius=int(background_radius), smoothing=smoothing, threshold=threshold,
+                              adaptive_offset=adaptive_offset, split=split, min_distance=int(min_distance),
+                              min_area=int(min_area))
+
+# Function to display the upload and ROI analysis page
+def render():
+    st.title("Automated ROI Selection")
+    st.write("Upload a fluorescence image to find the cells in it.")
+
+    uploaded_file = st.file_uploader("Upload an image", type=["png", "jpg", "jpeg", "tif", "tiff"])
+    if uploaded_file is None:
+        st.session_state.pop("upload", None)
+        st.session_state.pop("analysis", None)
+        return
+    try:
+        source, digest = open_upload(uploaded_file)
+    except Exception as e:
+        st.error(f"Could not read the image: {e}")
+        return
+
+    with st.form("segmentation_settings"):
+        image, plane_label, position = plane_widgets(source)
+        params = parameter_widgets()
+        submitted = st.form_submit_button("Find ROIs")
+
+    if submitted:
+        with st.spinner("Finding ROIs..."):
+            try:
+                # Colour TIFFs are summed over their samples like other colour images (analysis_image)
+                cache = get_analysis_cache()
+                image_key, image = analysis_image(cache, digest, image, position)
+                result = segment_image(image, params, executor=get_segmentation_executor(), workers=1,
+                                       cache=cache, image_key=image_key)
+            except Exception as e:
+                st.error(f"Could not analyze the image: {e}")
+                return
+            # Keep the cache under its size cap, dropping the least recently used entries
+            cache.evict()
+        st.session_state["analysis"] = (uploaded_file.file_id, image, plane_label, result)
+
+    # Results stay on screen until a different file is uploaded
+    analysis = st.session_state.get("analysis")
+    if analysis is None or analysis[0] != uploaded_file.file_id:
+        return
+    _, image, plane_label, result = analysis
+
+    st.success(f"Found {len(result.rois)} ROIs in {result.seconds:.2f} s ({result.megapixels_per_second:.1f} megapixels/s)")
+    if result.truncated:
+        st.warning(f"{result.truncated} ROIs were larger than the tile overlap and may be cut at tile edges")
+    summary = reuse_summary(result)
+    if summary:
+        st.caption(summary)
+    name = f"{uploaded_file.name} ({plane_label})" if plane_label else uploaded_file.name
+    st.image(outline_preview(image, result.rois), caption=f"{name}: ROI outlines", width='stretch')
+
+    measurements = pd.DataFrame([roi.as_dict() for roi in result.rois],
+                                columns=['x', 'y', 'width', 'height', 'area', 'mean_intensity', 'vertices'])
+    st.dataframe(measurements, width='stretch')
+    buffer = io.StringIO()
+    measurements.to_csv(buffer, index_label='roi')
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Download measurements as CSV", buffer.getvalue(), file_name="roi_measurements.csv", mime="text/csv")
+    with col2:
+        shape = st.selectbox("ImageJ ROI shape", EXPORT_SHAPES, format_func={'polygon': "Outline", 'rect': "Bounding box", 'oval': "Oval"}.get)
+        st.download_button("Download ROIs for ImageJ (RoiSet.zip)", lambda: roiset_file(result.rois, shape),
+                           file_name="RoiSet.zip", mime="application/zip", on_click="ignore")
@@ -0,0 +1,234 @@
+import streamlit as st
+import os
+import datetime
+import pandas as pd
+import router
+from resources import get_unsubscribe_store, get_unsubscribe_writer
+from email_address import canonicalize_email, canonicalize_emails
+from unsubscribe_import import read_sample, detect_email_column, stream_import
+from unsubscribe_ui import show_sync_status, select_unsubscribe_page, save_unsubscribed_users_to_all_locations, show_download_buttons
+
+# Function to turn a data editor's widget state into (updates, added, deleted) for the store
+def editor_changes(page_rows, editor_state):
+    updates = {}
+    for row, changes in editor_state.get("edited_rows", {}).items():
+        updates[page_rows[int(row)]['email']] = changes
+    deleted = [page_rows[int(row)]['email'] for row in editor_state.get("deleted_rows", [])]
+    added = [row for row in editor_state.get("added_rows", []) if row.get('email')]
+    return updates, added, deleted
+
+# Function to display the debug page for inspecting and editing the unsubscribe list
+def render():
+    st.title("Debug Information")
+    st.write(f"Current working directory: {os.getcwd()}")
+    st.write("Files in current directory:")
+    files = os.listdir(".")
+    for file in files:
+        st.write(f"- {file}")
+    
+    # CSV Management Section
+    st.header("Unsubscribed Users Management")
+    show_sync_status()
+    
+    # Initialize or load CSV data
+    csv_exists = os.path.exists("unsubscribed_users.csv")
+    
+    if csv_exists:
+        # Display current data with options to edit
+        st.subheader("Current Unsubscribed Users")
+        
+        # Create tabs for different operations
+        tab1, tab2, tab3, tab4 = st.tabs(["View/Edit", "Delete Rows", "Add New Emails", "Upload/Append"])
+        
+        with tab1:
+            # Editable dataframe of the current page only
+            page_rows = select_unsubscribe_page("debug_edit")
+            page_df = pd.DataFrame(page_rows, columns=['email', 'reason', 'timestamp'])
+            # A new key after each save starts the editor from a clean delta
+            editor_key = f"editor_{hash(tuple(page_df['email']))}_{st.session_state.get('editor_saves', 0)}"
+            st.data_editor(
+                page_df, 
+                use_container_width=True,
+                num_rows="dynamic",
+                key=editor_key
+            )
+            
+            if st.button("Save Changes", key="save_changes"):
+                try:
+                    # Apply only the edited, added and deleted rows; the files are written in the background
+                    changed = get_unsubscribe_store().apply_edits(*editor_changes(page_rows, st.session_state[editor_key]))
+                    if changed:
+                        get_unsubscribe_writer().mark_dirty()
+                    st.session_state.editor_saves = st.session_state.get('editor_saves', 0) + 1
+                    st.success(f"Changes saved successfully! ({changed} row(s) updated)")
+                except Exception as e:
+                    st.error(f"Error saving changes: {e}")
+        
+        with tab2:
+            st.write("Select rows to delete:")
+            
+            if get_unsubscribe_store().count():
+                # Get emails for multiselect from the current page
+                page_emails = [row['email'] for row in select_unsubscribe_page("debug_delete")]
+                
+                # Allow selection of multiple emails to delete
+                emails_to_delete = st.multiselect(
+                    "Select emails to remove from unsubscribe list:",
+                    options=page_emails
+                )
+                
+                if emails_to_delete and st.button("Delete Selected Emails"):
+                    # Delete just the selected emails
+                    try:
+                        # Update the store; the files are written in the background
+                        removed = get_unsubscribe_store().remove_many(emails_to_delete)
+                        get_unsubscribe_writer().mark_dirty()
+                        st.success(f"Successfully removed {removed} email(s)!")
+                    except Exception as e:
+                        st.error(f"Error saving changes: {e}")
+                
+                # Option to clear all unsubscribed users
+                if st.button("Clear All Unsubscribed Users", type="primary", use_container_width=True):
+                    confirm = st.checkbox("I understand this will permanently delete all unsubscribe data")
+                    
+                    if confirm:
+                        # Save the empty list
+                        try:
+                            # Update the store; the files are written in the background
+                            save_unsubscribed_users_to_all_locations([])
+                            st.success("Unsubscribe list has been cleared!")
+                        except Exception as e:
+                            st.error(f"Error clearing list: {e}")
+            else:
+                st.info("No unsubscribed users in the list.")
+        
+        with tab3:
+            st.write("Add new email addresses to the unsubscribe list:")
+            
+            # Input for a new email
+            new_email = st.text_input("Enter email address to add:")
+            
+            # Button to add a single email
+            if new_email and st.button("Add Email"):
+                address = canonicalize_email(new_email)
+                if address:
+                    # Check if email already exists
+                    if get_unsubscribe_store().contains(address):
+                        st.warning(f"Email {address} is already in the unsubscribe list.")
+                    else:
+                        # Save the new address
+                        try:
+                            # Indexed insert; the files are written in the background
+                            get_unsubscribe_store().add(address, "Added via debug page")
+                            get_unsubscribe_writer().mark_dirty()
+                            st.success(f"Successfully added {address} to unsubscribe list!")
+                        except Exception as e:
+                            st.error(f"Error saving changes: {e}")
+                else:
+                    st.error("Please enter a valid email address.")
+            
+            # Text area for bulk email addition
+            bulk_emails = st.text_area("Or enter multiple emails (one per line):")
+            
+            if bulk_emails and st.button("Add All Emails"):
+                # Validate and normalize every line at once
+                lines = [line for line in bulk_emails.split('\n') if line.strip()]
+                valid_emails = canonicalize_emails(lines).dropna().tolist()
+                if len(valid_emails) < len(lines):
+                    st.warning(f"Skipped {len(lines) - len(valid_emails)} invalid email address(es).")
+                
+                if valid_emails:
+                    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    
+                    # Save the new emails; repeats and known addresses are skipped through the email index
+                    try:
+                        added = get_unsubscribe_store().bulk_add(
+                            {'email': email, 'reason': "Bulk added via debug page", 'timestamp': timestamp}
+                            for email in valid_emails
+                        )
+                        if added:
+                            # The files are written in the background
+                            get_unsubscribe_writer().mark_dirty()
+                            st.success(f"Successfully added {added} new email(s) to unsubscribe list!")
+                        else:
+                            st.info("No new unique emails to add.")
+                    except Exception as e:
+                        st.error(f"Error saving changes: {e}")
+                else:
+                    st.error("No valid email addresses found.")
+        
+        with tab4:
+            st.write("Upload a CSV file with emails to append to the unsubscribe list:")
+            
+            uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
+            
+            if uploaded_file is not None:
+                try:
+                    # Read only a sample up front; the full file is streamed in chunks on import
+                    sample_df = read_sample(uploaded_file)
+                    
+                    # Display the uploaded data
+                    st.write("Uploaded data preview:")
+                    st.dataframe(sample_df.head())
+                    
+                    # Determine which column contains emails
+                    email_column = detect_email_column(sample_df)
+                    
+                    if email_column:
+                        st.write(f"Using column '{email_column}' for email addresses.")
+                        
+                        # Process button
+                        if st.button("Process Upload & Append"):
+                            store = get_unsubscribe_store()
+                            progress = st.progress(0.0, text="Importing...")
+                            
+                            def report(rows_read, valid_rows, added, bytes_read):
+                                fraction = min(bytes_read / uploaded_file.size, 1.0) if uploaded_file.size else 1.0
+                                progress.progress(fraction, text=f"Read {rows_read:,} rows, {added:,} new so far")
+                            
+                            rows_read, valid_rows, added = stream_import(
+                                uploaded_file, store, email_column,
+                                default_reason="Imported via CSV upload",
+                                on_progress=report
+                            )
+                            progress.progress(1.0, text=f"Read {rows_read:,} rows")
+                            
+                            if not valid_rows:
+                                st.error("No valid email addresses found in the uploaded file.")
+                            elif added:
+                                # Schedule one save
+                                try:
+                                    get_unsubscribe_writer().mark_dirty()
+                                    st.success(f"Successfully imported {added} new email(s)!")
+                                except Exception as e:
+                                    st.error(f"Error saving changes: {e}")
+                            else:
+                                st.info("No new unique emails to add.")
+                    else:
+                        st.error("Could not identify a column containing email addresses.")
+                except Exception as e:
+                    st.error(f"Error processing CSV file: {e}")
+    else:
+        st.info("unsubscribed_users.csv not found. Creating a new file.")
+        
+        # Export the stored list to create the file
+        get_unsubscribe_writer().flush(force=True)
+        
+        # Reload the page to show the new file
+        st.rerun()
+    
+    # Rerun latency per route, as recorded by the router in this process
+    st.header("Route Rerun Latency")
+    timings = router.TIMINGS.summary()
+    if timings:
+        st.table([
+            {'route': route, 'reruns': reruns, 'p50 (ms)': round(p50, 1), 'p95 (ms)': round(p95, 1), 'max (ms)': round(worst, 1)}
+            for route, (reruns, p50, p95, worst) in sorted(timings.items())
+        ])
+    
+    # Function to check and download files
+    st.header("File Actions")
+    if csv_exists:
+        show_download_buttons("debug_download", label="Download unsubscribed_users.csv")
+    else:
+        st.error("unsubscribed_users.csv does not exist")
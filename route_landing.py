@@ -0,0 +1,73 @@
+import mimetypes
+import streamlit as st
+import assets
+import landing_content as page
+from resources import image_to_base64, static_image_variants
+
+# Function to display the landing page
+def render():
+    # CSS for enhanced styling with increased spacing
+    st.markdown(f"<style>{page.PAGE_CSS}</style>", unsafe_allow_html=True)
+
+    # Navigation Bar
+    st.markdown(page.NAVBAR_HTML, unsafe_allow_html=True)
+
+    # Link the hero image from the static folder, falling back to inline base64
+    try:
+        hero_variants = static_image_variants("hero_image.jpg")
+        if hero_variants:
+            hero_background = assets.background_image_css(hero_variants, ".hero")
+        else:
+            hero_background = f".hero {{ background-image: url(data:image/jpeg;base64,{image_to_base64('hero_image.jpg')}); }}"
+    except:
+        # Fallback if image can't be loaded
+        hero_background = ""
+
+    # Hero Section with embedded image
+    if hero_background:
+        st.markdown(
+            f"<style>{page.HERO_CSS}{hero_background}</style>{page.HERO_HTML}",
+            unsafe_allow_html=True,
+        )
+    else:
+        # Fallback if image can't be loaded
+        st.title("Welcome to CellAI")
+        st.write("Empowering Biological Discovery with Automated ROI Selection")
+        st.write("CellAI harnesses the power of artificial intelligence to transform fluorescence microscopy analysis, delivering unparalleled speed, precision, and simplicity to researchers worldwide.")
+        st.button("Get Started Today")
+
+    # Spacer after Hero
+    st.markdown(page.SPACER_HTML, unsafe_allow_html=True)
+
+    # Introductory Section
+    st.markdown(page.INTRO_HTML, unsafe_allow_html=True)
+
+    # Spacer after Intro
+    st.markdown(page.SPACER_HTML, unsafe_allow_html=True)
+
+    # Features Section
+    st.markdown(page.FEATURES_ANCHOR, unsafe_allow_html=True)
+    st.markdown(f"### {page.FEATURES_HEADING}")
+
+    col1, col2 = st.columns([2, 3])
+    with col1:
+        try:
+            # Responsive <picture> elements from the static folder, or full-size images if it isn't served
+            for image_path, caption in page.FEATURE_IMAGES:
+                variants = static_image_variants(image_path)
+                if variants:
+                    st.markdown(assets.picture_html(variants, alt=caption, caption=caption), unsafe_allow_html=True)
+                else:
+                    # Inline the original file; st.image would load numpy and PIL to show it
+                    mime = mimetypes.guess_type(image_path)[0]
+                    image_src = f"data:{mime};base64,{image_to_base64(image_path)}"
+                    st.markdown(assets.image_html(image_src, alt=caption, caption=caption), unsafe_allow_html=True)
+        except:
+            st.write("Images not available")
+
+    with col2:
+        st.markdown(page.FEATURES_HTML, unsafe_allow_html=True)
+
+    # Footer Section
+    st.markdown(page.CONTACT_ANCHOR, unsafe_allow_html=True)
+    st.markdown(page.footer_html(), unsafe_allow_html=True)
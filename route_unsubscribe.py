@@ -0,0 +1,57 @@
+import streamlit as st
+from email_address import canonicalize_email
+from resources import get_unsubscribe_store
+from unsubscribe_store import UNSUBSCRIBE_REASONS, NO_REASON
+from unsubscribe_ui import add_unsubscribed_user
+
+# Function to handle unsubscribe requests
+def render():
+    st.title("Unsubscribe from Fluorocell.ai Email Communications")
+    
+    # Get email from query parameters - check multiple possible parameter names
+    # Using the non-experimental API, which returns the value itself rather than a list
+    email = st.query_params.get("email", "")
+    
+    # If email is not in the query params directly, check if it's passed as part of the unsubscribe parameter
+    if not email and "@" in st.query_params.get("unsubscribe", ""):
+        email = st.query_params.get("unsubscribe", "")
+    
+    # Create a form for unsubscribing
+    with st.form("unsubscribe_form"):
+        # Display the full email address above the form input
+        if email:
+            st.markdown(f"### Email address to unsubscribe: **{email}**")
+            
+            # Use a full-width text input that shows the complete email
+            # Note: We're intentionally NOT using disabled=True as that can cause display issues
+            email_input = st.text_input("Confirm Email Address", 
+                                       value=email,
+                                       key="email_field",
+                                       help="Please confirm this is your email address")
+        else:
+            email_input = st.text_input("Your Email Address", placeholder="Enter your email address")
+        
+        reason = st.selectbox(
+            "Reason for unsubscribing (optional)",
+            ["Select a reason (optional)"] + UNSUBSCRIBE_REASONS
+        )
+        
+        if reason == "Other":
+            other_reason = st.text_area("Please specify your reason", "")
+        
+        submitted = st.form_submit_button("Confirm Unsubscribe")
+        
+        # Validate and normalize the address (lowercase, ASCII domain) before it is stored
+        address = canonicalize_email(email_input) if submitted and email_input else None
+        
+        if address:
+            # Add the new unsubscribed email if it's not already in the shared list
+            if not get_unsubscribe_store().contains(address):
+                add_unsubscribed_user(address, reason if reason != "Select a reason (optional)" else NO_REASON)
+                st.success(f"You have been successfully unsubscribed from our email communications. You will no longer receive emails from fluorocell.ai.")
+            else:
+                st.info("Your email is already unsubscribed from our communications.")
+            
+            st.write("You may close this page now.")
+        elif submitted:
+            st.error("Please enter a valid email address.")
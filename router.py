@@ -0,0 +1,73 @@
+import time
+import importlib
+import threading
+from collections import deque
+
+# Maps the URL to a route and runs only that route's module.
+#
+# Streamlit re-executes cell.py on every interaction. cell.py now only resolves
+# the route and calls its module's render(), so a rerun of the unsubscribe
+# form no longer walks past the debug and admin pages, and a route's
+# dependencies (pandas for admin/debug) are imported the first time that route
+# is visited. How long each route's reruns take is recorded in TIMINGS.
+
+# route name -> module with a render() function
+ROUTES = {
+    'landing': 'route_landing',
+    'unsubscribe': 'route_unsubscribe',
+    'admin': 'route_admin',
+    'debug': 'route_debug',
+    'analyze': 'route_analyze',
+}
+
+# Rerun durations kept per route
+TIMING_SAMPLES = 500
+
+
+def resolve(query_params):
+    """Return the route for a page's query parameters (st.query_params or a dict)."""
+    if "debug" in query_params:
+        return 'debug'
+    # ?unsubscribe=true from the footer, or ?unsubscribe=<address> from an email
+    if "unsubscribe" in query_params:
+        return 'unsubscribe'
+    page = query_params.get("page", "")
+    if page in ROUTES:
+        return page
+    return 'landing'
+
+
+def run(route):
+    """Render one route, recording how long the rerun took."""
+    start = time.perf_counter()
+    importlib.import_module(ROUTES[route]).render()
+    # Reruns cut short by st.rerun()/st.stop() raise and aren't recorded
+    TIMINGS.record(route, time.perf_counter() - start)
+
+
+class RouteTimings:
+    """Recent rerun durations per route, shared by every session in the process."""
+
+    def __init__(self, samples=TIMING_SAMPLES):
+        self.samples = samples
+        self.lock = threading.Lock()
+        self.durations = {}
+
+    def record(self, route, seconds):
+        with self.lock:
+            self.durations.setdefault(route, deque(maxlen=self.samples)).append(seconds)
+
+    def summary(self):
+        """{route: (reruns, p50 ms, p95 ms, max ms)} over the recent samples."""
+        with self.lock:
+            snapshot = {route: sorted(durations) for route, durations in self.durations.items()}
+        return {route: (len(durations), _percentile(durations, 0.5) * 1000, _percentile(durations, 0.95) * 1000, durations[-1] * 1000)
+                for route, durations in snapshot.items()}
+
+
+def _percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    return sorted_values[round(fraction * (len(sorted_values) - 1))]
+
+
+TIMINGS = RouteTimings()
@@ -0,0 +1,725 @@
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis_cache import entry_key
+
+# ROI segmentation for fluorescence images, on the CPU with NumPy only.
+#
+# Pipeline, per tile:
+#
+#   1. background subtraction: a coarse background (the minimum of 4x4 means
+#      over blocks about background_radius wide, smoothed) is estimated once
+#      for the whole image and interpolated into each tile
+#   2. light smoothing (three box blurs, close to a Gaussian of smoothing px)
+#   3. thresholding: Otsu's threshold from a sample of the whole image, or an
+#      adaptive one (local mean over adaptive_window + adaptive_offset)
+#   4. connected components (8-connected), found on run-lengths of the mask
+#   5. optional splitting of touching cells: a marker-controlled watershed,
+#      flooding from intensity maxima at least min_distance apart, level by
+#      level from bright to dim
+#   6. size filtering and polygon extraction: each object's outer boundary is
+#      traced along pixel edges (like ImageJ's wand tool) and reduced to its
+#      corners
+#
+# Large images are cut into tiles of tile_size with an overlap on every side
+# and the tiles are processed in a pool of worker processes. Background and
+# the Otsu threshold are global, so every tile segments the same way. Each
+# object belongs to the tile that holds the centre of its bounding box, and
+# is dropped by tiles where it touches the cut edge of the overlap, so an
+# object spanning a seam is reported exactly once, whole, as long as it is
+# smaller than the overlap. Larger ones are kept but counted as truncated.
+#
+# Given an AnalysisCache, each tile's output of steps 1-2 (corrected), 3-5
+# (mask) and 6 (rois) is cached under a key covering the image, the settings
+# that stage depends on (STAGE_PARAMS) and those of the stages before it, so
+# a rerun computes only from the first stage whose settings changed.
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Settings each cached stage depends on, besides those of the stages before it
+STAGE_PARAMS = {
+    'corrected': ('background_radius', 'smoothing', 'tile_size', 'overlap'),
+    'mask': ('threshold', 'adaptive_window', 'adaptive_offset', 'split', 'min_distance'),
+    'rois': ('min_area', 'max_area'),
+}
+# Arrays a cached stage is stored as
+STAGE_ARRAYS = {
+    'corrected': ('smoothed',),
+    'mask': ('labels', 'count'),
+    'rois': ('vertices', 'counts', 'areas', 'means', 'truncated'),
+}
+
+
+class SegmentationParams:
+    """Settings for segment_image. Plain values only, so they pickle and hash (as_dict) easily."""
+
+    __slots__ = ('background_radius', 'smoothing', 'threshold', 'adaptive_window', 'adaptive_offset', 'split',
+                 'min_distance', 'min_area', 'max_area', 'tile_size', 'overlap')
+
+    def __init__(self, background_radius=50, smoothing=1.0, threshold='otsu', adaptive_window=51, adaptive_offset=0.0,
+                 split=True, min_distance=5, min_area=20, max_area=None, tile_size=1024, overlap=64):
+        if threshold not in ('otsu', 'adaptive'):
+            raise ValueError(f"threshold must be 'otsu' or 'adaptive', not {threshold!r}")
+        self.background_radius = background_radius
+        self.smoothing = smoothing
+        self.threshold = threshold
+        self.adaptive_window = adaptive_window
+        self.adaptive_offset = adaptive_offset
+        self.split = split
+        self.min_distance = min_distance
+        self.min_area = min_area
+        self.max_area = max_area
+        self.tile_size = tile_size
+        self.overlap = overlap
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"SegmentationParams({', '.join(f'{key}={value!r}' for key, value in self.as_dict().items())})"
+
+
+class Roi:
+    """One segmented object. polygon is an (N, 2) int32 array of (x, y) pixel-corner coordinates."""
+
+    __slots__ = ('polygon', 'area', 'mean_intensity')
+
+    def __init__(self, polygon, area, mean_intensity):
+        self.polygon = polygon
+        self.area = area
+        self.mean_intensity = mean_intensity
+
+    @property
+    def bounds(self):
+        """(left, top, right, bottom), right and bottom exclusive."""
+        (left, top), (right, bottom) = self.polygon.min(axis=0), self.polygon.max(axis=0)
+        return int(left), int(top), int(right), int(bottom)
+
+    def as_dict(self):
+        left, top, right, bottom = self.bounds
+        return {'x': left, 'y': top, 'width': right - left, 'height': bottom - top,
+                'area': self.area, 'mean_intensity': self.mean_intensity, 'vertices': len(self.polygon)}
+
+    def __repr__(self):
+        return f"Roi(area={self.area}, bounds={self.bounds}, vertices={len(self.polygon)})"
+
+
+class SegmentationResult:
+    """ROIs of an image, with how long they took. computed counts the tiles each stage ran for (not cached)."""
+
+    def __init__(self, rois, shape, threshold, tiles, truncated, seconds, computed=None):
+        self.rois = rois
+        self.shape = shape
+        self.threshold = threshold
+        self.tiles = tiles
+        self.truncated = truncated
+        self.seconds = seconds
+        self.computed = computed if computed is not None else dict.fromkeys(STAGE_PARAMS, tiles)
+
+    @property
+    def megapixels_per_second(self):
+        return self.shape[0] * self.shape[1] / 1e6 / self.seconds if self.seconds else float('inf')
+
+
+# --- Filters ---
+
+def _shifted(a, axis, start, length):
+    index = [slice(None)] * a.ndim
+    index[axis] = slice(start, start + length)
+    return a[tuple(index)]
+
+
+def _box_sum_1d(a, radius, axis):
+    # Sum over a window of 2*radius+1 along axis, edges replicated
+    n = a.shape[axis]
+    pad = [(0, 0)] * a.ndim
+    if radius <= 3:
+        # Narrow windows: adding shifted copies beats a cumulative sum
+        pad[axis] = (radius, radius)
+        padded = np.pad(a.astype(np.float32, copy=False), pad, mode='edge')
+        out = _shifted(padded, axis, 0, n).copy()
+        for offset in range(1, 2 * radius + 1):
+            out += _shifted(padded, axis, offset, n)
+        return out
+    pad[axis] = (radius + 1, radius)
+    c = np.cumsum(np.pad(a, pad, mode='edge'), axis=axis, dtype=np.float64)
+    return (_shifted(c, axis, 2 * radius + 1, n) - _shifted(c, axis, 0, n)).astype(np.float32)
+
+
+def box_blur(a, radius):
+    """Mean over a (2*radius+1)^2 square in the last two axes, edges replicated."""
+    if radius < 1:
+        return a.astype(np.float32, copy=False)
+    size = 2 * radius + 1
+    out = _box_sum_1d(a, radius, a.ndim - 2)
+    out = _box_sum_1d(out, radius, a.ndim - 1)
+    out /= size * size
+    return out
+
+
+def smooth(a, sigma):
+    """Approximate Gaussian blur: three box blurs with a matching variance."""
+    if sigma <= 0:
+        return a.astype(np.float32, copy=False)
+    radius = max(1, int(round((np.sqrt(4 * sigma * sigma + 1) - 1) / 2)))
+    for _ in range(3):
+        a = box_blur(a, radius)
+    return a
+
+
+def max_filter(a, radius):
+    """Maximum over a (2*radius+1)^2 square, edges replicated."""
+    out = a
+    for axis in (0, 1):
+        padded = np.pad(out, [(radius, radius) if i == axis else (0, 0) for i in range(2)], mode='edge')
+        n = out.shape[axis]
+        result = np.take(padded, np.arange(0, n), axis=axis)
+        for offset in range(1, 2 * radius + 1):
+            np.maximum(result, np.take(padded, np.arange(offset, offset + n), axis=axis), out=result)
+        out = result
+    return out
+
+
+# --- Background ---
+
+def background_grid(image, radius, band_rows=4096):
+    """Coarse background of a 2-D image: (grid, block size in pixels).
+
+    The image is reduced to 4x4 means (which tames noise), and the minimum of
+    those over blocks about radius pixels wide is taken, then smoothed. Works
+    in bands of rows, so a memory-mapped image is never loaded whole.
+    """
+    pool = 4
+    block = max(pool, (int(radius) // pool) * pool)
+    height, width = image.shape
+    rows, cols = -(-height // block), -(-width // block)
+    grid = np.empty((rows, cols), np.float32)
+    band_rows = max(block, band_rows // block * block)
+    for y0 in range(0, height, band_rows):
+        band = np.asarray(image[y0:y0 + band_rows], dtype=np.float32)
+        # Pad to whole blocks with the edge values
+        band = np.pad(band, ((0, -band.shape[0] % block), (0, cols * block - width)), mode='edge')
+        means = band.reshape(band.shape[0] // pool, pool, cols * block // pool, pool).mean(axis=(1, 3))
+        per_block = block // pool
+        mins = means.reshape(means.shape[0] // per_block, per_block, cols, per_block).min(axis=(1, 3))
+        grid[y0 // block:y0 // block + mins.shape[0]] = mins
+    return box_blur(grid, 1), block
+
+
+def background_at(grid, block, rows, cols):
+    """Bilinear interpolation of the background grid at pixel rows x cols (1-D index arrays)."""
+    def weights(coords, size):
+        position = np.clip((np.asarray(coords, dtype=np.float64) + 0.5) / block - 0.5, 0, size - 1)
+        low = np.minimum(np.floor(position).astype(np.intp), max(size - 2, 0))
+        return low, np.minimum(low + 1, size - 1), (position - low).astype(np.float32)
+
+    r0, r1, tr = weights(rows, grid.shape[0])
+    c0, c1, tc = weights(cols, grid.shape[1])
+    top = grid[r0][:, c0] * (1 - tc) + grid[r0][:, c1] * tc
+    bottom = grid[r1][:, c0] * (1 - tc) + grid[r1][:, c1] * tc
+    return top * (1 - tr)[:, None] + bottom * tr[:, None]
+
+
+# --- Thresholds ---
+
+def otsu_threshold(values, bins=256):
+    values = np.asarray(values, dtype=np.float64).ravel()
+    low, high = float(values.min()), float(values.max())
+    if high <= low:
+        return high
+    counts, edges = np.histogram(values, bins=bins, range=(low, high))
+    centers = (edges[:-1] + edges[1:]) / 2
+    weight_low = np.cumsum(counts)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(counts * centers)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_low = sum_low / weight_low
+        mean_high = (sum_low[-1] - sum_low) / weight_high
+        between = weight_low * weight_high * (mean_low - mean_high) ** 2
+    return float(centers[np.nanargmax(between[:-1])])
+
+
+def global_threshold(image, grid, block, smoothing, samples=1_000_000, patch=64):
+    """Otsu's threshold of the background-corrected, smoothed image, from evenly spaced patches."""
+    height, width = image.shape
+    if height * width <= samples or height < patch or width < patch:
+        boxes = [(0, height, 0, width)]
+    else:
+        # Patches rather than single pixels, so they can be smoothed the way the tiles are
+        patches = samples // (patch * patch)
+        rows = max(1, min(height // patch, int(np.sqrt(patches * height / width))))
+        cols = max(1, min(width // patch, patches // rows))
+        boxes = [(top, top + patch, left, left + patch)
+                 for top in np.linspace(0, height - patch, rows).astype(int)
+                 for left in np.linspace(0, width - patch, cols).astype(int)]
+    corrected = np.stack([
+        np.asarray(image[top:bottom, left:right], dtype=np.float32)
+        - background_at(grid, block, np.arange(top, bottom), np.arange(left, right))
+        for top, bottom, left, right in boxes
+    ])
+    # Smoothed as one stack (box_blur works on the last two axes)
+    return otsu_threshold(smooth(corrected, smoothing))
+
+
+# --- Connected components ---
+
+def _expand_ranges(starts, counts):
+    # Concatenated aranges: starts[i] .. starts[i] + counts[i] - 1 for every i
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, np.intp)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+def _connected_groups(count, a, b):
+    # Component id (the smallest member) of each of count nodes, given edges a-b
+    group = np.arange(count)
+    if len(a) == 0:
+        return group
+    while True:
+        low = np.minimum(group[a], group[b])
+        updated = group.copy()
+        np.minimum.at(updated, a, low)
+        np.minimum.at(updated, b, low)
+        # Pointer jumping: point every node at its group's current root
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, group):
+            return group
+        group = updated
+
+
+def label_components(mask, connectivity=8):
+    """Label the connected regions of a boolean mask: (labels int32 array, count)."""
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), np.int8)
+    padded[:, 1:-1] = mask
+    changes = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(changes == 1)
+    _, run_ends = np.nonzero(changes == -1)
+    runs = len(run_rows)
+    labels = np.zeros(height * width, np.int32)
+    if runs == 0:
+        return labels.reshape(height, width), 0
+
+    # Runs in the next row that overlap (or touch diagonally, for 8-connectivity)
+    diagonal = 1 if connectivity == 8 else 0
+    stride = width + 2
+    start_keys = run_rows.astype(np.int64) * stride + run_starts
+    end_keys = run_rows.astype(np.int64) * stride + run_ends
+    next_row = (run_rows.astype(np.int64) + 1) * stride
+    first = np.searchsorted(end_keys, next_row + run_starts - diagonal, side='right')
+    last = np.searchsorted(start_keys, next_row + run_ends + diagonal, side='left')
+    counts = np.maximum(last - first, 0)
+    a = np.repeat(np.arange(runs), counts)
+    b = _expand_ranges(first, counts)
+
+    groups = _connected_groups(runs, a, b)
+    _, run_labels = np.unique(groups, return_inverse=True)
+    lengths = run_ends - run_starts
+    labels[_expand_ranges(run_rows.astype(np.intp) * width + run_starts, lengths)] = np.repeat(run_labels + 1, lengths)
+    return labels.reshape(height, width), int(run_labels.max()) + 1
+
+
+def split_touching(labels, count, intensity, min_distance, levels=8):
+    """Marker-controlled watershed: split objects holding several intensity maxima. Returns (labels, count)."""
+    foreground = labels > 0
+    peaks = foreground & (intensity >= max_filter(intensity, min_distance))
+    markers, marker_count = label_components(peaks)
+    if marker_count < 2:
+        return labels, count
+    # Which object each marker lies in (a marker never spans two objects)
+    marker_object = np.zeros(marker_count + 1, np.int64)
+    marker_object[markers[peaks]] = labels[peaks]
+    per_object = np.bincount(marker_object[1:], minlength=count + 1)
+    crowded = per_object >= 2
+    crowded[0] = False
+    if not crowded.any():
+        return labels, count
+
+    # Flooding works on a flat list of the crowded objects' pixels, which is usually a small part of the tile
+    height, width = labels.shape
+    pixels = np.flatnonzero(crowded[labels])
+    object_of = labels.ravel()[pixels]
+    values = intensity.ravel()[pixels]
+    flooded = markers.ravel()[pixels].astype(np.int64)
+    # Neighbour positions in the list; -1 (outside the objects) reads the 0 appended to flooded
+    position = np.full(labels.size, -1, np.int64)
+    position[pixels] = np.arange(len(pixels))
+    y, x = np.divmod(pixels, width)
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    neighbours = []
+    for dy, dx in steps + [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
+        inside = (y + dy >= 0) & (y + dy < height) & (x + dx >= 0) & (x + dx < width)
+        neighbours.append(np.where(inside, position[np.where(inside, pixels + dy * width + dx, 0)], -1))
+    neighbours = np.stack(neighbours)
+
+    def grow(pending, directions):
+        # Repeatedly give pending pixels the largest marker among their neighbours; returns what is still pending
+        while len(pending):
+            padded = np.append(flooded, 0)
+            reached = padded[neighbours[:directions, pending]].max(axis=0)
+            hit = reached > 0
+            if not hit.any():
+                break
+            flooded[pending[hit]] = reached[hit]
+            pending = pending[~hit]
+        return pending
+
+    # Intensity relative to each object's own range, so the levels don't depend on what else is in the tile
+    low = np.full(count + 1, np.inf, np.float32)
+    high = np.full(count + 1, -np.inf, np.float32)
+    np.minimum.at(low, object_of, values)
+    np.maximum.at(high, object_of, values)
+    relative = (values - low[object_of]) / np.maximum(high - low, 1e-6)[object_of]
+    # Flood from the brightest level down, so boundaries settle in the dimmer valleys between cells
+    for level in np.linspace(1, 0, levels + 1)[1:]:
+        grow(np.flatnonzero((flooded == 0) & (relative >= level)), len(steps))
+    # Pixels joined to their object only diagonally
+    grow(np.flatnonzero(flooded == 0), len(neighbours))
+
+    # Split objects take new ids after the existing ones
+    result = labels.astype(np.int32)
+    result.ravel()[pixels] = np.where(flooded > 0, flooded + count, 0)
+    return result, count + marker_count
+
+
+# --- Polygons ---
+
+def _list_ranks(successor):
+    # Steps from each node to the end of its list (successor -1 ends a list), by pointer jumping
+    distance = (successor >= 0).astype(np.int64)
+    following = successor.copy()
+    while True:
+        active = following >= 0
+        if not active.any():
+            return distance
+        target = following[active]
+        distance[active] += distance[target]
+        following[active] = following[target]
+
+
+def trace_polygons(labels):
+    """Outer boundary of every label as {label: (N, 2) int32 array of (x, y) corners}.
+
+    Boundaries run along pixel edges, clockwise on screen, through the corner
+    points only. Diagonal neighbours of the same label are joined (8-connectivity).
+    """
+    height, width = labels.shape
+    padded = np.pad(labels, 1)
+    center = padded[1:-1, 1:-1]
+
+    # Directed boundary edges, clockwise around each object's pixels: (label, pixel, x0, y0, direction)
+    parts = []
+    rows, cols = np.indices((height, width), sparse=True)
+    neighbours = [padded[:-2, 1:-1], padded[1:-1, 2:], padded[2:, 1:-1], padded[1:-1, :-2]]
+    starts = [(0, 0), (1, 0), (1, 1), (0, 1)]  # corner the edge starts at, for top/right/bottom/left sides
+    for direction, (neighbour, (dx, dy)) in enumerate(zip(neighbours, starts)):
+        y, x = np.nonzero((center != neighbour) & (center > 0))
+        parts.append((center[y, x], y * width + x, x + dx, y + dy, np.full(len(y), direction, np.int8)))
+    label, pixel, x0, y0, direction = (np.concatenate(values) for values in zip(*parts))
+    if len(label) == 0:
+        return {}
+    # Edge ends: right, down, left, up
+    x1 = x0 + np.array([1, 0, -1, 0])[direction]
+    y1 = y0 + np.array([0, 1, 0, -1])[direction]
+
+    vertices = (height + 1) * (width + 1)
+    start_keys = label.astype(np.int64) * vertices + y0.astype(np.int64) * (width + 1) + x0
+    order = np.argsort(start_keys, kind='stable')
+    sorted_keys = start_keys[order]
+    end_keys = label.astype(np.int64) * vertices + y1.astype(np.int64) * (width + 1) + x1
+    first = np.searchsorted(sorted_keys, end_keys, side='left')
+    last = np.searchsorted(sorted_keys, end_keys, side='right')
+    successor = order[first]
+    # Where two diagonal pixels of one object meet, carry on along the other pixel
+    pinched = np.nonzero(last - first == 2)[0]
+    if len(pinched):
+        other = order[first[pinched] + 1]
+        use_other = pixel[successor[pinched]] == pixel[pinched]
+        successor[pinched[use_other]] = other[use_other]
+
+    # Cycle id: the smallest edge index on each cycle
+    cycle = np.arange(len(label))
+    following = successor.copy()
+    while True:
+        updated = np.minimum(cycle, cycle[following])
+        following = following[following]
+        if np.array_equal(updated, cycle):
+            break
+        cycle = updated
+    # Order each cycle starting at its smallest edge
+    broken = successor.copy()
+    broken[successor == cycle] = -1
+    ranks = _list_ranks(broken)
+    order = np.lexsort((-ranks, cycle))
+    cycle, direction, x0, y0, label = cycle[order], direction[order], x0[order], y0[order], label[order]
+
+    # Keep corners only: edges whose direction differs from the previous edge on the cycle
+    boundaries = np.flatnonzero(np.r_[True, cycle[1:] != cycle[:-1]])
+    group_ends = np.r_[boundaries[1:], len(cycle)] - 1
+    previous = np.roll(direction, 1)
+    previous[boundaries] = direction[group_ends]
+    corner = direction != previous
+    cycle, x, y, label = cycle[corner], x0[corner], y0[corner], label[corner]
+
+    # Signed area per cycle (shoelace): outer boundaries are positive, holes negative
+    boundaries = np.flatnonzero(np.r_[True, cycle[1:] != cycle[:-1]])
+    group_ends = np.r_[boundaries[1:], len(cycle)]
+    next_x, next_y = np.roll(x, -1), np.roll(y, -1)
+    next_x[group_ends - 1], next_y[group_ends - 1] = x[boundaries], y[boundaries]
+    area = np.add.reduceat(x.astype(np.int64) * next_y - next_x.astype(np.int64) * y, boundaries)
+
+    polygons = {}
+    best = {}
+    for start, end, cycle_label, cycle_area in zip(boundaries.tolist(), group_ends.tolist(), label[boundaries].tolist(), area.tolist()):
+        if cycle_area > best.get(cycle_label, 0):
+            best[cycle_label] = cycle_area
+            polygons[cycle_label] = np.stack([x[start:end], y[start:end]], axis=1).astype(np.int32)
+    return polygons
+
+
+# --- Tiles ---
+
+def _tile_boxes(height, width, tile_size, overlap):
+    # (core box, padded box) per tile, boxes as (top, bottom, left, right)
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            core = (top, min(top + tile_size, height), left, min(left + tile_size, width))
+            padded = (max(0, top - overlap), min(height, core[1] + overlap), max(0, left - overlap), min(width, core[3] + overlap))
+            yield core, padded
+
+
+def correct_tile(tile, origin, grid, block, smoothing):
+    """Background-corrected, smoothed tile (float32)."""
+    top, left = origin
+    height, width = tile.shape
+    corrected = np.asarray(tile, dtype=np.float32) - background_at(grid, block, np.arange(top, top + height),
+                                                                   np.arange(left, left + width))
+    return smooth(corrected, smoothing)
+
+
+def mask_tile(smoothed, threshold, params):
+    """Objects in a corrected tile, before size filtering: (labels, largest label)."""
+    if params.threshold == 'adaptive':
+        local_mean = box_blur(smoothed, params.adaptive_window // 2)
+        mask = (smoothed > local_mean + params.adaptive_offset) & (smoothed > threshold / 2)
+    else:
+        mask = smoothed > threshold
+
+    labels, count = label_components(mask)
+    if params.split and count:
+        labels, count = split_touching(labels, count, smoothed, params.min_distance)
+    return labels, count
+
+
+def tile_rois(labels, count, tile, origin, core, image_shape, params):
+    """Size filter, ownership and polygons for a tile's objects: (rois in image coordinates, truncated count)."""
+    top, left = origin
+    height, width = labels.shape
+    areas = np.bincount(labels.ravel(), minlength=count + 1)
+    keep = areas >= params.min_area
+    if params.max_area:
+        keep &= areas <= params.max_area
+    keep[0] = False
+
+    # Bounding boxes, to decide which tile owns each object
+    ys, xs = np.nonzero(labels)
+    object_ids = labels[ys, xs]
+    low_y = np.full(count + 1, height, np.int64)
+    high_y = np.full(count + 1, -1, np.int64)
+    low_x = np.full(count + 1, width, np.int64)
+    high_x = np.full(count + 1, -1, np.int64)
+    np.minimum.at(low_y, object_ids, ys)
+    np.maximum.at(high_y, object_ids, ys)
+    np.minimum.at(low_x, object_ids, xs)
+    np.maximum.at(high_x, object_ids, xs)
+    center_y = (low_y + high_y) // 2 + top
+    center_x = (low_x + high_x) // 2 + left
+    owned = (center_y >= core[0]) & (center_y < core[1]) & (center_x >= core[2]) & (center_x < core[3])
+    # Touching the cut edge of the overlap (not the image border): the object continues in the next tile
+    cut = np.zeros(count + 1, bool)
+    if top > 0:
+        cut |= low_y == 0
+    if top + height < image_shape[0]:
+        cut |= high_y == height - 1
+    if left > 0:
+        cut |= low_x == 0
+    if left + width < image_shape[1]:
+        cut |= high_x == width - 1
+    keep &= owned
+    truncated = int((keep & cut).sum())
+
+    labels = np.where(keep[labels], labels, 0)
+    sums = np.bincount(labels.ravel(), weights=np.asarray(tile, dtype=np.float64).ravel(), minlength=count + 1)
+    rois = []
+    offset = np.array([left, top], np.int32)
+    for object_id, polygon in sorted(trace_polygons(labels).items()):
+        area = int(areas[object_id])
+        rois.append(Roi(polygon + offset, area, float(sums[object_id] / area)))
+    return rois, truncated
+
+
+def _pack_rois(rois, truncated):
+    # A tile's ROIs as flat arrays, for the cache
+    return {
+        'vertices': np.concatenate([roi.polygon for roi in rois]) if rois else np.empty((0, 2), np.int32),
+        'counts': np.array([len(roi.polygon) for roi in rois], np.int64),
+        'areas': np.array([roi.area for roi in rois], np.int64),
+        'means': np.array([roi.mean_intensity for roi in rois], np.float64),
+        'truncated': np.array(truncated),
+    }
+
+
+def _unpack_rois(entry):
+    vertices = np.array(entry['vertices'])
+    polygons = np.split(vertices, np.cumsum(entry['counts'])[:-1]) if len(entry['counts']) else []
+    rois = [Roi(polygon, area, mean) for polygon, area, mean in zip(polygons, entry['areas'].tolist(), entry['means'].tolist())]
+    return rois, int(entry['truncated'])
+
+
+def segment_tile(tile, origin, core, image_shape, grid, block, threshold, params, cache=None, keys=None):
+    """Segment one tile (with its overlap). Returns (rois in image coordinates, truncated count, stages computed).
+
+    With a cache, the mask and then the corrected tile are looked up under keys (stage -> key for this tile)
+    before they are computed, and every stage computed is stored.
+    """
+    computed = []
+    entry = cache.get(keys['mask'], STAGE_ARRAYS['mask']) if cache is not None else None
+    if entry is not None:
+        labels, count = entry['labels'], int(entry['count'])
+    else:
+        entry = cache.get(keys['corrected'], STAGE_ARRAYS['corrected']) if cache is not None else None
+        if entry is not None:
+            smoothed = entry['smoothed']
+        else:
+            smoothed = correct_tile(tile, origin, grid, block, params.smoothing)
+            computed.append('corrected')
+            if cache is not None:
+                cache.put(keys['corrected'], {'smoothed': smoothed})
+        labels, count = mask_tile(np.asarray(smoothed), threshold, params)
+        computed.append('mask')
+        if cache is not None:
+            cache.put(keys['mask'], {'labels': labels, 'count': np.array(count)})
+    rois, truncated = tile_rois(labels, count, tile, origin, core, image_shape, params)
+    computed.append('rois')
+    if cache is not None:
+        cache.put(keys['rois'], _pack_rois(rois, truncated))
+    return rois, truncated, computed
+
+
+def _segment_tile_task(args):
+    return segment_tile(*args)
+
+
+def make_executor(workers=DEFAULT_WORKERS):
+    """A process pool for segment_image. Spawned rather than forked: the app's threads don't survive a fork."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def stage_keys(image_key, params):
+    """Cache key of each stage for an image (a key identifying its pixels) and settings: {stage: key}."""
+    keys, parent = {}, image_key
+    for stage, names in STAGE_PARAMS.items():
+        parent = keys[stage] = entry_key(parent, stage, {name: getattr(params, name) for name in names})
+    return keys
+
+
+def segment_image(image, params=None, executor=None, workers=None, cache=None, image_key=None):
+    """Segment a 2-D image into ROIs.
+
+    Tiles are processed in executor if given, otherwise in a pool of workers
+    processes created for this call (workers=1, or a single tile, runs in this
+    process). image may be a NumPy array or a memory-mapped view. With an
+    AnalysisCache, stages already computed for the same pixels and settings
+    are reused; image_key identifies the pixels (hashed from them if not given).
+    """
+    params = params or SegmentationParams()
+    if image.ndim != 2:
+        raise ValueError(f"expected a 2-D image, got shape {image.shape}")
+    start = time.perf_counter()
+    keys = None
+    if cache is not None:
+        if image_key is None:
+            from analysis_cache import array_digest
+            image_key = array_digest(image)
+        keys = stage_keys(image_key, params)
+
+    # Background and threshold for the whole image, cached with the first stage
+    entry = cache.get(entry_key(keys['corrected'], 'image'), ('grid', 'block', 'threshold')) if cache is not None else None
+    if entry is not None:
+        grid, block, threshold = np.asarray(entry['grid']), int(entry['block']), float(entry['threshold'])
+    else:
+        grid, block = background_grid(image, params.background_radius)
+        threshold = global_threshold(image, grid, block, params.smoothing)
+        if cache is not None:
+            cache.put(entry_key(keys['corrected'], 'image'), {'grid': grid, 'block': np.array(block), 'threshold': np.array(threshold)})
+
+    computed = dict.fromkeys(STAGE_PARAMS, 0)
+    boxes = list(_tile_boxes(*image.shape, params.tile_size, params.overlap))
+    # (rois, truncated) per tile, in tile order whether cached or computed
+    tiles = [None] * len(boxes)
+    tasks, pending = [], []
+    for index, (core, (top, bottom, left, right)) in enumerate(boxes):
+        tile_keys = None
+        if cache is not None:
+            tile_keys = {stage: entry_key(key, core) for stage, key in keys.items()}
+            # Tiles whose ROIs are cached aren't read at all
+            entry = cache.get(tile_keys['rois'], STAGE_ARRAYS['rois'])
+            if entry is not None:
+                tiles[index] = _unpack_rois(entry)
+                continue
+        tile = np.ascontiguousarray(image[top:bottom, left:right])
+        tasks.append((tile, (top, left), core, image.shape, grid, block, threshold, params, cache, tile_keys))
+        pending.append(index)
+
+    workers = workers or DEFAULT_WORKERS
+    if executor is None and (workers == 1 or len(tasks) <= 1):
+        results = map(_segment_tile_task, tasks)
+        owned_executor = None
+    else:
+        owned_executor = make_executor(workers) if executor is None else None
+        results = (owned_executor or executor).map(_segment_tile_task, tasks)
+    try:
+        for index, (found, tile_truncated, stages) in zip(pending, results):
+            tiles[index] = found, tile_truncated
+            for stage in stages:
+                computed[stage] += 1
+    finally:
+        if owned_executor is not None:
+            owned_executor.shutdown()
+    rois = [roi for found, _ in tiles for roi in found]
+    truncated = sum(count for _, count in tiles)
+    return SegmentationResult(rois, image.shape, threshold, len(boxes), truncated, time.perf_counter() - start, computed)
+
+
+def to_grayscale(image):
+    """2-D float32 intensities from a PIL image or an (H, W[, C]) array; colour images are summed over channels."""
+    array = np.asarray(image)
+    if array.ndim == 3:
+        # Fluorescence in an RGB file is usually one coloured channel; summing keeps whichever carries signal
+        array = array[..., :3].astype(np.float32).sum(axis=2)
+    return array.astype(np.float32, copy=False)
+
+
+if __name__ == '__main__':
+    # python segmentation.py image.png [image ...]
+    from PIL import Image
+
+    if len(sys.argv) < 2:
+        print("usage: python segmentation.py <image> [image ...]")
+        sys.exit(2)
+    for path in sys.argv[1:]:
+        with Image.open(path) as img:
+            result = segment_image(to_grayscale(img))
+        print(f"{path}: {len(result.rois)} ROIs in {result.seconds:.2f} s "
+              f"({result.megapixels_per_second:.1f} MP/s, {result.tiles} tiles, threshold {result.threshold:.1f})")
@@ -0,0 +1,72 @@
+import io
+import gzip
+import threading
+
+# On-demand downloads of the unsubscribe list.
+#
+# The admin and debug pages used to serialize the whole list for their
+# st.download_button on every rerun, so each keystroke in the password box or
+# a filter widget paid for a full CSV export nobody asked for. The buttons now
+# pass one of these methods as a callable, which Streamlit only runs when the
+# button is clicked.
+#
+# The bytes are cached by the store's version in a single slot: downloading an
+# unchanged list again costs nothing, and asking for the other variant (plain
+# or gzip) replaces the cached copy rather than adding a second one. The CSV
+# is produced in chunks (UnsubscribeStore.iter_csv), so building it never
+# holds a text copy of the whole list next to the bytes, and the gzip variant
+# is compressed as the chunks arrive, without a plain copy at all.
+
+# Lists above this size are offered gzip-compressed as well
+GZIP_OFFER_ROWS = 100_000
+
+
+class DownloadService:
+    """Serializes the unsubscribe list on request, caching the latest result by data version."""
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        # (store version, compressed, bytes)
+        self.cached = None
+
+    def csv_bytes(self) -> bytes:
+        """The list as unsubscribed_users.csv (the same bytes the export writes)."""
+        return self._get(compress=False)
+
+    def csv_gzip_bytes(self) -> bytes:
+        """The same CSV, gzip-compressed."""
+        return self._get(compress=True)
+
+    def write_csv(self, file, compress=False) -> int:
+        """Stream the CSV into a binary file object without caching it. Returns the bytes of CSV written."""
+        written = 0
+        target = gzip.GzipFile(fileobj=file, mode='wb', mtime=0) if compress else file
+        try:
+            for chunk in self.store.iter_csv():
+                target.write(chunk)
+                written += len(chunk)
+        finally:
+            if compress:
+                target.close()
+        return written
+
+    def _get(self, compress):
+        # Downloads run on their own threads; the lock keeps two clicks from serializing twice
+        with self.lock:
+            version = self.store.version()
+            if self.cached is not None and self.cached[:2] == (version, compress):
+                return self.cached[2]
+            # Drop the old copy before building the new one
+            self.cached = None
+            if compress:
+                buffer = io.BytesIO()
+                self.write_csv(buffer, compress=True)
+                data = buffer.getvalue()
+            else:
+                data = b''.join(self.store.iter_csv())
+            self.cached = (version, compress, data)
+            return data
+
+    def offer_gzip(self) -> bool:
+        return self.store.count() > GZIP_OFFER_ROWS
@@ -0,0 +1,105 @@
+import datetime
+
+import pandas as pd
+
+from email_address import canonicalize_emails
+
+# Vectorized import of unsubscribe lists (bounce/complaint exports, re-imports).
+#
+# Normalization, validation, dedup and default filling are all column
+# operations, so a 100k-row export no longer walks iterrows() and formats a
+# timestamp per row on the Streamlit script thread.
+
+
+def valid_rows(import_df, default_reason="Imported", email_column='email'):
+    """Return the rows of import_df with a valid address, normalized, as an email/reason/timestamp frame."""
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Validate and normalize the whole column at once; invalid addresses become <NA>
+    emails = canonicalize_emails(import_df[email_column])
+    rows = pd.DataFrame({'email': emails}, index=import_df.index)
+
+    # Keep the file's reason/timestamp where present, fill the gaps with defaults
+    if 'reason' in import_df.columns:
+        rows['reason'] = import_df['reason'].astype('string').fillna(default_reason)
+    else:
+        rows['reason'] = default_reason
+    if 'timestamp' in import_df.columns:
+        rows['timestamp'] = import_df['timestamp'].astype('string').fillna(timestamp)
+    else:
+        rows['timestamp'] = timestamp
+
+    return rows[rows['email'].notna()]
+
+
+def prepare_import(import_df, store, default_reason="Imported", email_column='email'):
+    """Return the rows of import_df that should be added to the store, as an email/reason/timestamp frame."""
+    return _new_rows(valid_rows(import_df, default_reason, email_column), store)
+
+
+def _new_rows(rows, store):
+    # Drop repeats within the file
+    rows = rows.drop_duplicates('email')
+
+    # Dedup against the existing list through the email index
+    known = store.contains_many(rows['email'].tolist())
+    return rows[[not found for found in known]].reset_index(drop=True)
+
+
+def import_unsubscribed(import_df, store, default_reason="Imported", email_column='email'):
+    """Add the new rows of import_df to the store in one transaction. Returns the number added."""
+    return _add_rows(prepare_import(import_df, store, default_reason, email_column), store)
+
+
+def _add_rows(rows, store):
+    if rows.empty:
+        return 0
+    columns = zip(rows['email'].tolist(), rows['reason'].tolist(), rows['timestamp'].tolist())
+    return store.bulk_add(
+        {'email': email, 'reason': reason, 'timestamp': timestamp} for email, reason, timestamp in columns
+    )
+
+
+# Streaming ingestion for large uploads: the email column is detected from a
+# sample, then only that column is read, chunk by chunk, so peak memory depends
+# on CHUNK_ROWS rather than on the size of the file.
+
+SAMPLE_ROWS = 1000
+CHUNK_ROWS = 50_000
+
+
+def detect_email_column(sample_df):
+    """Return the column that holds email addresses, or None."""
+    if 'email' in sample_df.columns:
+        return 'email'
+    for col in sample_df.columns:
+        if canonicalize_emails(sample_df[col]).notna().any():
+            return col
+    return None
+
+
+def read_sample(file, rows=SAMPLE_ROWS):
+    file.seek(0)
+    sample = pd.read_csv(file, nrows=rows, dtype=str)
+    file.seek(0)
+    return sample
+
+
+def stream_import(file, store, email_column, default_reason="Imported", chunk_rows=CHUNK_ROWS, on_progress=None):
+    """Import the email column of a CSV file in chunks.
+
+    Each chunk is deduplicated against the email index, which bulk_add keeps
+    current, so repeats across chunks are caught too. on_progress is called
+    after every chunk with (rows_read, valid_rows, added, bytes_read).
+    Returns (rows_read, valid_rows, added).
+    """
+    rows_read = valid = added = 0
+    file.seek(0)
+    for chunk in pd.read_csv(file, usecols=[email_column], dtype=str, chunksize=chunk_rows):
+        rows_read += len(chunk)
+        rows = valid_rows(chunk, default_reason, email_column)
+        valid += len(rows)
+        added += _add_rows(_new_rows(rows, store), store)
+        if on_progress is not None:
+            on_progress(rows_read, valid, added, file.tell())
+    return rows_read, valid, added
@@ -0,0 +1,293 @@
+import sys
+import html
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+
+from email_address import canonicalize_email, normalize_email
+from unsubscribe_store import UnsubscribeStore, DB_PATH, UNSUBSCRIBE_REASONS, NO_REASON, current_timestamp
+from unsubscribe_writer import MirrorWriter
+from unsubscribe_sync import ExternalSync
+
+# Lightweight HTTP intake for unsubscribes, without a Streamlit session.
+#
+#   GET  /unsubscribe?email=<address>      confirmation form (also ?unsubscribe=<address>)
+#   POST /unsubscribe                      form submit: email, reason (form fields or query parameters)
+#   POST /unsubscribe?email=<address>      RFC 8058 one-click, body List-Unsubscribe=One-Click
+#   GET  /healthz                          counters
+#
+# Emails can point their headers at it:
+#
+#   List-Unsubscribe: <https://<host>/unsubscribe?email=<address>>
+#   List-Unsubscribe-Post: List-Unsubscribe=One-Click
+#
+# Requests are queued and committed to the unsubscribe store in micro-batches
+# (one bulk_add per batch, run off the event loop), so a burst of one-click
+# POSTs after a campaign costs a few transactions rather than one per request.
+# A response is only sent once its batch is committed. The CSV/JSON files are
+# exported by the same coalescing MirrorWriter the app uses, and the Streamlit
+# app sees the new rows through SQLite.
+#
+#   python unsubscribe_server.py [--host 0.0.0.0] [--port 8502]
+
+BATCH_SIZE = 500
+LINGER_SECONDS = 0.005
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 16 * 1024
+
+ONE_CLICK_REASON = "One-click unsubscribe (List-Unsubscribe-Post)"
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+               500: 'Internal Server Error'}
+
+
+class IntakeBatcher:
+    """Queues unsubscribes and commits them to the store in batches."""
+
+    def __init__(self, store, writer=None, batch_size=BATCH_SIZE, linger=LINGER_SECONDS):
+        self.store = store
+        self.writer = writer
+        self.batch_size = batch_size
+        self.linger = linger
+        self.queue = asyncio.Queue()
+        self.requests = 0
+        self.added = 0
+        self.batches = 0
+
+    async def submit(self, email, reason):
+        """Queue one address and wait for its batch to commit. Returns False if it was already unsubscribed."""
+        self.requests += 1
+        # Even the duplicate check goes through the batch: the store's lock must not be taken on the event loop
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(({'email': email, 'reason': reason, 'timestamp': current_timestamp()}, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            # Let more requests arrive for a moment, up to batch_size
+            deadline = loop.time() + self.linger
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    batch.append(self.queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self.queue.get(), timeout))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+            try:
+                results = await loop.run_in_executor(None, self._commit, [record for record, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), added in zip(batch, results):
+                if not future.done():
+                    future.set_result(added)
+
+    def _commit(self, records):
+        # First occurrence of each new address wins; returns one flag per record
+        known = self.store.contains_many(record['email'] for record in records)
+        seen = set()
+        results = []
+        for record, found in zip(records, known):
+            key = normalize_email(record['email'])
+            added = not found and key not in seen
+            seen.add(key)
+            results.append(added)
+        self.store.bulk_add(record for record, added in zip(records, results) if added)
+        self.batches += 1
+        if any(results):
+            self.added += sum(results)
+            if self.writer is not None:
+                self.writer.mark_dirty()
+        return results
+
+
+class IntakeServer:
+    """Minimal HTTP/1.1 server (keep-alive, no chunked bodies) in front of an IntakeBatcher."""
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.started = time.time()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                try:
+                    method, target, headers, keep_alive = _parse_head(head)
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(f"negative Content-Length {length}")
+                except ValueError:
+                    writer.write(_response(400, _page("Bad request."), keep_alive=False))
+                    break
+                if length > MAX_BODY_BYTES:
+                    writer.write(_response(413, _page("Request too large."), keep_alive=False))
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, content = await self.dispatch(method, target, headers, body)
+                except Exception as e:
+                    # The batch could not be committed (database locked, disk full): tell the client to retry later
+                    print(f"{method} {target} failed: {e!r}", file=sys.stderr, flush=True)
+                    status, content, keep_alive = 500, _page("Something went wrong. Please try again later."), False
+                writer.write(_response(status, content, keep_alive, head_only=method == 'HEAD'))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        query = _first_values(parse_qs(url.query))
+        if url.path == '/healthz':
+            batcher = self.batcher
+            return 200, (f"ok requests={batcher.requests} added={batcher.added} batches={batcher.batches} "
+                         f"queued={batcher.queue.qsize()} uptime={time.time() - self.started:.0f}s\n", 'text/plain')
+        if url.path not in ('/', '/unsubscribe'):
+            return 404, _page("Page not found.")
+
+        email = query.get('email') or ''
+        # ?unsubscribe=<address>, as the Streamlit route accepts (the footer link uses ?unsubscribe=true)
+        if not email and '@' in query.get('unsubscribe', ''):
+            email = query['unsubscribe']
+
+        if method in ('GET', 'HEAD'):
+            # Never unsubscribe on GET: link scanners and previews follow List-Unsubscribe URLs
+            return 200, _form_page(email)
+        if method != 'POST':
+            return 405, _page("Method not allowed.")
+
+        form = _parse_form(headers.get('content-type', ''), body)
+        one_click = form.get('List-Unsubscribe') == 'One-Click'
+        address = canonicalize_email(form.get('email') or email)
+        if one_click:
+            reason = ONE_CLICK_REASON
+        else:
+            reason = form.get('reason') or query.get('reason') or NO_REASON
+            if reason not in UNSUBSCRIBE_REASONS:
+                reason = NO_REASON
+        if address is None:
+            return 400, ("Please enter a valid email address.\n", 'text/plain') if one_click else _page("Please enter a valid email address.")
+
+        added = await self.batcher.submit(address, reason)
+        if one_click:
+            return 200, ("Unsubscribed\n", 'text/plain')
+        if added:
+            return 200, _page("You have been successfully unsubscribed from our email communications. You will no longer receive emails from fluorocell.ai. You may close this page now.")
+        return 200, _page("Your email is already unsubscribed from our communications. You may close this page now.")
+
+
+def _parse_head(head):
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ')
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, sep, value = line.partition(':')
+            if not sep:
+                raise ValueError(line)
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise ValueError('chunked bodies are not supported')
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+    return method, target, headers, keep_alive
+
+
+def _parse_form(content_type, body):
+    if content_type.startswith('multipart/form-data'):
+        # Enough for RFC 8058 one-click, the only multipart form we expect
+        if b'name="List-Unsubscribe"' in body and b'One-Click' in body:
+            return {'List-Unsubscribe': 'One-Click'}
+        return {}
+    return _first_values(parse_qs(body.decode('utf-8', 'replace')))
+
+
+def _first_values(params):
+    return {name: values[0] for name, values in params.items()}
+
+
+def _response(status, content, keep_alive=True, head_only=False):
+    text, content_type = content
+    payload = text.encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Cache-Control: no-store\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode('latin-1')
+    return head if head_only else head + payload
+
+
+def _page(message, form=""):
+    return (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">"
+        "<title>Unsubscribe - CellAI</title></head>"
+        "<body style=\"font-family: Arial, sans-serif; max-width: 640px; margin: 40px auto; padding: 0 16px;\">"
+        "<h1>Unsubscribe from Fluorocell.ai Email Communications</h1>"
+        f"<p>{html.escape(message)}</p>{form}</body></html>"
+    ), 'text/html'
+
+
+def _form_page(email):
+    options = "".join(f"<option>{html.escape(reason)}</option>" for reason in UNSUBSCRIBE_REASONS)
+    heading = f"<h3>Email address to unsubscribe: <strong>{html.escape(email)}</strong></h3>" if email else ""
+    form = (
+        f"{heading}<form method=\"post\" action=\"/unsubscribe\">"
+        f"<p><label>{'Confirm Email Address' if email else 'Your Email Address'}<br>"
+        f"<input type=\"email\" name=\"email\" value=\"{html.escape(email, quote=True)}\" required style=\"width: 100%;\"></label></p>"
+        f"<p><label>Reason for unsubscribing (optional)<br><select name=\"reason\">"
+        f"<option value=\"\">Select a reason (optional)</option>{options}</select></label></p>"
+        "<p><button type=\"submit\">Confirm Unsubscribe</button></p></form>"
+    )
+    return _page("Confirm below to stop receiving our emails.", form)[0], 'text/html'
+
+
+async def serve(host='127.0.0.1', port=8502, db_path=DB_PATH, export=True, batch_size=BATCH_SIZE, linger=LINGER_SECONDS):
+    store = UnsubscribeStore(db_path)
+    store.bootstrap()
+    writer = MirrorWriter(store) if export else None
+    if writer is not None:
+        # Merge edits made to the files outside the app before each export
+        ExternalSync(store, writer)
+    batcher = IntakeBatcher(store, writer, batch_size, linger)
+    server = IntakeServer(batcher)
+    batch_task = asyncio.create_task(batcher.run())
+    tcp_server = await asyncio.start_server(server.handle_connection, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+    print(f"Unsubscribe intake listening on http://{host}:{port}/unsubscribe", flush=True)
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        batch_task.cancel()
+        if writer is not None:
+            writer.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the unsubscribe intake endpoint.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--db', default=DB_PATH, help="unsubscribe database (default: %(default)s)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--linger-ms', type=float, default=LINGER_SECONDS * 1000)
+    parser.add_argument('--no-export', action='store_true', help="don't write the CSV/JSON files (for load testing)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, not args.no_export, args.batch_size, args.linger_ms / 1000))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,648 @@
+import os
+import io
+import csv
+import json
+import sqlite3
+import datetime
+import threading
+from collections.abc import Iterable, Iterator, Mapping
+
+from atomic_files import content_hash, file_lock, write_atomic
+from email_address import normalize_email
+from suppression_index import build_index
+
+# Indexed storage for the unsubscribe list.
+#
+# Every unsubscribe used to rebuild a DataFrame of the whole list and rewrite
+# it to every CSV/JSON location. The store keeps the list in a local SQLite
+# table (WAL mode) keyed by normalized email, so adding one address is a single
+# indexed insert. The files the email script reads are only written by
+# export(), which compacts the table into unsubscribed_users.csv, its mirrors,
+# the JSON backups and the suppression indexes; callers don't export after
+# each change but mark the MirrorWriter (unsubscribe_writer.py) dirty, and it
+# runs one export per burst of changes on a background thread.
+#
+# This is the only copy of the list the app keeps: every page reads and writes
+# through the store, instead of holding its own list or DataFrame in session
+# state and converting between them on each save.
+#
+# Other processes (the intake server, other app instances) write to the same
+# database. Triggers log the id and old key of every deleted or updated row in
+# row_changes, so when another connection commits, the in-memory index only
+# applies rows above the highest id it has seen plus the logged changes,
+# instead of reloading the whole table. Commits that change neither, such as
+# the file stamps every export writes to meta, cost two indexed lookups.
+
+DB_PATH = 'unsubscribed_users.db'
+PRIMARY_CSV_PATH = 'unsubscribed_users.csv'
+PRIMARY_JSON_PATH = 'unsubscribed_users.json'
+PRIMARY_INDEX_PATH = 'unsubscribed_users.idx'
+
+# Locations the email script reads from
+MIRROR_CSV_PATHS = [
+    os.path.expanduser('~/Documents/Python/unsubscribed_users.csv'),  # Python folder in Documents
+    os.path.expanduser('~/unsubscribed_users.csv'),  # Home directory
+    '/tmp/unsubscribed_users.csv'  # Temp directory
+]
+MIRROR_JSON_PATHS = [
+    os.path.expanduser('~/Documents/Python/unsubscribed_users.json')
+]
+# Memory-mappable suppression index (suppression_index.py) next to each CSV copy
+MIRROR_INDEX_PATHS = [os.path.splitext(path)[0] + '.idx' for path in MIRROR_CSV_PATHS]
+
+# Where existing lists are loaded from, in order of preference
+SOURCE_CSV_PATHS = [PRIMARY_CSV_PATH] + MIRROR_CSV_PATHS
+SOURCE_JSON_PATHS = [
+    PRIMARY_JSON_PATH,
+    os.path.expanduser('~/Documents/Python/unsubscribed_users.json'),
+    os.path.expanduser('~/unsubscribed_users.json')
+]
+
+FIELDS = ['email', 'reason', 'timestamp']
+
+# Rows per chunk when the CSV is produced incrementally (iter_csv)
+CSV_CHUNK_ROWS = 50_000
+
+# Entries kept in the row_changes log; a store that falls further behind reloads the table
+CHANGE_LOG_ROWS = 100_000
+
+# Ids only ever increase (AUTOINCREMENT), so rows above the highest id a store has seen are exactly the new ones
+UNSUBSCRIBED_COLUMNS = (
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'email_key TEXT NOT NULL UNIQUE, '
+    'email TEXT NOT NULL, '
+    'reason TEXT, '
+    'timestamp TEXT'
+)
+
+# Choices offered by the unsubscribe form (route_unsubscribe.py and unsubscribe_server.py)
+UNSUBSCRIBE_REASONS = [
+    "Too many emails",
+    "Not relevant to my work",
+    "I no longer need this service",
+    "I didn't sign up for this",
+    "Other"
+]
+NO_REASON = "No reason provided"
+
+# Sort keys accepted by UnsubscribeStore.query
+SORT_COLUMNS = {
+    'added': 'id',
+    'email': 'email_key',
+    'reason': 'reason',
+    'timestamp': 'timestamp',
+}
+
+
+def current_timestamp() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _clean(value):
+    # pandas hands us NaN for empty cells
+    if value is None or value != value:
+        return ''
+    return str(value)
+
+
+class UnsubscribeRecord:
+    """One address on the list. Slotted, so a large index costs three string references per entry."""
+
+    __slots__ = ('email', 'reason', 'timestamp')
+
+    def __init__(self, email: str, reason: str = '', timestamp: str = ''):
+        self.email = email
+        self.reason = reason
+        self.timestamp = timestamp
+
+    def as_row(self) -> tuple:
+        return (self.email, self.reason, self.timestamp)
+
+    def as_dict(self) -> dict:
+        return dict(zip(FIELDS, self.as_row()))
+
+    def __eq__(self, other):
+        return isinstance(other, UnsubscribeRecord) and self.as_row() == other.as_row()
+
+    def __repr__(self):
+        return f"UnsubscribeRecord{self.as_row()!r}"
+
+
+class UnsubscribeStore:
+    """SQLite-backed unsubscribe list with an email-keyed index.
+
+    One instance is meant to be shared by every session in the process. Reads
+    are served from an in-memory dict keyed by normalized email, which is kept
+    up to date by our own writes and, when SQLite's data_version shows that
+    another process has committed to the database, by the rows it added and
+    the changes it logged.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.lock_path = db_path + '.lock'
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS unsubscribed ({UNSUBSCRIBED_COLUMNS})')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS unsubscribed_timestamp ON unsubscribed (timestamp)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS unsubscribed_reason ON unsubscribed (reason)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS row_changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, row_id INTEGER, email_key TEXT)'
+        )
+        for event in ('DELETE', 'UPDATE'):
+            self.conn.execute(
+                f'CREATE TRIGGER IF NOT EXISTS unsubscribed_log_{event.lower()} AFTER {event} ON unsubscribed '
+                'BEGIN INSERT INTO row_changes (row_id, email_key) VALUES (old.id, old.email_key); END'
+            )
+        self._index = None
+        self._data_version = None
+        # Highest row id and change log entry the index reflects
+        self._max_id = 0
+        self._max_seq = 0
+        self._log_checked = 0
+
+    def close(self):
+        self.conn.close()
+
+    # --- Reads ---
+
+    def _cached_index(self):
+        # data_version only changes when another connection commits
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if self._index is None or version != self._data_version:
+            # One read transaction, so the rows and the high-water marks are from the same snapshot
+            with self.conn:
+                self.conn.execute('BEGIN')
+                if self._index is None or not self._apply_changes():
+                    self._load_index()
+            self._data_version = version
+        return self._index
+
+    def _high_water(self):
+        max_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM unsubscribed').fetchone()[0]
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'row_changes'").fetchone()
+        return max_id, row[0] if row else 0
+
+    def _load_index(self):
+        rows = self.conn.execute('SELECT email_key, email, reason, timestamp FROM unsubscribed ORDER BY id')
+        self._index = {row[0]: UnsubscribeRecord(*row[1:]) for row in rows}
+        self._max_id, self._max_seq = self._high_water()
+
+    def _apply_changes(self):
+        # Bring the index up to date with other connections' commits. False if the log no longer reaches back far enough
+        max_id, max_seq = self._high_water()
+        if (max_id, max_seq) == (self._max_id, self._max_seq):
+            return True
+        if max_seq - self._max_seq > len(self._index) // 2:
+            # Most of the table changed (replace_all): reading it again is cheaper
+            return False
+        changes = self.conn.execute(
+            'SELECT seq, email_key FROM row_changes WHERE seq > ? ORDER BY seq', (self._max_seq,)
+        ).fetchall()
+        if max_seq > self._max_seq and (not changes or changes[0][0] != self._max_seq + 1):
+            return False
+        for _, key in changes:
+            self._index.pop(key, None)
+        # The current version of the updated rows, then the new ones
+        updated = self.conn.execute(
+            'SELECT email_key, email, reason, timestamp FROM unsubscribed '
+            'WHERE id IN (SELECT row_id FROM row_changes WHERE seq > ?) AND id <= ? ORDER BY id',
+            (self._max_seq, self._max_id)
+        )
+        added = self.conn.execute(
+            'SELECT email_key, email, reason, timestamp FROM unsubscribed WHERE id > ? ORDER BY id', (self._max_id,)
+        )
+        for rows in (updated, added):
+            for row in rows:
+                self._index[row[0]] = UnsubscribeRecord(*row[1:])
+        self._max_id, self._max_seq = max_id, max_seq
+        return True
+
+    def _wrote(self):
+        # After our own write: if nobody else has committed since the index was synced, it reflects
+        # everything up to the current high-water marks. The marks are read first, so a commit in
+        # between shows up in data_version and leaves them to the next _apply_changes.
+        if self._index is None:
+            return
+        max_id, max_seq = self._high_water()
+        if self.conn.execute('PRAGMA data_version').fetchone()[0] == self._data_version:
+            self._max_id, self._max_seq = max_id, max_seq
+        if max_seq // CHANGE_LOG_ROWS != self._log_checked // CHANGE_LOG_ROWS:
+            # Trim the log each time it grows by another CHANGE_LOG_ROWS entries
+            self.conn.execute('DELETE FROM row_changes WHERE seq <= ?', (max_seq - CHANGE_LOG_ROWS,))
+        self._log_checked = max_seq
+
+    def contains(self, email: str) -> bool:
+        with self.lock:
+            return normalize_email(email) in self._cached_index()
+
+    def contains_many(self, emails: Iterable[str]) -> list[bool]:
+        """Membership for a batch of addresses, one hash lookup each."""
+        with self.lock:
+            index = self._cached_index()
+            return [normalize_email(email) in index for email in emails]
+
+    def get(self, email: str) -> UnsubscribeRecord | None:
+        with self.lock:
+            return self._cached_index().get(normalize_email(email))
+
+    def version(self) -> tuple[int, int, int]:
+        """A value that changes whenever the list may have changed, through this store or another process."""
+        with self.lock:
+            # The high-water marks cover other connections' changes (but not their file stamps), total_changes our own
+            self._cached_index()
+            return self._max_id, self._max_seq, self.conn.total_changes
+
+    def count(self) -> int:
+        with self.lock:
+            return len(self._cached_index())
+
+    def emails(self) -> list[str]:
+        with self.lock:
+            return [record.email for record in self._cached_index().values()]
+
+    def records(self) -> list[dict]:
+        """The whole list as plain dicts, in the order it was added."""
+        with self.lock:
+            return [record.as_dict() for record in self._cached_index().values()]
+
+    # --- Paged queries (served by SQLite, so only one page is materialized) ---
+
+    def _where(self, search, reason):
+        clauses, params = [], []
+        if search:
+            pattern = '%' + search.strip().casefold().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append("(email_key LIKE ? ESCAPE '\\' OR reason LIKE ? ESCAPE '\\')")
+            params += [pattern, pattern]
+        if reason is not None:
+            clauses.append('reason = ?')
+            params.append(reason)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def count_matching(self, search: str = '', reason: str | None = None) -> int:
+        where, params = self._where(search, reason)
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM unsubscribed' + where, params).fetchone()[0]
+
+    def iter_page(self, search: str = '', reason: str | None = None, sort: str = 'added', descending: bool = False,
+                  offset: int = 0, limit: int = 50) -> Iterator[UnsubscribeRecord]:
+        """One page of records matching search (email or reason substring) and reason, sorted by a SORT_COLUMNS key."""
+        where, params = self._where(search, reason)
+        order = f"{SORT_COLUMNS[sort]} {'DESC' if descending else 'ASC'}, id"
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT email, reason, timestamp FROM unsubscribed{where} ORDER BY {order} LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+        return (UnsubscribeRecord(*row) for row in rows)
+
+    def reasons(self) -> list[str]:
+        """Distinct reasons, most common first."""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT reason FROM unsubscribed GROUP BY reason ORDER BY COUNT(*) DESC, reason'
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # --- Writes ---
+
+    def add(self, email: str, reason: str = '', timestamp: str | None = None) -> bool:
+        """Insert one address. Returns False if it was already in the list."""
+        # The address is stored as given (callers canonicalize it), the key is only for lookups
+        record = UnsubscribeRecord(_clean(email).strip(), _clean(reason), _clean(timestamp) or current_timestamp())
+        key = normalize_email(record.email)
+        with self.lock:
+            index = self._cached_index()
+            if key in index:
+                return False
+            cursor = self.conn.execute(
+                'INSERT OR IGNORE INTO unsubscribed (email_key, email, reason, timestamp) VALUES (?, ?, ?, ?)',
+                (key,) + record.as_row()
+            )
+            if cursor.rowcount == 0:
+                return False
+            index[key] = record
+            self._wrote()
+        return True
+
+    def bulk_add(self, records: Iterable[Mapping]) -> int:
+        """Insert many records in one transaction. Returns the number added."""
+        with self.lock:
+            index = self._cached_index()
+            new_records = {}
+            for key, record in _normalized(records):
+                if key not in index and key not in new_records:
+                    new_records[key] = record
+            with self.conn:
+                self.conn.execute('BEGIN')
+                self._insert(new_records.items())
+            # Keep the index current instead of reloading it, so chunked imports stay incremental
+            index.update(new_records)
+            self._wrote()
+            return len(new_records)
+
+    def _insert(self, keyed_records):
+        # Returns the number of rows inserted
+        return self.conn.executemany(
+            'INSERT OR IGNORE INTO unsubscribed (email_key, email, reason, timestamp) VALUES (?, ?, ?, ?)',
+            ((key,) + record.as_row() for key, record in keyed_records)
+        ).rowcount
+
+    def remove(self, email: str) -> bool:
+        key = normalize_email(email)
+        with self.lock:
+            cursor = self.conn.execute('DELETE FROM unsubscribed WHERE email_key = ?', (key,))
+            if self._index is not None:
+                self._index.pop(key, None)
+            self._wrote()
+            return cursor.rowcount > 0
+
+    def remove_many(self, emails: Iterable[str]) -> int:
+        """Delete addresses in one transaction. Returns the number removed."""
+        keys = {normalize_email(email) for email in emails}
+        with self.lock:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                # rowcount leaves out the rows the triggers log, unlike total_changes
+                cursor = self.conn.executemany('DELETE FROM unsubscribed WHERE email_key = ?', ((key,) for key in keys))
+            if self._index is not None:
+                for key in keys:
+                    self._index.pop(key, None)
+            self._wrote()
+            return cursor.rowcount
+
+    def apply_edits(self, updates: Mapping[str, Mapping] | None = None, added: Iterable[Mapping] | None = None,
+                    deleted: Iterable[str] | None = None) -> int:
+        """Apply a data editor's delta in one transaction, touching only the rows it names.
+
+        updates maps an existing address to the changed fields ({'reason': ...},
+        or a new 'email'), added is a list of new records and deleted a list of
+        addresses. Updated rows keep their position in the list. An edit that
+        would rename a row onto an address already in the list is skipped.
+        Returns the number of rows changed.
+        """
+        updates = updates or {}
+        with self.lock:
+            index = self._cached_index()
+            changed = 0
+            try:
+                with self.conn:
+                    self.conn.execute('BEGIN')
+                    deleted_keys = {normalize_email(email) for email in deleted or []}
+                    changed += self.conn.executemany(
+                        'DELETE FROM unsubscribed WHERE email_key = ?', ((key,) for key in deleted_keys)
+                    ).rowcount
+                    for key in deleted_keys:
+                        index.pop(key, None)
+
+                    for email, changes in updates.items():
+                        key = normalize_email(email)
+                        current = index.get(key)
+                        if current is None:
+                            continue
+                        record = next(_normalized([{**current.as_dict(), **changes}]), None)
+                        if record is None:
+                            continue
+                        new_key, record = record
+                        if new_key != key and new_key in index:
+                            continue
+                        changed += self.conn.execute(
+                            'UPDATE unsubscribed SET email_key = ?, email = ?, reason = ?, timestamp = ? WHERE email_key = ?',
+                            (new_key,) + record.as_row() + (key,)
+                        ).rowcount
+                        if new_key != key:
+                            del index[key]
+                        index[new_key] = record
+
+                    new_records = {}
+                    for key, record in _normalized(added or []):
+                        if key not in index and key not in new_records:
+                            new_records[key] = record
+                    changed += self._insert(new_records.items())
+                    index.update(new_records)
+            except Exception:
+                # The transaction was rolled back; don't trust the partly updated index
+                self._index = None
+                raise
+            self._wrote()
+            return changed
+
+    def replace_all(self, records: Iterable[Mapping]) -> int:
+        """Replace the whole list, e.g. after an edit on the admin or debug page."""
+        with self.lock:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                self.conn.execute('DELETE FROM unsubscribed')
+                # Every other store reloads after a full replace anyway, so the rows the trigger just logged aren't kept
+                self.conn.execute('DELETE FROM row_changes')
+                self._insert(_normalized(records))
+            self._index = None
+            self._max_id = self._max_seq = self._log_checked = 0
+            return self.count()
+
+    def clear(self) -> None:
+        self.replace_all([])
+
+    # --- File sync ---
+
+    def serialize(self, records: list[UnsubscribeRecord] | None = None) -> tuple[bytes, bytes]:
+        """Return the list (or the given records) as (CSV bytes, JSON bytes)."""
+        if records is None:
+            with self.lock:
+                records = list(self._cached_index().values())
+        return b''.join(_csv_chunks(records)), json.dumps([record.as_dict() for record in records]).encode('utf-8')
+
+    def iter_csv(self, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+        """Yield the same bytes as the CSV from serialize(), chunk_rows rows at a time.
+
+        The list is snapshotted up front, so later writes don't tear the output.
+        """
+        with self.lock:
+            records = list(self._cached_index().values())
+        return _csv_chunks(records, chunk_rows)
+
+    def export(self, csv_paths: list[str] | None = None, json_paths: list[str] | None = None,
+               index_paths: list[str] | None = None) -> int:
+        """Compact the table into the CSV file(s) the email script reads, the JSON backups and the suppression indexes.
+
+        The list is serialized once, and each location is replaced atomically
+        under a lock shared with other processes. Every file written is stamped
+        with its content hash, size, mtime and the high-water marks it reflects,
+        so locations that already hold the same bytes are skipped without being
+        read or rewritten, and when no row changed and no file was touched since,
+        nothing is serialized at all.
+        Returns the number of files written.
+        """
+        csv_paths = [PRIMARY_CSV_PATH] + MIRROR_CSV_PATHS if csv_paths is None else csv_paths
+        json_paths = [PRIMARY_JSON_PATH] + MIRROR_JSON_PATHS if json_paths is None else json_paths
+        index_paths = [PRIMARY_INDEX_PATH] + MIRROR_INDEX_PATHS if index_paths is None else index_paths
+        with self.lock:
+            index = self._cached_index()
+            # The index may be ahead of these marks (our own writes), never behind
+            marks = f"{self._max_id} {self._max_seq}"
+            if all(self._exported_marks(path) == marks for path in _unique_paths(csv_paths + json_paths + index_paths)):
+                return 0
+            records = list(index.values())
+        csv_data, json_data = self.serialize(records)
+        outputs = [(csv_paths, csv_data, PRIMARY_CSV_PATH), (json_paths, json_data, PRIMARY_JSON_PATH)]
+        if index_paths:
+            outputs.append((index_paths, build_index(record.email for record in records), PRIMARY_INDEX_PATH))
+
+        written = 0
+        with file_lock(self.lock_path):
+            for paths, data, primary in outputs:
+                digest = content_hash(data)
+                for path in _unique_paths(paths):
+                    try:
+                        if self._is_current(path, digest):
+                            # Same bytes: record that they hold these marks too
+                            self._stamp(path, digest, marks)
+                            continue
+                        write_atomic(path, data)
+                        self._stamp(path, digest, marks)
+                        written += 1
+                    except Exception:
+                        # The primary files must be written; mirrors are best effort
+                        if path == primary:
+                            raise
+            if PRIMARY_CSV_PATH in csv_paths:
+                # Under the file lock, so it always describes what the primary CSV holds
+                with self.lock:
+                    self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('exported', ?)", (marks,))
+        return written
+
+    def changed_since_export(self) -> set[str] | None:
+        """Keys added, removed or edited (old and new) by any process since the primary CSV was last exported.
+
+        None if that can't be told: nothing was exported yet, or the change log
+        has been trimmed past the export. Used by ExternalSync to merge a file
+        edited outside the app without undoing changes it doesn't contain yet.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'exported'").fetchone()
+            if row is None:
+                return None
+            exported_id, exported_seq = map(int, row[0].split())
+            with self.conn:
+                self.conn.execute('BEGIN')
+                _, max_seq = self._high_water()
+                first = self.conn.execute('SELECT MIN(seq) FROM row_changes WHERE seq > ?', (exported_seq,)).fetchone()[0]
+                if max_seq > exported_seq and first != exported_seq + 1:
+                    return None
+                keys = {row[0] for row in self.conn.execute('SELECT email_key FROM row_changes WHERE seq > ?', (exported_seq,))}
+                keys.update(row[0] for row in self.conn.execute('SELECT email_key FROM unsubscribed WHERE id > ?', (exported_id,)))
+                keys.update(row[0] for row in self.conn.execute(
+                    'SELECT email_key FROM unsubscribed WHERE id IN (SELECT row_id FROM row_changes WHERE seq > ?)', (exported_seq,)
+                ))
+            return keys
+
+    def _exported_marks(self, path):
+        # The high-water marks path was last exported at, if it's still as we left it
+        stamp = self._file_stamp(path)
+        return stamp and stamp[3]
+
+    def _is_current(self, path, digest):
+        # A changed size or mtime means someone else touched the file since we wrote it
+        stamp = self._file_stamp(path)
+        return stamp is not None and stamp[0] == digest
+
+    def written_by_us(self, path: str) -> bool:
+        """True if path is exactly as our last export left it."""
+        return self._file_stamp(path) is not None
+
+    def _file_stamp(self, path):
+        # The stamped digest, if the file's size and mtime still match what we wrote
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM meta WHERE key = ?', ('stamp:' + os.path.realpath(path),)).fetchone()
+        if row is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        digest, size, mtime_ns, marks = row[0].split(' ', 3)
+        if (int(size), int(mtime_ns)) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        return digest, stat.st_size, stat.st_mtime_ns, marks
+
+    def _stamp(self, path, digest, marks):
+        stat = os.stat(path)
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                ('stamp:' + os.path.realpath(path), f"{digest} {stat.st_size} {stat.st_mtime_ns} {marks}")
+            )
+
+    def load_from_files(self) -> str | None:
+        """Replace the table with the first list found on disk. Returns the path used, or None."""
+        with self.lock:
+            return self._load_from_files()
+
+    def _load_from_files(self):
+        for path in SOURCE_CSV_PATHS:
+            if os.path.exists(path):
+                with open(path, newline='') as f:
+                    self.replace_all(csv.DictReader(f))
+                if path != PRIMARY_CSV_PATH:
+                    # Sync to the primary location
+                    self.export(csv_paths=[PRIMARY_CSV_PATH], json_paths=[], index_paths=[])
+                return path
+
+        # Try JSON backup as last resort
+        for path in SOURCE_JSON_PATHS:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    self.replace_all(json.load(f))
+                self.export(csv_paths=[PRIMARY_CSV_PATH], json_paths=[], index_paths=[])
+                return path
+        return None
+
+    def bootstrap(self) -> bool:
+        """Import the existing CSV/JSON list the first time the store is opened."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'bootstrapped'").fetchone()
+            if row is not None:
+                return False
+            self.load_from_files()
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bootstrapped', ?)", (current_timestamp(),))
+            return True
+
+
+def _normalized(records):
+    # Yield (key, record) pairs with empty addresses dropped and gaps filled
+    for record in records:
+        email = _clean(record.get('email')).strip()
+        if not email:
+            continue
+        yield normalize_email(email), UnsubscribeRecord(
+            email, _clean(record.get('reason')), _clean(record.get('timestamp')) or current_timestamp()
+        )
+
+
+def _csv_chunks(records, chunk_rows=CSV_CHUNK_ROWS):
+    # Header first, then encoded blocks of rows; only one block is held as text at a time
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(FIELDS)
+    for start in range(0, len(records), chunk_rows):
+        writer.writerows(record.as_row() for record in records[start:start + chunk_rows])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Empty list: just the header
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _unique_paths(paths):
+    # The app may run from the home directory, where the primary file and a mirror coincide
+    seen = set()
+    for path in paths:
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            yield path
+
@@ -0,0 +1,185 @@
+import io
+import os
+import csv
+import threading
+
+from email_address import normalize_email
+from unsubscribe_store import SOURCE_CSV_PATHS
+
+# Incremental detection of changes made to the unsubscribe CSV files by
+# something other than this app (the email script, a manual edit).
+#
+# For every watched file we remember its inode, size, mtime and how far we have
+# read. On each poll:
+#   - files we wrote ourselves (stamped by the store) or that haven't changed
+#     are skipped without being read;
+#   - files that only grew are read from the saved offset, and the new rows are
+#     merged into the store by email;
+#   - files that were rewritten are parsed in full and diffed against the
+#     store. Only the primary source (the first file that exists, as in the
+#     original load order) can remove addresses; a stale mirror elsewhere can
+#     only contribute additions.
+#
+# The files are merged before our own pending changes are exported: the
+# MirrorWriter calls merge() before every export, so a row added outside the
+# app is never overwritten. An edited file predates our unexported changes,
+# so addresses added, removed or edited since the last export
+# (store.changed_since_export) keep their state in the store rather than the
+# file's; if that set isn't known, a file can only add addresses.
+
+TAIL_BYTES = 64
+
+
+class FileState:
+    __slots__ = ('inode', 'size', 'mtime_ns', 'offset', 'tail')
+
+    def __init__(self, inode, size, mtime_ns, offset, tail):
+        self.inode = inode
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offset = offset
+        self.tail = tail
+
+
+class SyncResult:
+    __slots__ = ('added', 'removed', 'bytes_read')
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.bytes_read = 0
+
+    def __bool__(self):
+        return bool(self.added or self.removed)
+
+
+class ExternalSync:
+    """Polls the CSV locations and applies external edits to the store."""
+
+    def __init__(self, store, writer=None, paths=None):
+        self.store = store
+        self.writer = writer
+        self.paths = list(SOURCE_CSV_PATHS if paths is None else paths)
+        self.states = {}
+        self.lock = threading.Lock()
+        self._changed = None
+        if writer is not None:
+            # Merge external edits before each of the writer's exports overwrites them
+            writer.sync = self
+
+    def poll(self):
+        """Apply changes made to the files since the last poll, then write out pending changes. Returns a SyncResult."""
+        result = self.merge()
+        if self.writer is not None:
+            if result:
+                # Bring the other locations in line with the merged list
+                self.writer.mark_dirty()
+            self.writer.flush()
+        return result
+
+    def merge(self):
+        """Apply changes made to the files since the last poll to the store, without writing any file."""
+        with self.lock:
+            result = SyncResult()
+            self._changed = None
+            primary = next((path for path in self.paths if os.path.exists(path)), None)
+            for path in self.paths:
+                try:
+                    self._poll_file(path, path == primary, result)
+                except OSError:
+                    self.states.pop(path, None)
+            return result
+
+    def _changed_keys(self):
+        # What the store changed since its last export, looked up once per merge and only if a file has to be read
+        if self._changed is None:
+            keys = self.store.changed_since_export()
+            self._changed = (keys is not None, keys or set())
+        return self._changed
+
+    def _poll_file(self, path, authoritative, result):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.states.pop(path, None)
+            return
+
+        state = self.states.get(path)
+        if state is not None and (state.inode, state.size, state.mtime_ns) == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+            return
+        if self.store.written_by_us(path):
+            # Our own export: nothing to merge, just remember where the file ends
+            self.states[path] = self._state_at_end(path, stat)
+            return
+
+        with open(path, 'rb') as f:
+            if state is not None and self._only_appended(f, state, stat):
+                self._read_appended(f, path, state, stat, result)
+            else:
+                self._read_full(f, path, stat, authoritative, result)
+
+    def _only_appended(self, f, state, stat):
+        if stat.st_ino != state.inode or stat.st_size < state.offset:
+            return False
+        # The bytes just before our offset must be the ones we saw last time
+        f.seek(state.offset - len(state.tail))
+        return f.read(len(state.tail)) == state.tail
+
+    def _read_appended(self, f, path, state, stat, result):
+        f.seek(state.offset)
+        data = f.read(stat.st_size - state.offset)
+        result.bytes_read += len(data)
+        # Leave a partially written last line for the next poll
+        complete = data[:data.rfind(b'\n') + 1]
+        rows = csv.DictReader(io.StringIO(complete.decode('utf-8')), fieldnames=self._header(f))
+        self._merge(list(rows), result)
+        offset = state.offset + len(complete)
+        self.states[path] = FileState(stat.st_ino, stat.st_size, stat.st_mtime_ns, offset, self._tail(f, offset))
+
+    def _read_full(self, f, path, stat, authoritative, result):
+        f.seek(0)
+        data = f.read()
+        result.bytes_read += len(data)
+        complete = data[:data.rfind(b'\n') + 1]
+        rows = list(csv.DictReader(io.StringIO(complete.decode('utf-8'))))
+        self._merge(rows, result)
+
+        known, changed = self._changed_keys()
+        if authoritative and known:
+            file_keys = {normalize_email(row.get('email') or '') for row in rows}
+            removed = [email for email in self.store.emails()
+                       if normalize_email(email) not in file_keys and normalize_email(email) not in changed]
+            if removed:
+                self.store.remove_many(removed)
+            result.removed.extend(removed)
+
+        self.states[path] = FileState(stat.st_ino, stat.st_size, stat.st_mtime_ns, len(complete), self._tail(f, len(complete)))
+
+    def _merge(self, rows, result):
+        _, changed = self._changed_keys()
+        # The store's version of an address it changed since the export wins over the file's
+        rows = [row for row in rows if (row.get('email') or '').strip() and normalize_email(row['email']) not in changed]
+        known = self.store.contains_many(row['email'] for row in rows)
+        new_rows = [row for row, found in zip(rows, known) if not found]
+        if new_rows and self.store.bulk_add(new_rows):
+            seen = set()
+            for row in new_rows:
+                key = normalize_email(row['email'])
+                if key not in seen:
+                    seen.add(key)
+                    result.added.append(row['email'].strip())
+
+    def _state_at_end(self, path, stat):
+        with open(path, 'rb') as f:
+            return FileState(stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_size, self._tail(f, stat.st_size))
+
+    @staticmethod
+    def _tail(f, offset):
+        start = max(offset - TAIL_BYTES, 0)
+        f.seek(start)
+        return f.read(offset - start)
+
+    @staticmethod
+    def _header(f):
+        f.seek(0)
+        return next(csv.reader(io.StringIO(f.readline().decode('utf-8'))), [])
@@ -0,0 +1,139 @@
+import streamlit as st
+import datetime
+from resources import get_unsubscribe_store, get_unsubscribe_writer, get_external_sync, get_download_service
+
+# Unsubscribe list helpers and widgets shared by the unsubscribe, admin and debug routes
+
+# Function to load unsubscribed users from the shared store
+def load_unsubscribed_users():
+    try:
+        return get_unsubscribe_store().emails()
+    except Exception as e:
+        st.session_state['load_error'] = str(e)
+        return []
+
+# Function to add a new unsubscribed user
+def add_unsubscribed_user(email, reason=""):
+    # Indexed insert; the CSV/JSON files are rewritten in the background, once per burst of changes
+    try:
+        if get_unsubscribe_store().add(email, reason, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")):
+            get_unsubscribe_writer().mark_dirty()
+    except Exception as e:
+        st.session_state['save_error'] = str(e)
+
+# Function to save unsubscribed users to a CSV file
+def save_unsubscribed_users(users=None):
+    try:
+        # Replace the stored list if given one, then compact it into the CSV/JSON files the email script reads
+        if users is not None:
+            get_unsubscribe_store().replace_all(users)
+        
+        writer = get_unsubscribe_writer()
+        if not writer.flush(force=True):
+            st.session_state['save_error'] = writer.last_error
+            return False
+        
+        # Return success
+        return True
+    except Exception as e:
+        st.session_state['save_error'] = str(e)
+        return False
+
+# Function to show whether the CSV/JSON files have caught up with the latest changes
+def show_sync_status():
+    writer = get_unsubscribe_writer()
+    status = writer.status()
+    if status == 'pending':
+        st.write("File sync: ⏳ Pending")
+    elif status == 'error':
+        st.write(f"File sync: ❌ Failed ({writer.last_error})")
+    elif writer.last_synced:
+        st.write(f"File sync: ✅ Synced at {datetime.datetime.fromtimestamp(writer.last_synced).strftime('%H:%M:%S')}")
+    else:
+        st.write("File sync: ✅ Synced")
+
+# Function to report what a poll of the unsubscribe files found
+def show_external_changes(result):
+    if result.added:
+        st.success(f"✅ Found {len(result.added)} new unsubscribed emails: {', '.join(result.added[:10])}{' ...' if len(result.added) > 10 else ''}")
+    if result.removed:
+        st.warning(f"Removed {len(result.removed)} emails deleted from the file: {', '.join(result.removed[:10])}{' ...' if len(result.removed) > 10 else ''}")
+    if not result:
+        st.info("No new unsubscribes found")
+
+@st.fragment(run_every="30s")
+def watch_external_updates():
+    result = get_external_sync().poll()
+    if result:
+        show_external_changes(result)
+    st.caption(f"Last checked at {datetime.datetime.now().strftime('%H:%M:%S')}")
+
+# Sort choices for the paginated unsubscribe tables
+SORT_OPTIONS = {
+    "Newest first": ('timestamp', True),
+    "Oldest first": ('timestamp', False),
+    "Email (A-Z)": ('email', False),
+    "Reason": ('reason', False),
+    "Order added": ('added', False),
+}
+
+# Function to pick one page of the unsubscribe list; filtering, sorting and paging happen in the store
+def select_unsubscribe_page(key):
+    store = get_unsubscribe_store()
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        search = st.text_input("Search email or reason", key=f"{key}_search")
+    with col2:
+        reason = st.selectbox("Reason", ["All reasons"] + store.reasons(), key=f"{key}_reason")
+    with col3:
+        sort = st.selectbox("Sort by", list(SORT_OPTIONS), key=f"{key}_sort")
+    with col4:
+        page_size = st.selectbox("Rows", [25, 50, 100, 500], index=1, key=f"{key}_page_size")
+    
+    reason = None if reason == "All reasons" else reason
+    matching = store.count_matching(search, reason)
+    pages = max((matching + page_size - 1) // page_size, 1)
+    # Keep the page number valid when a filter shrinks the result
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    
+    sort_column, descending = SORT_OPTIONS[sort]
+    rows = [record.as_dict() for record in store.iter_page(search, reason, sort_column, descending, offset=(page - 1) * page_size, limit=page_size)]
+    st.caption(f"Showing {len(rows)} of {matching} matching emails")
+    return rows
+
+# Helper function to save unsubscribed users to all locations
+def save_unsubscribed_users_to_all_locations(records):
+    """Save the unsubscribed users (email/reason/timestamp records) to all locations for the email script."""
+    try:
+        # Replace the stored list; the background writer exports it to the original location and every mirror
+        get_unsubscribe_store().replace_all(records)
+        get_unsubscribe_writer().mark_dirty()
+        
+        return True
+    except Exception as e:
+        st.error(f"Error saving to multiple locations: {e}")
+        return False
+
+# Function to offer the list as a CSV download; it is only serialized when a button is clicked
+def show_download_buttons(key, label="Download Unsubscribed List as CSV"):
+    service = get_download_service()
+    # Callables are run on click; on_click="ignore" keeps the click from rerunning the page
+    st.download_button(
+        label=label,
+        data=service.csv_bytes,
+        file_name="unsubscribed_users.csv",
+        mime="text/csv",
+        on_click="ignore",
+        key=f"{key}_csv"
+    )
+    if service.offer_gzip():
+        st.download_button(
+            label="Download compressed (.csv.gz)",
+            data=service.csv_gzip_bytes,
+            file_name="unsubscribed_users.csv.gz",
+            mime="application/gzip",
+            on_click="ignore",
+            key=f"{key}_gzip"
+        )
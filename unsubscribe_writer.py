@@ -0,0 +1,91 @@
+import time
+import atexit
+import threading
+
+# Background persistence for the unsubscribe list.
+#
+# Changes go to the SQLite store synchronously; exporting the list to the CSV
+# and JSON files the email script reads is left to a writer thread. Edits
+# mark the writer dirty, and it waits for a short quiet period before
+# exporting, so a burst of unsubscribes or admin edits costs one
+# serialization instead of one per change. Pending changes are flushed at
+# interpreter exit. If an ExternalSync is attached (sync), rows added to the
+# files outside the app are merged into the store before each export.
+
+
+class MirrorWriter:
+    """Coalesces unsubscribe list changes into one export on a background thread."""
+
+    def __init__(self, store, delay=0.5, max_delay=5.0):
+        self.store = store
+        self.delay = delay
+        self.max_delay = max_delay
+        self.cond = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.dirty_since = None
+        self.last_change = None
+        self.writing = False
+        self.last_synced = None
+        self.last_error = None
+        self.sync = None
+        self.thread = threading.Thread(target=self._run, name='unsubscribe-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def mark_dirty(self):
+        """Schedule an export. Returns immediately."""
+        with self.cond:
+            now = time.monotonic()
+            if self.dirty_since is None:
+                self.dirty_since = now
+            self.last_change = now
+            self.cond.notify()
+
+    def status(self):
+        """'pending' while changes are waiting to be written, otherwise 'synced' or 'error'."""
+        with self.cond:
+            if self.dirty_since is not None or self.writing:
+                return 'pending'
+            return 'error' if self.last_error else 'synced'
+
+    def flush(self, force=False):
+        """Write pending changes now (or unconditionally with force). Returns False on error."""
+        if force:
+            self.mark_dirty()
+        return self._write()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.dirty_since is None:
+                    self.cond.wait()
+                # Wait for a quiet period, but never longer than max_delay after the first change
+                while self.dirty_since is not None:
+                    deadline = min(self.last_change + self.delay, self.dirty_since + self.max_delay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+            self._write()
+
+    def _write(self):
+        with self.write_lock:
+            with self.cond:
+                if self.dirty_since is None:
+                    return self.last_error is None
+                self.dirty_since = None
+                self.writing = True
+            error = None
+            try:
+                if self.sync is not None:
+                    # Read what was added to the files outside the app, or the export would overwrite it
+                    self.sync.merge()
+                self.store.export()
+            except Exception as e:
+                error = str(e)
+            with self.cond:
+                self.writing = False
+                self.last_error = error
+                if error is None:
+                    self.last_synced = time.time()
+            return error is None